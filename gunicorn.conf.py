@@ -0,0 +1,18 @@
+# gunicorn.conf.py
+"""gunicorn settings: uvicorn (ASGI) workers, optionally forked from a preloaded master"""
+import gc
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+workers = int(os.getenv('WEB_CONCURRENCY', 2))
+worker_class = 'uvicorn_worker.UvicornWorker'
+
+# With PRELOAD_SDKS the master loads Django and every provider SDK once (MyappConfig.ready)
+# and forks the workers from it, so they share those pages instead of each importing them
+preload_app = os.getenv('PRELOAD_SDKS', 'False').lower() == 'true'
+
+
+def when_ready(server):
+    if preload_app:
+        # Collections in the workers would otherwise write to (and so copy) every preloaded object
+        gc.freeze()
@@ -1,19 +1,33 @@
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from rest_framework import status
-from .serializers import BlogPostSerializer, BlogGenerationRequestSerializer
-from .models import BlogPost
-
-from .views import (
-    extract_video_id, 
-    get_transcript_instant, 
-    get_video_info_enhanced,
-    generate_blog_instant,
-    get_transcription_enhanced,
-    generate_blog_from_transcription_enhanced
+from django.urls import reverse
+from django.views.decorators.http import condition
+from .serializers import (
+    BatchGenerationRequestSerializer,
+    BlogPostListSerializer,
+    BlogPostSerializer,
+    BlogSearchResultSerializer,
+    BlogGenerationRequestSerializer,
+    GenerationBatchSerializer,
+    GenerationJobSerializer,
 )
+from .models import BlogPost, GenerationBatch, GenerationJob
+from .jobs import enqueue_generation_batch, enqueue_generation_job
+
+from . import metrics
+from .cache import cache_stats
+from .circuit import breaker_stats
+from .clients import check_clients
+from .ratelimit import RateLimited, rate_limit_stats
+from .pagination import InvalidCursor, get_page_size, paginate
+from .search import search_blogs
+from .utils import extract_video_id
+from .views import blog_etag, blog_last_modified, blog_list_etag, blog_summaries
+from .pipeline import GenerationError, build_metadata, run_generation
 
+@metrics.server_timing
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def generate_blog_api(request):
@@ -24,6 +38,8 @@ def generate_blog_api(request):
                        status=status.HTTP_400_BAD_REQUEST)
     
     yt_link = serializer.validated_data['link']
+    reuse = serializer.validated_data['reuse']
+    regenerate = serializer.validated_data['regenerate']
     
     try:
         video_id = extract_video_id(yt_link)
@@ -31,96 +47,192 @@ def generate_blog_api(request):
             return Response({'error': 'Invalid YouTube URL'}, 
                           status=status.HTTP_400_BAD_REQUEST)
         
-        # Method 1: Try fast generation with captions
         try:
-            transcript = get_transcript_instant(yt_link)
-            if transcript and len(transcript.strip()) > 100:
-                try:
-                    video_info = get_video_info_enhanced(yt_link)
-                except:
-                    video_info = {'title': 'Unknown Title', 'channel': 'Unknown Channel', 'duration': 'Unknown'}
-                
-                blog_content = generate_blog_instant(transcript, video_info)
-                
-                # Save to database
-                new_blog_article = BlogPost.objects.create(
-                    user=request.user,
-                    youtube_title=video_info.get('title', 'Unknown Title'),
-                    youtube_link=yt_link,
-                    generated_content=blog_content,
-                )
-                
-                return Response({
-                    'success': True,
-                    'content': blog_content,
-                    'method': 'fast_captions',
-                    'blog_id': new_blog_article.id,
-                    'metadata': {
-                        'title': video_info.get('title'),
-                        'channel': video_info.get('channel'),
-                        'duration': video_info.get('duration'),
-                        'word_count': len(blog_content.split())
-                    }
-                }, status=status.HTTP_201_CREATED)
-                
-        except Exception as e:
-            print(f"Fast method failed: {e}")
-            
-        # Method 2: Fallback to full transcription
-        try:
-            video_info = get_video_info_enhanced(yt_link)
-            transcript_data = get_transcription_enhanced(yt_link)
-            
-            if not transcript_data or not transcript_data.get('text'):
-                return Response({'error': 'No audio/transcript available'}, 
-                              status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-            
-            blog_content = generate_blog_from_transcription_enhanced(transcript_data, video_info)
-            
-            # Save to database
-            new_blog_article = BlogPost.objects.create(
-                user=request.user,
-                youtube_title=video_info.get('title', 'Unknown Title'),
-                youtube_link=yt_link,
-                generated_content=blog_content,
-            )
-            
-            return Response({
-                'success': True,
-                'content': blog_content,
-                'method': 'full_transcription',
-                'blog_id': new_blog_article.id,
-                'metadata': {
-                    'title': video_info.get('title'),
-                    'channel': video_info.get('channel'),
-                    'duration': video_info.get('duration'),
-                    'word_count': len(blog_content.split()),
-                    'speakers_detected': len(transcript_data.get('speakers', {})),
-                    'transcript_confidence': transcript_data.get('confidence', 0.95)
-                }
-            }, status=status.HTTP_201_CREATED)
-            
-        except Exception as e:
-            return Response({'error': f'Full transcription failed: {str(e)}'}, 
+            blog, result = run_generation(request.user, yt_link, reuse=reuse, regenerate=regenerate)
+        except GenerationError as e:
+            return Response({'error': str(e)}, 
                           status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        except RateLimited as e:
+            headers = {'Retry-After': str(int(e.retry_after + 1))} if e.retry_after else None
+            return Response({'error': str(e), 'retry_after': e.retry_after},
+                          status=status.HTTP_429_TOO_MANY_REQUESTS, headers=headers)
+        
+        return Response({
+            'success': True,
+            'content': blog.generated_content,
+            'method': result['method'],
+            'blog_id': blog.id,
+            'metadata': build_metadata(result)
+        }, status=status.HTTP_200_OK if result['method'] == 'reused' else status.HTTP_201_CREATED)
             
     except Exception as e:
         return Response({'error': str(e)}, 
                        status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def generation_job_create_api(request):
+    """REST API endpoint that queues blog generation and returns a job ID immediately"""
+    serializer = BlogGenerationRequestSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response({'error': 'Invalid input', 'details': serializer.errors}, 
+                       status=status.HTTP_400_BAD_REQUEST)
+    
+    yt_link = serializer.validated_data['link']
+    video_id = extract_video_id(yt_link)
+    if not video_id:
+        return Response({'error': 'Invalid YouTube URL'}, 
+                      status=status.HTTP_400_BAD_REQUEST)
+    
+    job = GenerationJob.objects.create(
+        user=request.user,
+        youtube_link=yt_link,
+        video_id=video_id,
+        reuse=serializer.validated_data['reuse'],
+        regenerate=serializer.validated_data['regenerate'],
+    )
+    enqueue_generation_job(job)
+    
+    return Response({
+        'job_id': job.id,
+        'status': job.status,
+        'status_url': reverse('generation_job_status_api', args=[job.id]),
+        'result_url': reverse('generation_job_result_api', args=[job.id]),
+    }, status=status.HTTP_202_ACCEPTED)
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def generation_job_status_api(request, job_id):
+    """REST API endpoint for generation job status"""
+    try:
+        job = GenerationJob.objects.get(id=job_id, user=request.user)
+        serializer = GenerationJobSerializer(job)
+        return Response(serializer.data)
+    except GenerationJob.DoesNotExist:
+        return Response({'error': 'Job not found'}, 
+                       status=status.HTTP_404_NOT_FOUND)
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def generation_job_result_api(request, job_id):
+    """REST API endpoint for the blog produced by a generation job"""
+    try:
+        job = GenerationJob.objects.select_related('blog').get(id=job_id, user=request.user)
+    except GenerationJob.DoesNotExist:
+        return Response({'error': 'Job not found'}, 
+                       status=status.HTTP_404_NOT_FOUND)
+    
+    if not job.is_finished:
+        return Response({'job_id': job.id, 'status': job.status}, 
+                       status=status.HTTP_202_ACCEPTED)
+    
+    if job.status == GenerationJob.STATUS_FAILED or job.blog is None:
+        return Response({'job_id': job.id, 'status': job.status, 'error': job.error or 'Blog not found'}, 
+                       status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    
+    return Response({
+        'success': True,
+        'job_id': job.id,
+        'status': job.status,
+        'method': job.method,
+        'blog_id': job.blog.id,
+        'content': job.blog.generated_content,
+        'metadata': {
+            'title': job.blog.youtube_title,
+            'channel': job.blog.channel_name,
+            'duration': job.blog.video_duration,
+            'word_count': job.blog.word_count
+        }
+    })
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def generation_batch_create_api(request):
+    """REST API endpoint that queues generation for many links or a playlist"""
+    serializer = BatchGenerationRequestSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response({'error': 'Invalid input', 'details': serializer.errors}, 
+                       status=status.HTTP_400_BAD_REQUEST)
+    
+    batch = GenerationBatch.objects.create(
+        user=request.user,
+        links=serializer.validated_data['links'],
+        playlist_url=serializer.validated_data['playlist'],
+        reuse=serializer.validated_data['reuse'],
+        concurrency=serializer.validated_data['concurrency'],
+    )
+    enqueue_generation_batch(batch)
+    
+    return Response({
+        'batch_id': batch.id,
+        'status': batch.status,
+        'status_url': reverse('generation_batch_status_api', args=[batch.id]),
+    }, status=status.HTTP_202_ACCEPTED)
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def generation_batch_status_api(request, batch_id):
+    """REST API endpoint for batch progress, item by item"""
+    try:
+        batch = GenerationBatch.objects.get(id=batch_id, user=request.user)
+        serializer = GenerationBatchSerializer(batch)
+        return Response(serializer.data)
+    except GenerationBatch.DoesNotExist:
+        return Response({'error': 'Batch not found'}, 
+                       status=status.HTTP_404_NOT_FOUND)
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@condition(etag_func=blog_list_etag)
 def blog_list_api(request):
-    """REST API endpoint for listing user's blogs"""
-    blogs = BlogPost.objects.filter(user=request.user).order_by('-created_at')
-    serializer = BlogPostSerializer(blogs, many=True)
+    """REST API endpoint for listing user's blogs, newest first, a page at a time"""
+    try:
+        blogs, next_cursor = paginate(
+            blog_summaries(request.user),
+            request.query_params.get('cursor'),
+            get_page_size(request.query_params.get('page_size')),
+        )
+    except InvalidCursor as e:
+        return Response({'error': str(e)}, 
+                       status=status.HTTP_400_BAD_REQUEST)
+    
+    next_url = None
+    if next_cursor:
+        next_url = request.build_absolute_uri(f"{reverse('blog_list_api')}?cursor={next_cursor}")
+        if 'page_size' in request.query_params:
+            next_url += f"&page_size={get_page_size(request.query_params['page_size'])}"
+    return Response({
+        'blogs': BlogPostListSerializer(blogs, many=True).data,
+        'next_cursor': next_cursor,
+        'next': next_url,
+    })
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def blog_search_api(request):
+    """REST API endpoint for full-text search over user's blogs, best match first"""
+    query = request.query_params.get('q', '').strip()
+    if not query:
+        return Response({'error': 'Please provide a search query'}, 
+                       status=status.HTTP_400_BAD_REQUEST)
+    
+    try:
+        page = max(1, int(request.query_params.get('page', 1)))
+    except ValueError:
+        page = 1
+    results, has_next = search_blogs(
+        request.user, query, page, get_page_size(request.query_params.get('page_size'))
+    )
     return Response({
-        'count': blogs.count(),
-        'blogs': serializer.data
+        'query': query,
+        'page': page,
+        'next_page': page + 1 if has_next else None,
+        'results': BlogSearchResultSerializer(results, many=True).data,
     })
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@condition(etag_func=blog_etag, last_modified_func=blog_last_modified)
 def blog_detail_api(request, pk):
     """REST API endpoint for blog details"""
     try:
@@ -142,4 +254,20 @@ def blog_delete_api(request, pk):
                        status=status.HTTP_200_OK)
     except BlogPost.DoesNotExist:
         return Response({'error': 'Blog not found'}, 
-                       status=status.HTTP_404_NOT_FOUND)
\ No newline at end of file
+                       status=status.HTTP_404_NOT_FOUND)
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def cache_stats_api(request):
+    """REST API endpoint for cache hit rates in the worker that serves the request"""
+    return Response({'caches': cache_stats()})
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def client_health_api(request):
+    """REST API endpoint for the shared API clients in the worker that serves the request"""
+    return Response({
+        'clients': check_clients(),
+        'rate_limits': rate_limit_stats(),
+        'circuit_breakers': breaker_stats(),
+    })
\ No newline at end of file
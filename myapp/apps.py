@@ -1,6 +1,16 @@
 from django.apps import AppConfig
+from django.conf import settings
+from django.db.backends.signals import connection_created
 
 
 class MyappConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'myapp'
+
+    def ready(self):
+        from .models import register_sqlite_functions
+        connection_created.connect(register_sqlite_functions, dispatch_uid='myapp.sqlite_functions')
+
+        if getattr(settings, 'PRELOAD_SDKS', False):
+            from . import clients
+            clients.preload_sdks()
@@ -0,0 +1,128 @@
+# async_views.py
+"""Async versions of the generation and read endpoints, for ASGI servers.
+
+While a generation waits on Gemini or the database, its worker serves other
+requests instead of holding a thread. yt-dlp, caption and AssemblyAI calls
+have no async client and run on the pipeline's thread pools.
+"""
+import json
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.decorators import login_required
+from django.http import JsonResponse
+from django.urls import reverse
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
+from django.views.decorators.csrf import csrf_exempt
+
+from . import metrics, pipeline, ratelimit
+from .models import BlogPost
+from .pagination import InvalidCursor, apaginate, get_page_size
+from .serializers import BlogPostListSerializer, BlogPostSerializer
+from .utils import extract_video_id, parse_flag
+from .views import (
+    agenerate_blog_events, blog_list_etag, blog_summaries, event_stream_response, rate_limited_response,
+    read_stream_request,
+)
+
+@login_required
+@csrf_exempt
+@metrics.server_timing
+async def generate_blog_async(request):
+    """Smart blog generation without a thread per request"""
+    if request.method != 'POST':
+        return JsonResponse({'error': 'Invalid request method'}, status=405)
+
+    try:
+        data = json.loads(request.body or '{}')
+    except ValueError:
+        return JsonResponse({'error': 'Invalid JSON body'}, status=400)
+
+    yt_link = (data.get('link') or '').strip()
+    if not yt_link:
+        return JsonResponse({'error': 'Please provide a YouTube link'}, status=400)
+
+    if not extract_video_id(yt_link):
+        return JsonResponse({'error': 'Invalid YouTube URL'}, status=400)
+
+    user = await request.auser()
+    parts = []
+    done = None
+    try:
+        async for event, payload in pipeline.astream_generation(
+            user, yt_link, reuse=parse_flag(data.get('reuse'), True), regenerate=parse_flag(data.get('regenerate'))
+        ):
+            if event == 'token':
+                parts.append(payload['text'])
+            elif event == 'done':
+                done = payload
+    except ratelimit.RateLimited as e:
+        return rate_limited_response(e)
+    except Exception as e:
+        return JsonResponse({'error': str(e)}, status=500)
+
+    return JsonResponse({
+        'success': True,
+        'content': ''.join(parts),
+        'method': done['method'],
+        'metadata': done['metadata'],
+    })
+
+@login_required
+async def generate_blog_stream_async(request):
+    """Streaming blog generation (server-sent events) without a thread per request"""
+    user = await request.auser()
+    options, error = read_stream_request(request, user)
+    if error:
+        return error
+    return event_stream_response(agenerate_blog_events(user, *options))
+
+async def aconditional_response(request, etag_func):
+    """(ETag, 304 response or None) for an async view.
+
+    condition() would call etag_func, and its queries, on the event loop.
+    """
+    etag = await sync_to_async(etag_func)(request)
+    etag = quote_etag(etag) if etag else None
+    response = get_conditional_response(request, etag=etag)
+    if response is not None:
+        response.headers['ETag'] = etag
+    return etag, response
+
+@login_required
+async def blog_list_async(request):
+    """User's blogs as JSON, newest first, a page at a time"""
+    user = await request.auser()
+    etag, not_modified = await aconditional_response(request, blog_list_etag)
+    if not_modified:
+        return not_modified
+    try:
+        blogs, next_cursor = await apaginate(
+            blog_summaries(user), request.GET.get('cursor'), get_page_size(request.GET.get('page_size'))
+        )
+    except InvalidCursor as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+    next_url = None
+    if next_cursor:
+        next_url = request.build_absolute_uri(f"{reverse('blog_list_async')}?cursor={next_cursor}")
+        if 'page_size' in request.GET:
+            next_url += f"&page_size={get_page_size(request.GET['page_size'])}"
+    response = JsonResponse({
+        'blogs': BlogPostListSerializer(blogs, many=True).data,
+        'next_cursor': next_cursor,
+        'next': next_url,
+    })
+    if etag:
+        response.headers['ETag'] = etag
+    return response
+
+@login_required
+async def blog_detail_async(request, pk):
+    """One of the user's blogs as JSON"""
+    user = await request.auser()
+    try:
+        blog = await BlogPost.objects.aget(id=pk, user=user)
+    except BlogPost.DoesNotExist:
+        return JsonResponse({'error': 'Blog not found'}, status=404)
+    return JsonResponse(BlogPostSerializer(blog).data)
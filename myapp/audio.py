@@ -0,0 +1,204 @@
+# audio.py
+"""Cutting long audio at silences for parallel transcription, and stitching the results.
+
+One AssemblyAI job for a 2-hour video takes as long as AssemblyAI needs for
+2 hours of audio. Cut into chunks that are transcribed concurrently, it
+takes about as long as the slowest chunk. Each cut is placed in the silence
+nearest an evenly spaced target (only the audio around the targets is
+decoded to find it), and chunks overlap their neighbours by a few seconds so
+no word is lost at a cut. When stitching, a word is kept only by the chunk
+whose own span (cut to cut) contains its midpoint, with its times moved onto
+the full audio's timeline.
+
+Needs the ffmpeg binary; callers send the audio whole when it is missing.
+"""
+import contextvars
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+
+from . import metrics
+
+FFMPEG = 'ffmpeg'
+CHUNK_SECONDS = getattr(settings, 'AUDIO_CHUNK_SECONDS', 600)
+OVERLAP_SECONDS = getattr(settings, 'AUDIO_CHUNK_OVERLAP', 2.0)
+CONCURRENCY = getattr(settings, 'AUDIO_CHUNK_CONCURRENCY', 4)
+SILENCE_NOISE_DB = -30
+SILENCE_MIN_SECONDS = 0.4
+# Only this much audio either side of each cut target is decoded to look for a silence
+CUT_SEARCH_SECONDS = 30
+# The same word heard by both chunks at a cut, when their timings disagree a little
+DUPLICATE_WINDOW = 0.5
+
+DURATION_RE = re.compile(r'Duration: (\d+):(\d+):(\d+(?:\.\d+)?)')
+SILENCE_START_RE = re.compile(r'silence_start: (-?\d+(?:\.\d+)?)')
+SILENCE_END_RE = re.compile(r'silence_end: (\d+(?:\.\d+)?)')
+
+
+class AudioError(Exception):
+    """ffmpeg is missing or could not read or cut the audio"""
+
+
+def ffmpeg_available():
+    return shutil.which(FFMPEG) is not None
+
+
+def run_ffmpeg(args, check=True):
+    """Run ffmpeg and return what it logged"""
+    try:
+        result = subprocess.run(
+            [FFMPEG, '-hide_banner', '-nostdin', *args], capture_output=True, text=True, errors='replace',
+        )
+    except OSError as e:
+        raise AudioError(f"ffmpeg unavailable: {e}")
+    if check and result.returncode != 0:
+        raise AudioError(f"ffmpeg failed: {result.stderr.strip()[-300:]}")
+    return result.stderr
+
+
+def parse_duration(output):
+    match = DURATION_RE.search(output)
+    if not match:
+        raise AudioError("Could not read the audio duration")
+    hours, minutes, seconds = match.groups()
+    return int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+
+
+def probe_duration(path):
+    """Length of an audio file in seconds, from its header"""
+    # Without an output ffmpeg exits with an error after printing the input's details
+    return parse_duration(run_ffmpeg(['-i', str(path)], check=False))
+
+
+def cut_targets(duration, chunk_seconds=CHUNK_SECONDS):
+    """Evenly spaced points to cut near, so chunks come out about the same length"""
+    count = max(1, round(duration / chunk_seconds))
+    return [duration * index / count for index in range(1, count)]
+
+
+def find_silences(path, start, seconds):
+    """Silences as (start, end) in seconds, within that span of the audio"""
+    start = max(0.0, start)
+    output = run_ffmpeg([
+        '-ss', f"{start:.3f}", '-t', f"{seconds:.3f}", '-i', str(path), '-vn',
+        '-af', f'silencedetect=noise={SILENCE_NOISE_DB}dB:d={SILENCE_MIN_SECONDS}',
+        '-f', 'null', '-',
+    ])
+    # Times are reported from the seek point
+    silences = []
+    silence_start = None
+    for line in output.splitlines():
+        match = SILENCE_START_RE.search(line)
+        if match:
+            silence_start = start + max(0.0, float(match.group(1)))
+            continue
+        match = SILENCE_END_RE.search(line)
+        if match and silence_start is not None:
+            silences.append((silence_start, start + float(match.group(1))))
+            silence_start = None
+    if silence_start is not None:
+        silences.append((silence_start, start + seconds))
+    return silences
+
+
+def plan_chunks(duration, silences, targets, overlap=OVERLAP_SECONDS):
+    """Chunks as dicts: start/end to cut (overlap included) and keep_start/keep_end, the span the chunk owns"""
+    middles = [(start + end) / 2 for start, end in silences]
+    cuts = [0.0]
+    for target in targets:
+        candidates = [middle for middle in middles if abs(middle - target) <= CUT_SEARCH_SECONDS and middle > cuts[-1]]
+        cuts.append(min(candidates, key=lambda middle: abs(middle - target)) if candidates else target)
+    cuts.append(duration)
+    return [
+        {
+            'index': index,
+            'start': max(0.0, keep_start - overlap),
+            'end': min(duration, keep_end + overlap),
+            'keep_start': keep_start,
+            'keep_end': keep_end,
+        }
+        for index, (keep_start, keep_end) in enumerate(zip(cuts, cuts[1:]))
+    ]
+
+
+def cut_chunk(path, chunk, directory):
+    """Copy a chunk's span of the audio into its own file, without re-encoding"""
+    extension = os.path.splitext(str(path))[1] or '.m4a'
+    out_path = os.path.join(directory, f"chunk-{chunk['index']:03d}{extension}")
+    run_ffmpeg([
+        '-ss', f"{chunk['start']:.3f}", '-i', str(path), '-t', f"{chunk['end'] - chunk['start']:.3f}",
+        '-vn', '-c', 'copy', '-y', out_path,
+    ])
+    return out_path
+
+
+def stitch(pieces):
+    """Words of every chunk on the full audio's timeline, in order, overlaps removed.
+
+    pieces is a list of (chunk, words) in chunk order, words as dicts with
+    start/end (seconds into the chunk) and text.
+    """
+    stitched = []
+    for position, (chunk, words) in enumerate(pieces):
+        last = position == len(pieces) - 1
+        for word in words:
+            start = word['start'] + chunk['start']
+            end = word['end'] + chunk['start']
+            middle = (start + end) / 2
+            if middle < chunk['keep_start'] or (middle >= chunk['keep_end'] and not last):
+                continue
+            previous = stitched[-1] if stitched else None
+            if previous and previous['text'] == word['text'] and start - previous['start'] < DUPLICATE_WINDOW:
+                continue
+            stitched.append({'start': round(start, 3), 'end': round(end, 3), 'text': word['text']})
+    return stitched
+
+
+def transcribe_in_chunks(path, transcribe, concurrency=CONCURRENCY):
+    """Transcribe long audio in concurrent chunks and stitch them.
+
+    transcribe(chunk_path) returns (words, confidence) for one chunk, words
+    timed from the start of the chunk. Returns a dict with the stitched
+    text, words (as segments), confidence and number of chunks.
+    """
+    with metrics.timer('audio_split'):
+        duration = probe_duration(path)
+        targets = cut_targets(duration)
+        silences = []
+        with ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(targets)))) as executor:
+            for found in executor.map(
+                lambda target: find_silences(path, target - CUT_SEARCH_SECONDS, 2 * CUT_SEARCH_SECONDS), targets
+            ):
+                silences.extend(found)
+    chunks = plan_chunks(duration, silences, targets)
+    directory = tempfile.mkdtemp(prefix='chunks-')
+
+    def transcribe_chunk(chunk):
+        chunk_path = cut_chunk(path, chunk, directory)
+        try:
+            return transcribe(chunk_path)
+        finally:
+            os.remove(chunk_path)
+
+    # Worker threads run in a copy of this context so their timings show up in the request's
+    context = contextvars.copy_context()
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(chunks)))) as executor:
+            results = list(executor.map(lambda chunk: context.copy().run(transcribe_chunk, chunk), chunks))
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+    segments = stitch([(chunk, words) for chunk, (words, _) in zip(chunks, results)])
+    weights = [(len(words), confidence) for words, confidence in results if words and confidence is not None]
+    total = sum(count for count, _ in weights)
+    return {
+        'text': ' '.join(segment['text'] for segment in segments),
+        'segments': segments,
+        'confidence': sum(count * confidence for count, confidence in weights) / total if total else None,
+        'chunks': len(chunks),
+    }
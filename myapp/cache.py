@@ -0,0 +1,147 @@
+# cache.py
+"""Two-tier caches used by the blog generation pipeline.
+
+The local tier is a per-process LRU with a TTL, the shared tier is a Django
+cache backend (file based by default) that every gunicorn worker can see.
+Caches created with alias=None are local only, for values too large or too
+short-lived to be worth sharing.
+"""
+import threading
+
+from cachetools import TTLCache
+from django.conf import settings
+from django.core.cache import caches
+
+from . import metrics
+
+_MISSING = object()
+_registry = []
+
+
+class TieredCache:
+    """In-process LRU in front of a shared Django cache, with hit/miss counters"""
+
+    def __init__(self, name, alias='default', maxsize=128, ttl=3600):
+        self.name = name
+        self.alias = alias
+        self.ttl = ttl
+        self._local = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._lock = threading.Lock()
+        self.local_hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        _registry.append(self)
+
+    def _key(self, key):
+        return f"{self.name}:{key}"
+
+    @property
+    def shared(self):
+        return caches[self.alias] if self.alias else None
+
+    def get(self, key, default=None):
+        """Return the cached value, checking the local tier first"""
+        with self._lock:
+            value = self._local.get(key, _MISSING)
+            if value is not _MISSING:
+                self.local_hits += 1
+                metrics.inc('cache_requests_total', cache=self.name, result='local_hit')
+                return value
+
+        value = _MISSING
+        if self.shared is not None:
+            try:
+                value = self.shared.get(self._key(key), _MISSING)
+            except Exception as e:
+                print(f"Shared cache read failed ({self.name}): {e}")
+
+        with self._lock:
+            if value is _MISSING:
+                self.misses += 1
+            else:
+                self.shared_hits += 1
+                self._local[key] = value
+        metrics.inc('cache_requests_total', cache=self.name, result='miss' if value is _MISSING else 'shared_hit')
+        return default if value is _MISSING else value
+
+    def set(self, key, value, ttl=None):
+        """Store a value in both tiers"""
+        with self._lock:
+            self._local[key] = value
+        if self.shared is None:
+            return
+        try:
+            self.shared.set(self._key(key), value, timeout=ttl or self.ttl)
+        except Exception as e:
+            print(f"Shared cache write failed ({self.name}): {e}")
+
+    def delete(self, key):
+        """Drop a value from both tiers"""
+        with self._lock:
+            self._local.pop(key, None)
+        if self.shared is None:
+            return
+        try:
+            self.shared.delete(self._key(key))
+        except Exception as e:
+            print(f"Shared cache delete failed ({self.name}): {e}")
+
+    def stats(self):
+        """Hit/miss counters for this process"""
+        with self._lock:
+            hits = self.local_hits + self.shared_hits
+            lookups = hits + self.misses
+            return {
+                'name': self.name,
+                'local_hits': self.local_hits,
+                'shared_hits': self.shared_hits,
+                'misses': self.misses,
+                'hit_rate': round(hits / lookups, 4) if lookups else 0.0,
+                'local_size': len(self._local),
+            }
+
+
+def cache_stats():
+    """Hit/miss counters of every cache in this process"""
+    return [cache.stats() for cache in _registry]
+
+
+# Transcripts keyed by video ID: caption text and AssemblyAI results
+transcript_cache = TieredCache(
+    'transcript',
+    alias='shared',
+    maxsize=getattr(settings, 'TRANSCRIPT_CACHE_LOCAL_SIZE', 128),
+    ttl=getattr(settings, 'TRANSCRIPT_CACHE_TTL', 7 * 24 * 3600),
+)
+
+# Video metadata (title, channel, duration...) keyed by video ID
+metadata_cache = TieredCache(
+    'metadata',
+    alias='shared',
+    maxsize=getattr(settings, 'METADATA_CACHE_LOCAL_SIZE', 512),
+    ttl=getattr(settings, 'METADATA_CACHE_TTL', 24 * 3600),
+)
+
+# Raw yt-dlp info dicts, kept briefly so the download step can skip a second extraction
+raw_info_cache = TieredCache(
+    'raw_info',
+    alias=None,
+    maxsize=getattr(settings, 'RAW_INFO_CACHE_LOCAL_SIZE', 32),
+    ttl=getattr(settings, 'RAW_INFO_CACHE_TTL', 600),
+)
+
+# Gemini responses keyed by a hash of model, prompt version and rendered prompt
+llm_cache = TieredCache(
+    'llm',
+    alias='shared',
+    maxsize=getattr(settings, 'LLM_CACHE_LOCAL_SIZE', 256),
+    ttl=getattr(settings, 'LLM_CACHE_TTL', 7 * 24 * 3600),
+)
+
+# Video IDs known to have no usable captions, so they go straight to transcription
+no_captions_cache = TieredCache(
+    'no_captions',
+    alias='shared',
+    maxsize=getattr(settings, 'NO_CAPTIONS_CACHE_LOCAL_SIZE', 1024),
+    ttl=getattr(settings, 'NO_CAPTIONS_CACHE_TTL', 6 * 3600),
+)
@@ -0,0 +1,119 @@
+# captions.py
+"""Caption normalization between caption fetch and prompt building.
+
+Each stage is a generator over caption cues ({'text', 'start', 'duration'}),
+so the stages chain without building intermediate copies of the transcript.
+"""
+import html
+import re
+
+from .utils import estimate_tokens
+
+# [Music], [Applause], (laughter), ♪ ... ♪ and ">>" speaker-change markers
+NON_SPEECH_PATTERN = re.compile(
+    r'\[[^\]]*\]|\((?:[^)]*\b(?:music|applause|laughter|laughs|inaudible|silence)\b[^)]*)\)|[♪♫]+|>>',
+    re.IGNORECASE,
+)
+FILLER_PATTERN = re.compile(r'\b(?:um+|uh+|uhm+|erm+|hmm+|mm+|ah+)\b[,.]?\s*', re.IGNORECASE)
+# "you know you know", "I mean I mean" -> a single copy. Single repeated words are left alone,
+# "that that" and "had had" are often meant; words repeated across cues are merge_overlapping_cues' job
+REPEAT_PATTERN = re.compile(r'\b((?:\w+[\s,]+){1,2}?\w+)(?:[\s,]+\1\b)+', re.IGNORECASE)
+
+# Longest overlap between rolling caption lines that we look for, in words
+MAX_OVERLAP_WORDS = 30
+# A single shared word is as often a real repeat ("...and the" / "the end") as a rolling caption
+MIN_OVERLAP_WORDS = 2
+# A pause this long between cues ends a sentence when captions have no punctuation
+SENTENCE_GAP_SECONDS = 1.2
+MAX_SENTENCE_WORDS = 40
+
+
+def clean_cues(cues):
+    """Unescape entities, strip non-speech markers and collapse whitespace"""
+    for cue in cues:
+        # Caption text is sometimes escaped twice (&amp;#39;)
+        text = html.unescape(html.unescape(cue.get('text') or ''))
+        text = NON_SPEECH_PATTERN.sub(' ', text)
+        text = ' '.join(text.split())
+        if text:
+            yield {'text': text, 'start': cue.get('start', 0.0), 'duration': cue.get('duration', 0.0)}
+
+
+def merge_overlapping_cues(cues):
+    """Drop words that repeat the tail of the previous cue (rolling auto-captions)"""
+    tail = []
+    for cue in cues:
+        words = cue['text'].split()
+        overlap = 0
+        for size in range(min(len(tail), len(words), MAX_OVERLAP_WORDS), MIN_OVERLAP_WORDS - 1, -1):
+            if [w.lower() for w in tail[-size:]] == [w.lower() for w in words[:size]]:
+                overlap = size
+                break
+        words = words[overlap:]
+        if words:
+            tail = (tail + words)[-MAX_OVERLAP_WORDS:]
+            yield {**cue, 'text': ' '.join(words)}
+
+
+def collapse_disfluencies(cues):
+    """Remove filler words and immediately repeated phrases"""
+    for cue in cues:
+        text = FILLER_PATTERN.sub('', cue['text'])
+        text = REPEAT_PATTERN.sub(r'\1', text)
+        text = ' '.join(text.split())
+        if text:
+            yield {**cue, 'text': text}
+
+
+def segment_sentences(cues):
+    """Re-segment cue text into sentences, using pauses when captions have no punctuation"""
+    words = []
+    previous_end = None
+    for cue in cues:
+        pause = previous_end is not None and cue['start'] - previous_end >= SENTENCE_GAP_SECONDS
+        if words and (pause or len(words) >= MAX_SENTENCE_WORDS):
+            yield _finish_sentence(words)
+            words = []
+        previous_end = cue['start'] + cue['duration']
+
+        for word in cue['text'].split():
+            words.append(word)
+            if word[-1] in '.!?':
+                yield _finish_sentence(words)
+                words = []
+    if words:
+        yield _finish_sentence(words)
+
+
+def _finish_sentence(words):
+    sentence = ' '.join(words)
+    sentence = sentence[0].upper() + sentence[1:]
+    if sentence[-1] not in '.!?':
+        sentence += '.'
+    return sentence
+
+
+def normalize_captions(cues):
+    """Return (text, stats) for raw caption cues.
+
+    Savings are measured before sentence segmentation, which only adds
+    punctuation; what it adds is reported as segmentation_chars.
+    """
+    cues = list(cues)
+    raw_text = ' '.join(cue.get('text') or '' for cue in cues)
+
+    cleaned = list(collapse_disfluencies(merge_overlapping_cues(clean_cues(cues))))
+    cleaned_text = ' '.join(cue['text'] for cue in cleaned)
+    text = ' '.join(segment_sentences(cleaned))
+
+    tokens_before = estimate_tokens(raw_text)
+    stats = {
+        'chars_before': len(raw_text),
+        'chars_after': len(text),
+        'chars_saved': len(raw_text) - len(cleaned_text),
+        'segmentation_chars': len(text) - len(cleaned_text),
+        'tokens_before': tokens_before,
+        'tokens_after': estimate_tokens(text),
+        'tokens_saved': tokens_before - estimate_tokens(cleaned_text),
+    }
+    return text, stats
@@ -0,0 +1,102 @@
+# circuit.py
+"""Circuit breakers for outbound calls that fail in bursts (e.g. YouTube blocking our IP)"""
+import threading
+import time
+
+from django.conf import settings
+
+_registry = []
+
+
+class CircuitOpen(Exception):
+    """Raised instead of calling a dependency whose breaker is open"""
+
+
+class CircuitBreaker:
+    """Open after repeated failures, then let a single probe through every recovery_timeout seconds"""
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, name, failure_threshold=5, recovery_timeout=60):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.short_circuited = 0
+        self._probing = False
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def allow(self):
+        """Whether a call may go through right now"""
+        with self._lock:
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.recovery_timeout:
+                self.state = self.HALF_OPEN
+                self._probing = False
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+            self.short_circuited += 1
+            return False
+
+    def record_success(self):
+        with self._lock:
+            if self.state != self.CLOSED:
+                print(f"Circuit {self.name} closed")
+            self.state = self.CLOSED
+            self.failures = 0
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    print(f"Circuit {self.name} opened after {self.failures} failures")
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+                self._probing = False
+
+    def call(self, func, expected=()):
+        """Run func() through the breaker; `expected` exceptions mean the dependency is healthy"""
+        if not self.allow():
+            raise CircuitOpen(f"Circuit {self.name} is open")
+        try:
+            result = func()
+        except expected:
+            self.record_success()
+            raise
+        except Exception:
+            self.record_failure()
+            raise
+        self.record_success()
+        return result
+
+    def stats(self):
+        """State and counters for this process"""
+        with self._lock:
+            return {
+                'name': self.name,
+                'state': self.state,
+                'failures': self.failures,
+                'short_circuited': self.short_circuited,
+            }
+
+
+def breaker_stats():
+    """State of every circuit breaker in this process"""
+    return [breaker.stats() for breaker in _registry]
+
+
+# YouTubeTranscriptApi caption fetches, the generation fast path
+caption_breaker = CircuitBreaker(
+    'captions',
+    failure_threshold=getattr(settings, 'CAPTION_BREAKER_THRESHOLD', 5),
+    recovery_timeout=getattr(settings, 'CAPTION_BREAKER_RECOVERY', 120),
+)
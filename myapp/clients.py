@@ -0,0 +1,232 @@
+# clients.py
+"""Process-wide registry of Gemini, AssemblyAI, yt-dlp and HTTP clients.
+
+Clients are created lazily, once per worker process, and shared between
+threads. yt-dlp instances are not thread-safe, so they are pooled and each
+one is lent to a single thread at a time. Async views use the same Gemini
+model through its public generate_content_async, which creates the SDK's
+async client on first use.
+
+The SDKs themselves (gRPC/protobuf, every yt-dlp extractor) are imported on
+first use, so pages that never call a provider don't pay for them in boot
+time or memory. Set PRELOAD_SDKS to import them up front instead, in a
+gunicorn master with preload_app, so forked workers share those pages.
+
+install_fakes() swaps every SDK for local stand-ins (see fakes.py), for
+offline benchmarks.
+"""
+import importlib
+import json
+import os
+import queue
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+
+_lock = threading.Lock()
+_sdk_lock = threading.Lock()
+_configured_sdks = set()
+_gemini_models = {}
+_transcriber = None
+_http_session = None
+_ydl_pools = {}
+_fakes = None
+
+HTTP_POOL_SIZE = getattr(settings, 'HTTP_POOL_SIZE', 16)
+YDL_POOL_SIZE = getattr(settings, 'YDL_POOL_SIZE', 4)
+
+# Heavy modules imported on first use (or by preload_sdks)
+SDK_MODULES = {
+    'gemini': 'google.generativeai',
+    'assemblyai': 'assemblyai',
+    'yt_dlp': 'yt_dlp',
+    'youtube_transcript_api': 'youtube_transcript_api',
+}
+
+
+def _configure_gemini(genai):
+    genai.configure(api_key=os.getenv('GEMINI_API_KEY'))
+
+
+def _configure_assemblyai(aai):
+    aai.settings.api_key = os.getenv('ASSEMBLYAI_API_KEY')
+
+
+# API keys are set when the SDK is first loaded instead of as an import side effect
+SDK_CONFIGURE = {
+    'gemini': _configure_gemini,
+    'assemblyai': _configure_assemblyai,
+}
+
+
+def _load_sdk(name):
+    if _fakes is not None:
+        return _fakes.sdk(name)
+    module = importlib.import_module(SDK_MODULES[name])
+    if name not in _configured_sdks:
+        with _sdk_lock:
+            if name not in _configured_sdks:
+                if name in SDK_CONFIGURE:
+                    SDK_CONFIGURE[name](module)
+                _configured_sdks.add(name)
+    return module
+
+
+def gemini():
+    """google.generativeai, configured with GEMINI_API_KEY"""
+    return _load_sdk('gemini')
+
+
+def assemblyai():
+    """assemblyai, configured with ASSEMBLYAI_API_KEY"""
+    return _load_sdk('assemblyai')
+
+
+def yt_dlp():
+    """yt_dlp, whose extractors alone take a large share of startup"""
+    return _load_sdk('yt_dlp')
+
+
+def youtube_transcript_api():
+    """youtube_transcript_api"""
+    return _load_sdk('youtube_transcript_api')
+
+
+def preload_sdks():
+    """Import and configure every SDK now; returns the seconds each one took"""
+    timings = {}
+    for name in SDK_MODULES:
+        start = time.perf_counter()
+        _load_sdk(name)
+        timings[name] = time.perf_counter() - start
+    return timings
+
+
+def loaded_sdks():
+    """Names of the SDKs already imported in this process"""
+    return [name for name, module in SDK_MODULES.items() if module in sys.modules]
+
+
+def install_fakes(fakes):
+    """Serve every SDK from fakes (an object with sdk(name)) instead of the real modules; None undoes it"""
+    global _fakes
+    reset_clients()
+    _fakes = fakes
+
+
+def get_gemini_model(model_name):
+    """Shared GenerativeModel for a model name"""
+    genai = gemini()
+    with _lock:
+        model = _gemini_models.get(model_name)
+        if model is None:
+            model = genai.GenerativeModel(model_name)
+            _gemini_models[model_name] = model
+        return model
+
+
+def get_transcriber():
+    """Shared AssemblyAI transcriber; its httpx client keeps connections alive between calls"""
+    global _transcriber
+    aai = assemblyai()
+    with _lock:
+        if _transcriber is None:
+            config = aai.TranscriptionConfig(
+                punctuate=True,
+                format_text=True,
+            )
+            _transcriber = aai.Transcriber(config=config)
+        return _transcriber
+
+
+def get_http_session():
+    """Shared requests session with a keep-alive connection pool"""
+    global _http_session
+    with _lock:
+        if _http_session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            _http_session = session
+        return _http_session
+
+
+def _ydl_pool(options):
+    key = json.dumps(options, sort_keys=True, default=str)
+    with _lock:
+        pool = _ydl_pools.get(key)
+        if pool is None:
+            pool = queue.LifoQueue(maxsize=YDL_POOL_SIZE)
+            _ydl_pools[key] = pool
+        return pool
+
+
+@contextmanager
+def borrow_ydl(options, paths=None):
+    """Lend a pooled YoutubeDL built with these options to the calling thread"""
+    pool = _ydl_pool(options)
+    try:
+        ydl = pool.get_nowait()
+    except queue.Empty:
+        ydl = yt_dlp().YoutubeDL(dict(options))
+
+    # Output directories differ per call, so they are not part of the pool key
+    ydl.params['paths'] = dict(paths or {})
+    try:
+        yield ydl
+    except Exception:
+        # Don't hand a possibly broken instance to the next request
+        ydl.close()
+        raise
+    finally:
+        ydl.params['paths'] = {}
+
+    try:
+        pool.put_nowait(ydl)
+    except queue.Full:
+        ydl.close()
+
+
+def check_clients():
+    """Cheap health report of every client in this process"""
+    with _lock:
+        return {
+            'sdks_loaded': loaded_sdks(),
+            'gemini': {
+                'configured': bool(os.getenv('GEMINI_API_KEY')),
+                'models': sorted(_gemini_models),
+            },
+            'assemblyai': {
+                'configured': bool(os.getenv('ASSEMBLYAI_API_KEY')),
+                'ready': _transcriber is not None,
+            },
+            'yt_dlp': {
+                'pools': len(_ydl_pools),
+                'idle_instances': sum(pool.qsize() for pool in _ydl_pools.values()),
+            },
+            'http': {
+                'ready': _http_session is not None,
+                'pool_size': HTTP_POOL_SIZE,
+            },
+        }
+
+
+def reset_clients():
+    """Drop every cached client, e.g. after a connection failure or a fork"""
+    global _transcriber, _http_session
+    with _lock:
+        _gemini_models.clear()
+        _transcriber = None
+        if _http_session is not None:
+            _http_session.close()
+            _http_session = None
+        for pool in _ydl_pools.values():
+            while not pool.empty():
+                pool.get_nowait().close()
+        _ydl_pools.clear()
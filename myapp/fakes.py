@@ -0,0 +1,382 @@
+# fakes.py
+"""Local stand-ins for YouTube captions, yt-dlp, AssemblyAI and Gemini.
+
+install() makes clients.py hand these out instead of the real SDKs, so the
+whole pipeline (views, caches, rate limits, database) runs offline with
+configurable latency, error rates and payload sizes. Used by the
+benchmark_generation command and the offline pipeline tests.
+"""
+import asyncio
+import hashlib
+import os
+import random
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from pathlib import Path
+from types import SimpleNamespace
+
+from . import audio, clients
+
+# Latencies are in seconds, each call varies by +/- latency_jitter of it
+DEFAULTS = {
+    'latency_jitter': 0.2,
+    'caption_latency': 0.15,
+    'caption_words': 1500,
+    'no_captions_rate': 0.1,
+    'caption_error_rate': 0.0,
+    'metadata_latency': 0.3,
+    'download_latency': 1.0,
+    'audio_bytes': 1_000_000,
+    # Above 0, videos last this long and downloads are real audio (needs ffmpeg): 6s tones, 1s silences
+    'audio_seconds': 0,
+    'transcribe_latency': 3.0,
+    # Added per minute of audio, when the transcriber can read the audio's length
+    'transcribe_latency_per_minute': 0.25,
+    'transcript_words': 3000,
+    'transcribe_error_rate': 0.0,
+    'llm_latency': 1.5,
+    'llm_words': 700,
+    'llm_error_rate': 0.0,
+    'llm_throttle_rate': 0.0,
+    'seed': None,
+}
+
+WORDS = (
+    'the video explains how small teams ship reliable software by testing early, measuring what '
+    'matters and keeping every change reviewable while the product keeps growing'
+).split()
+
+
+def parse_config(overrides=()):
+    """DEFAULTS updated from 'key=value' strings"""
+    config = dict(DEFAULTS)
+    for override in overrides:
+        key, _, value = override.partition('=')
+        if key not in DEFAULTS:
+            raise ValueError(f"Unknown fake setting {key!r}, expected one of {', '.join(DEFAULTS)}")
+        kind = int if DEFAULTS[key] is None else type(DEFAULTS[key])
+        config[key] = None if value.lower() == 'none' else kind(float(value))
+    return config
+
+
+def make_text(words, offset=0):
+    return ' '.join(WORDS[(offset + index) % len(WORDS)] for index in range(words))
+
+
+class ResourceExhausted(Exception):
+    """Stand-in for the 429 Gemini returns when throttling (ratelimit.is_throttled knows the name)"""
+
+
+class NoTranscriptFound(Exception):
+    pass
+
+
+class TranscriptsDisabled(Exception):
+    pass
+
+
+class VideoUnavailable(Exception):
+    pass
+
+
+class VideoUnplayable(Exception):
+    pass
+
+
+class AgeRestricted(Exception):
+    pass
+
+
+class InvalidVideoId(Exception):
+    pass
+
+
+class RequestBlocked(Exception):
+    pass
+
+
+class FakeProviders:
+    """Every fake SDK, sharing one configuration and random source"""
+
+    def __init__(self, config):
+        self.config = config
+        self.random = random.Random(config['seed'])
+        self._audio_lock = threading.Lock()
+        self._audio_dir = None
+        self.modules = {
+            'gemini': SimpleNamespace(GenerativeModel=self.make_model, configure=lambda **kwargs: None),
+            'assemblyai': SimpleNamespace(
+                Transcriber=lambda config=None: FakeTranscriber(self),
+                TranscriptionConfig=lambda **kwargs: kwargs,
+                TranscriptStatus=SimpleNamespace(completed='completed', error='error'),
+            ),
+            'yt_dlp': SimpleNamespace(YoutubeDL=lambda params=None: FakeYoutubeDL(self, params)),
+            'youtube_transcript_api': SimpleNamespace(
+                YouTubeTranscriptApi=lambda proxy_config=None, http_client=None: FakeTranscriptApi(self),
+                NoTranscriptFound=NoTranscriptFound,
+                TranscriptsDisabled=TranscriptsDisabled,
+                VideoUnavailable=VideoUnavailable,
+                VideoUnplayable=VideoUnplayable,
+                AgeRestricted=AgeRestricted,
+                InvalidVideoId=InvalidVideoId,
+                RequestBlocked=RequestBlocked,
+            ),
+        }
+
+    def sdk(self, name):
+        return self.modules[name]
+
+    def latency(self, name):
+        base = self.config[name]
+        jitter = self.config['latency_jitter']
+        return max(0.0, base * self.random.uniform(1 - jitter, 1 + jitter))
+
+    def sleep(self, name):
+        time.sleep(self.latency(name))
+
+    def fails(self, name):
+        return self.random.random() < self.config[name]
+
+    def video_has_captions(self, video_id):
+        # Decided by the video ID, so every request for a video takes the same path
+        bucket = int(hashlib.md5(video_id.encode()).hexdigest()[:8], 16) / 0xFFFFFFFF
+        return bucket >= self.config['no_captions_rate']
+
+    def get_transcript(self, video_id, languages=None):
+        self.sleep('caption_latency')
+        if not self.video_has_captions(video_id):
+            raise NoTranscriptFound(video_id)
+        if self.fails('caption_error_rate'):
+            raise ConnectionError("Fake caption request failed")
+        words = make_text(self.config['caption_words']).split()
+        return [
+            {'text': ' '.join(words[start:start + 10]), 'start': start * 0.4, 'duration': 4.0}
+            for start in range(0, len(words), 10)
+        ]
+
+    def make_model(self, model_name):
+        return FakeModel(self, model_name)
+
+    def audio_file(self):
+        """Real audio of audio_seconds, generated once and copied for every download"""
+        with self._audio_lock:
+            if self._audio_dir is None:
+                self._audio_dir = tempfile.mkdtemp(prefix='fake-audio-')
+                tone = 'if(lt(t,6),0.5*sin(440*2*PI*t),0)'
+                audio.run_ffmpeg([
+                    '-f', 'lavfi', '-i', f"aevalsrc='{tone}':s=8000:d=7",
+                    '-c:a', 'aac', '-b:a', '16k', '-y', f"{self._audio_dir}/tile.m4a",
+                ])
+                # Encoding hours of audio is slow, repeating the 7s tile is not
+                seconds = self.config['audio_seconds']
+                audio.run_ffmpeg([
+                    '-stream_loop', str(int(seconds // 7)), '-i', f"{self._audio_dir}/tile.m4a",
+                    '-t', str(seconds), '-c', 'copy', '-y', f"{self._audio_dir}/audio.m4a",
+                ])
+            return f"{self._audio_dir}/audio.m4a"
+
+    def close(self):
+        if self._audio_dir:
+            shutil.rmtree(self._audio_dir, ignore_errors=True)
+
+
+class FakeTranscriptApi:
+    """YouTubeTranscriptApi stand-in: fetch() returns a transcript with to_raw_data(), like 1.x"""
+
+    def __init__(self, providers):
+        self.providers = providers
+
+    def fetch(self, video_id, languages=('en',), preserve_formatting=False):
+        return FakeTranscript(self.providers.get_transcript(video_id, languages))
+
+
+class FakeTranscript:
+    """FetchedTranscript stand-in"""
+
+    def __init__(self, snippets):
+        self.snippets = snippets
+
+    def to_raw_data(self):
+        return [dict(snippet) for snippet in self.snippets]
+
+
+class FakeModel:
+    """GenerativeModel stand-in: sync, async and streaming generate_content"""
+
+    def __init__(self, providers, model_name):
+        self.providers = providers
+        self.model_name = model_name
+
+    def _check(self):
+        if self.providers.fails('llm_throttle_rate'):
+            raise ResourceExhausted("429 Resource has been exhausted (fake)")
+        if self.providers.fails('llm_error_rate'):
+            raise RuntimeError("Fake Gemini error")
+
+    def _chunks(self):
+        words = make_text(self.providers.config['llm_words']).split()
+        return [FakeResponse(' '.join(words[start:start + 50]) + ' ') for start in range(0, len(words), 50)]
+
+    def generate_content(self, prompt, stream=False):
+        self._check()
+        if stream:
+            chunks = self._chunks()
+            delay = self.providers.latency('llm_latency') / len(chunks)
+            return FakeStream(chunks, delay)
+        self.providers.sleep('llm_latency')
+        return FakeResponse(''.join(chunk.text for chunk in self._chunks()))
+
+    async def generate_content_async(self, prompt, stream=False):
+        self._check()
+        if stream:
+            chunks = self._chunks()
+            delay = self.providers.latency('llm_latency') / len(chunks)
+            return FakeStream(chunks, delay)
+        await asyncio.sleep(self.providers.latency('llm_latency'))
+        return FakeResponse(''.join(chunk.text for chunk in self._chunks()))
+
+
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+        self.parts = [text]
+
+
+class FakeStream:
+    """Streamed response, iterable with for and async for"""
+
+    def __init__(self, chunks, delay):
+        self.chunks = chunks
+        self.delay = delay
+
+    def __iter__(self):
+        for chunk in self.chunks:
+            time.sleep(self.delay)
+            yield chunk
+
+    async def __aiter__(self):
+        for chunk in self.chunks:
+            await asyncio.sleep(self.delay)
+            yield chunk
+
+
+class FakeYoutubeDL:
+    """YoutubeDL stand-in: metadata extraction and an audio 'download' of audio_bytes"""
+
+    def __init__(self, providers, params=None):
+        self.providers = providers
+        self.params = dict(params or {})
+
+    def extract_info(self, link, download=False):
+        self.providers.sleep('metadata_latency')
+        video_id = link.rstrip('/').rsplit('=', 1)[-1].rsplit('/', 1)[-1]
+        info = {
+            'id': video_id,
+            'title': f"Benchmark video {video_id}",
+            'uploader': 'Benchmark Channel',
+            'duration': int(self.providers.config['audio_seconds']) or 600,
+            'description': make_text(40),
+            'view_count': 1000,
+            'upload_date': '20250101',
+            'tags': ['benchmark'],
+            'ext': 'm4a',
+            # Not http(s), so the pipeline takes the download path instead of streaming from a URL
+            'protocol': 'fake',
+        }
+        return self.process_ie_result(info, download=download)
+
+    def process_ie_result(self, info, download=False):
+        if download:
+            self.providers.sleep('download_latency')
+            home = Path((self.params.get('paths') or {}).get('home', '.'))
+            path = home / f"{info['id']}.{info.get('ext', 'm4a')}"
+            if self.providers.config['audio_seconds']:
+                shutil.copyfile(self.providers.audio_file(), path)
+            else:
+                path.write_bytes(b'\0' * self.providers.config['audio_bytes'])
+        return info
+
+    def close(self):
+        pass
+
+
+class FakeTranscriber:
+    """AssemblyAI Transcriber stand-in.
+
+    For audio files ffmpeg can read, it returns a word every 0.4s of the
+    audio and takes longer the longer the audio is, like the real service.
+    Otherwise it returns transcript_words words.
+    """
+
+    def __init__(self, providers):
+        self.providers = providers
+
+    def duration(self, audio_input):
+        if hasattr(audio_input, 'read'):
+            while audio_input.read(1024 * 1024):
+                pass
+            return None
+        try:
+            return audio.probe_duration(audio_input)
+        except audio.AudioError:
+            return None
+
+    def submit(self, audio_input):
+        """Read the upload and queue a job"""
+        return FakeTranscriptJob(self.providers, self.duration(audio_input))
+
+    def transcribe(self, audio_input):
+        return self.submit(audio_input).wait_for_completion()
+
+
+class FakeTranscriptJob:
+    """AssemblyAI Transcript stand-in: queued by submit(), finished by wait_for_completion()"""
+
+    def __init__(self, providers, duration):
+        self.providers = providers
+        self.duration = duration
+        self.id = uuid.uuid4().hex
+        self.status = 'queued'
+        self.error = None
+        self.text = None
+        self.confidence = None
+        self.words = []
+
+    def wait_for_completion(self):
+        latency = self.providers.latency('transcribe_latency')
+        if self.duration:
+            latency += self.providers.config['transcribe_latency_per_minute'] * self.duration / 60
+        time.sleep(latency)
+        if self.providers.fails('transcribe_error_rate'):
+            self.status = 'error'
+            self.error = 'Fake transcription error'
+            return self
+        count = int(self.duration / 0.4) if self.duration else self.providers.config['transcript_words']
+        words = make_text(count).split()
+        self.status = 'completed'
+        self.text = ' '.join(words)
+        self.confidence = 0.93
+        self.words = [
+            SimpleNamespace(text=word, start=index * 400, end=index * 400 + 350)
+            for index, word in enumerate(words)
+        ]
+        return self
+
+
+def install(config=None):
+    """Route every provider call in this process to fakes built from config"""
+    providers = FakeProviders(config or dict(DEFAULTS))
+    # The views refuse to call providers without keys, the fakes don't need real ones
+    os.environ.setdefault('GEMINI_API_KEY', 'offline-fake')
+    os.environ.setdefault('ASSEMBLYAI_API_KEY', 'offline-fake')
+    clients.install_fakes(providers)
+    return providers
+
+
+def uninstall(providers=None):
+    clients.install_fakes(None)
+    if providers is not None:
+        providers.close()
@@ -0,0 +1,220 @@
+# jobs.py
+"""Background generation jobs run on a local worker pool"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, connections, transaction
+from django.utils import timezone
+
+from . import metrics, views
+from .models import BlogPost, GenerationBatch, GenerationJob
+from .pipeline import build_blog_post, generate_blog_content, run_generation
+from .utils import extract_video_id
+
+_executor = None
+_executor_lock = threading.Lock()
+
+# Batch item whose blog is ready and waits for the final bulk insert
+ITEM_GENERATED = 'generated'
+
+
+def get_executor():
+    """Worker pool shared by every request in this process"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'GENERATION_JOB_WORKERS', 4),
+                thread_name_prefix='generation-job',
+            )
+        return _executor
+
+
+def enqueue_generation_job(job):
+    """Submit a saved job to the worker pool once the transaction commits"""
+    transaction.on_commit(lambda: get_executor().submit(run_generation_job, job.id))
+
+
+def run_generation_job(job_id):
+    """Run one job through the pipeline and record the outcome"""
+    close_old_connections()
+    try:
+        # Claim the job so it never runs twice
+        claimed = GenerationJob.objects.filter(
+            id=job_id, status=GenerationJob.STATUS_PENDING
+        ).update(status=GenerationJob.STATUS_RUNNING, started_at=timezone.now())
+        if not claimed:
+            return
+
+        job = GenerationJob.objects.select_related('user').get(id=job_id)
+        try:
+            blog, result = run_generation(
+                job.user, job.youtube_link, reuse=job.reuse, regenerate=job.regenerate
+            )
+        except Exception as e:
+            print(f"Generation job {job_id} failed: {e}")
+            GenerationJob.objects.filter(id=job_id).update(
+                status=GenerationJob.STATUS_FAILED,
+                error=str(e),
+                finished_at=timezone.now(),
+            )
+        else:
+            GenerationJob.objects.filter(id=job_id).update(
+                status=GenerationJob.STATUS_SUCCEEDED,
+                blog=blog,
+                method=result['method'],
+                finished_at=timezone.now(),
+            )
+    finally:
+        close_old_connections()
+
+
+def enqueue_generation_batch(batch):
+    """Submit a saved batch to the worker pool once the transaction commits"""
+    transaction.on_commit(lambda: get_executor().submit(run_generation_batch, batch.id))
+
+
+def build_batch_items(links):
+    """One pending item per unique video ID, plus the number of duplicates dropped"""
+    items = []
+    seen = set()
+    for link in links:
+        video_id = extract_video_id(link)
+        if video_id in seen:
+            continue
+        if video_id:
+            seen.add(video_id)
+        items.append({
+            'link': link,
+            'video_id': video_id or '',
+            'status': GenerationJob.STATUS_PENDING if video_id else GenerationJob.STATUS_FAILED,
+            'method': '',
+            'blog_id': None,
+            'error': '' if video_id else 'Invalid YouTube URL',
+        })
+    return items, len(links) - len(items)
+
+
+def run_generation_batch(batch_id):
+    """Generate every item of a batch with bounded fan-out, then insert the blogs in one bulk_create"""
+    close_old_connections()
+    try:
+        claimed = GenerationBatch.objects.filter(
+            id=batch_id, status=GenerationBatch.STATUS_PENDING
+        ).update(status=GenerationBatch.STATUS_RUNNING, started_at=timezone.now())
+        if not claimed:
+            return
+
+        batch = GenerationBatch.objects.select_related('user').get(id=batch_id)
+        max_items = getattr(settings, 'BATCH_MAX_ITEMS', 200)
+        try:
+            links = list(batch.links)
+            unfetched = 0
+            if batch.playlist_url:
+                urls, total = views.expand_playlist(batch.playlist_url, limit=max_items)
+                links += urls
+                unfetched = total - len(urls)
+        except Exception as e:
+            print(f"Playlist expansion for batch {batch_id} failed: {e}")
+            GenerationBatch.objects.filter(id=batch_id).update(
+                status=GenerationBatch.STATUS_FAILED,
+                error=f'Playlist expansion failed: {str(e)}',
+                finished_at=timezone.now(),
+            )
+            return
+
+        items, duplicates = build_batch_items(links)
+        dropped = unfetched + max(0, len(items) - max_items)
+        items = items[:max_items]
+        GenerationBatch.objects.filter(id=batch_id).update(
+            items=items, duplicates_skipped=duplicates, items_dropped=dropped
+        )
+
+        progress_lock = threading.Lock()
+        new_posts = []
+
+        def update_item(index, **fields):
+            # Written under the lock so an older snapshot never lands after a newer one
+            with progress_lock:
+                items[index].update(fields)
+                GenerationBatch.objects.filter(id=batch_id).update(items=items)
+
+        def process_item(index):
+            item = items[index]
+            try:
+                update_item(index, status=GenerationJob.STATUS_RUNNING)
+
+                if batch.reuse:
+                    source = views.find_reusable_blog(item['video_id'], batch.user)
+                    if source:
+                        metrics.inc('generations_total', method='reused')
+                    if source and source.user_id == batch.user_id:
+                        update_item(index, status=GenerationJob.STATUS_SUCCEEDED, method='reused', blog_id=source.id)
+                        return
+                    if source:
+                        with progress_lock:
+                            new_posts.append((index, views.clone_blog_post(source, batch.user, item['link'])))
+                        update_item(index, status=ITEM_GENERATED, method='reused')
+                        return
+
+                result = generate_blog_content(item['link'])
+                with progress_lock:
+                    new_posts.append((index, build_blog_post(batch.user, item['link'], result)))
+                update_item(index, status=ITEM_GENERATED, method=result['method'])
+            except Exception as e:
+                print(f"Batch {batch_id} item {item['link']} failed: {e}")
+                update_item(index, status=GenerationJob.STATUS_FAILED, error=str(e))
+            finally:
+                connections.close_all()
+
+        pending = [index for index, item in enumerate(items) if item['status'] == GenerationJob.STATUS_PENDING]
+        if pending:
+            with ThreadPoolExecutor(max_workers=min(batch.concurrency, len(pending)),
+                                    thread_name_prefix='generation-batch') as executor:
+                list(executor.map(process_item, pending))
+
+        for _, post in new_posts:
+            if not post.rendered_html:
+                post.render_html()
+            post.compress_content()
+        created = BlogPost.objects.bulk_create([post for _, post in new_posts])
+        for (index, _), blog in zip(new_posts, created):
+            items[index].update(status=GenerationJob.STATUS_SUCCEEDED, blog_id=blog.id)
+
+        succeeded = any(item['status'] == GenerationJob.STATUS_SUCCEEDED for item in items)
+        GenerationBatch.objects.filter(id=batch_id).update(
+            items=items,
+            status=GenerationBatch.STATUS_SUCCEEDED if succeeded or not items else GenerationBatch.STATUS_FAILED,
+            finished_at=timezone.now(),
+        )
+    except Exception as e:
+        print(f"Generation batch {batch_id} failed: {e}")
+        GenerationBatch.objects.filter(id=batch_id).update(
+            status=GenerationBatch.STATUS_FAILED,
+            error=str(e),
+            finished_at=timezone.now(),
+        )
+    finally:
+        close_old_connections()
+
+
+def requeue_stale_jobs(max_age):
+    """Reset jobs stuck in running (e.g. after a worker restart) back to pending"""
+    cutoff = timezone.now() - timedelta(seconds=max_age)
+    return GenerationJob.objects.filter(
+        status=GenerationJob.STATUS_RUNNING, started_at__lt=cutoff
+    ).update(status=GenerationJob.STATUS_PENDING, started_at=None)
+
+
+def requeue_stale_batches(max_age):
+    """Reset batches stuck in running back to pending.
+
+    A rerun rebuilds the items; blogs the interrupted run already inserted
+    are picked up again by reuse.
+    """
+    cutoff = timezone.now() - timedelta(seconds=max_age)
+    return GenerationBatch.objects.filter(
+        status=GenerationBatch.STATUS_RUNNING, started_at__lt=cutoff
+    ).update(status=GenerationBatch.STATUS_PENDING, started_at=None)
@@ -0,0 +1,267 @@
+import asyncio
+import contextlib
+import io
+import json
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.test import AsyncClient, Client
+from django.test.utils import override_settings
+
+from myapp import fakes, metrics
+
+ENDPOINTS = {
+    'smart': '/generate_blog_smart/',
+    'api': '/api/generate-blog/',
+    'async': '/async/generate-blog/',
+}
+
+# Effectively no client-side rate limit, so the numbers show the pipeline and not the buckets
+UNLIMITED = {'rate': 100000, 'burst': 100000}
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a non-empty list"""
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered) + 0.5) - 1))
+    return ordered[index]
+
+
+def parse_server_timing(header):
+    """{stage: milliseconds} from a Server-Timing header"""
+    stages = {}
+    for entry in (header or '').split(','):
+        name, _, params = entry.strip().partition(';')
+        for param in params.split(';'):
+            key, _, value = param.strip().partition('=')
+            if key == 'dur' and name:
+                stages[name] = float(value)
+    return stages
+
+
+class Command(BaseCommand):
+    help = "Benchmark the generation endpoints end to end, offline, against fake providers"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--requests', type=int, default=50,
+            help="Generations to run",
+        )
+        parser.add_argument(
+            '--concurrency', type=int, default=10,
+            help="Requests in flight at once",
+        )
+        parser.add_argument(
+            '--endpoint', choices=sorted(ENDPOINTS), default='smart',
+            help="smart (the form's JSON view), api (DRF) or async (the ASGI view)",
+        )
+        parser.add_argument(
+            '--videos', type=int, default=None,
+            help="Distinct videos to spread the requests over (default: one per request, so nothing is reused)",
+        )
+        parser.add_argument(
+            '--set', action='append', default=[], metavar='KEY=VALUE',
+            help=f"Override a fake provider setting, repeatable: {', '.join(fakes.DEFAULTS)}",
+        )
+        parser.add_argument(
+            '--real-limits', action='store_true',
+            help="Keep PROVIDER_RATE_LIMITS instead of lifting them",
+        )
+        parser.add_argument(
+            '--json', dest='json_path', default=None,
+            help="Also write the results to this file",
+        )
+        parser.add_argument(
+            '--max-p95', type=float, default=None,
+            help="Fail if the p95 latency in milliseconds is above this (for CI)",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            config = fakes.parse_config(options['set'])
+        except ValueError as e:
+            raise CommandError(str(e))
+        total = max(1, options['requests'])
+        concurrency = max(1, min(options['concurrency'], total))
+        videos = max(1, options['videos'] or total)
+        # Fresh IDs each run, so caches from earlier runs in this process can't answer
+        prefix = uuid.uuid4().hex[:6]
+        links = [f"https://www.youtube.com/watch?v={prefix}{index % videos:05d}" for index in range(total)]
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            overrides = {
+                'CACHE_DIR': Path(temp_dir),
+                'CACHES': {
+                    **settings.CACHES,
+                    'shared': {**settings.CACHES['shared'], 'LOCATION': Path(temp_dir) / 'shared'},
+                },
+                'ALLOWED_HOSTS': [*settings.ALLOWED_HOSTS, 'testserver'],
+            }
+            if not options['real_limits']:
+                overrides['PROVIDER_RATE_LIMITS'] = {
+                    provider: UNLIMITED for provider in ('youtube', 'assemblyai', 'gemini')
+                }
+
+            with override_settings(**overrides):
+                if connection.vendor == 'sqlite':
+                    # A file, not the in-memory default, so concurrent requests can share it
+                    connection.settings_dict['TEST']['NAME'] = str(Path(temp_dir) / 'benchmark.sqlite3')
+                old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+                providers = fakes.install(config)
+                # The pipeline's own logging drowns the report unless asked for with -v 2
+                app_output = contextlib.nullcontext() if options['verbosity'] > 1 else contextlib.redirect_stdout(io.StringIO())
+                try:
+                    user = User.objects.create_user('benchmark', password=uuid.uuid4().hex)
+                    started = time.perf_counter()
+                    with app_output:
+                        if options['endpoint'] == 'async':
+                            results = asyncio.run(self.run_async(user, links, concurrency))
+                        else:
+                            results = self.run_threads(user, links, concurrency, ENDPOINTS[options['endpoint']])
+                    elapsed = time.perf_counter() - started
+                    metrics.flush()
+                    counters, _ = metrics.collect()
+                finally:
+                    fakes.uninstall(providers)
+                    connections.close_all()
+                    connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        report = self.summarize(results, elapsed, counters, options['endpoint'], concurrency)
+        self.print_report(report, config)
+        if options['json_path']:
+            Path(options['json_path']).write_text(json.dumps(report, indent=2))
+        if options['max_p95'] is not None and report['latency_ms']['p95'] > options['max_p95']:
+            raise CommandError(f"p95 latency {report['latency_ms']['p95']:.0f} ms is above --max-p95 {options['max_p95']:.0f} ms")
+        self.stdout.write(self.style.SUCCESS(f"Ran {total} generation(s) in {elapsed:.1f}s"))
+
+    def run_threads(self, user, links, concurrency, path):
+        local = threading.local()
+
+        def client():
+            if not hasattr(local, 'client'):
+                local.client = Client()
+                local.client.force_login(user)
+            return local.client
+
+        def generate(link):
+            start = time.perf_counter()
+            response = client().post(path, {'link': link}, content_type='application/json')
+            return self.result(response, time.perf_counter() - start)
+
+        barrier = threading.Barrier(concurrency)
+
+        def close_connections(_):
+            # The barrier makes every driver thread take exactly one of these
+            barrier.wait()
+            connections.close_all()
+
+        with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='benchmark') as executor:
+            results = list(executor.map(generate, links))
+            # Each driver thread holds a database connection, which would keep the test database open
+            list(executor.map(close_connections, range(concurrency)))
+        return results
+
+    async def run_async(self, user, links, concurrency):
+        client = AsyncClient()
+        await client.aforce_login(user)
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def generate(link):
+            async with semaphore:
+                start = time.perf_counter()
+                response = await client.post(ENDPOINTS['async'], {'link': link}, content_type='application/json')
+                return self.result(response, time.perf_counter() - start)
+
+        return await asyncio.gather(*(generate(link) for link in links))
+
+    def result(self, response, seconds):
+        try:
+            body = json.loads(response.content)
+        except ValueError:
+            body = {}
+        return {
+            'status': response.status_code,
+            'seconds': seconds,
+            'method': body.get('method') or 'error',
+            'stages': parse_server_timing(response.get('Server-Timing')),
+        }
+
+    def summarize(self, results, elapsed, counters, endpoint, concurrency):
+        latencies = [result['seconds'] * 1000 for result in results]
+        statuses = {}
+        methods = {}
+        stage_samples = {}
+        for result in results:
+            statuses[str(result['status'])] = statuses.get(str(result['status']), 0) + 1
+            methods[result['method']] = methods.get(result['method'], 0) + 1
+            for stage, ms in result['stages'].items():
+                if stage != 'total':
+                    stage_samples.setdefault(stage, []).append(ms)
+
+        cache = {}
+        for (name, labels), value in counters.items():
+            labels = dict(labels)
+            if name == 'cache_requests_total':
+                hits = cache.setdefault(labels['cache'], {'local_hit': 0, 'shared_hit': 0, 'miss': 0})
+                hits[labels['result']] = hits.get(labels['result'], 0) + value
+
+        return {
+            'endpoint': ENDPOINTS[endpoint],
+            'requests': len(results),
+            'concurrency': concurrency,
+            'seconds': round(elapsed, 3),
+            'requests_per_second': round(len(results) / elapsed, 2),
+            'latency_ms': {
+                name: round(percentile(latencies, pct), 1)
+                for name, pct in (('p50', 50), ('p95', 95), ('p99', 99), ('max', 100))
+            },
+            'statuses': statuses,
+            'methods': methods,
+            'stages_ms': {
+                stage: {
+                    'calls': len(samples),
+                    'p50': round(percentile(samples, 50), 1),
+                    'p95': round(percentile(samples, 95), 1),
+                    'p99': round(percentile(samples, 99), 1),
+                }
+                for stage, samples in stage_samples.items()
+            },
+            'cache': cache,
+            'throttled': sum(value for (name, _), value in counters.items() if name == 'ratelimit_throttled_total'),
+        }
+
+    def print_report(self, report, config):
+        latency = report['latency_ms']
+        self.stdout.write(
+            f"{report['endpoint']}: {report['requests']} request(s), concurrency {report['concurrency']}, "
+            f"{report['seconds']:.1f}s, {report['requests_per_second']:.2f} req/s"
+        )
+        self.stdout.write(
+            f"Latency (ms): p50 {latency['p50']:.0f}  p95 {latency['p95']:.0f}  "
+            f"p99 {latency['p99']:.0f}  max {latency['max']:.0f}"
+        )
+        self.stdout.write("Status: " + ', '.join(f"{code} x{count}" for code, count in sorted(report['statuses'].items())))
+        self.stdout.write("Method: " + ', '.join(f"{method} x{count}" for method, count in sorted(report['methods'].items())))
+        if report['throttled']:
+            self.stdout.write(f"Throttled provider calls (retried): {report['throttled']}")
+
+        self.stdout.write(f"\n{'Stage (ms)':<16}{'calls':>7}{'p50':>9}{'p95':>9}{'p99':>9}")
+        for stage, stats in report['stages_ms'].items():
+            self.stdout.write(f"{stage:<16}{stats['calls']:>7}{stats['p50']:>9.0f}{stats['p95']:>9.0f}{stats['p99']:>9.0f}")
+
+        if report['cache']:
+            self.stdout.write(f"\n{'Cache':<16}{'local':>7}{'shared':>9}{'miss':>9}")
+            for name, hits in sorted(report['cache'].items()):
+                self.stdout.write(f"{name:<16}{hits['local_hit']:>7}{hits['shared_hit']:>9}{hits['miss']:>9}")
+
+        changed = {key: value for key, value in config.items() if value != fakes.DEFAULTS[key]}
+        if changed:
+            self.stdout.write("\nFake settings: " + ', '.join(f"{key}={value}" for key, value in changed.items()))
@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from myapp.models import BlogPost
+from myapp.utils import render_blog_html
+
+
+class Command(BaseCommand):
+    help = "Fill rendered_html for blogs saved before it existed (or for every blog with --all)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all', action='store_true',
+            help="Re-render every blog, e.g. after changing the markdown settings",
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=200,
+            help="Blogs updated per query",
+        )
+
+    def handle(self, *args, **options):
+        # content_compressed is loaded too so compressed articles come back as generated_content
+        blogs = BlogPost.objects.only('id', 'generated_content', 'content_compressed').order_by('id')
+        if not options['all']:
+            blogs = blogs.filter(rendered_html='')
+
+        batch = []
+        rendered = 0
+        for blog in blogs.iterator(chunk_size=options['batch_size']):
+            blog.rendered_html = render_blog_html(blog.generated_content)
+            # bulk_update skips auto_now, and the detail/list ETags are built from updated_at
+            blog.updated_at = timezone.now()
+            batch.append(blog)
+            if len(batch) >= options['batch_size']:
+                rendered += BlogPost.objects.bulk_update(batch, ['rendered_html', 'updated_at'])
+                batch = []
+        if batch:
+            rendered += BlogPost.objects.bulk_update(batch, ['rendered_html', 'updated_at'])
+
+        self.stdout.write(self.style.SUCCESS(f"Rendered {rendered} blog(s)"))
@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand
+
+from myapp.jobs import requeue_stale_batches, requeue_stale_jobs, run_generation_batch, run_generation_job
+from myapp.models import GenerationBatch, GenerationJob
+
+
+class Command(BaseCommand):
+    help = "Run pending blog generation jobs and batches, e.g. ones left behind by a restarted worker"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--stale-after', type=int, default=1800,
+            help="Requeue running jobs and batches started more than this many seconds ago",
+        )
+
+    def handle(self, *args, **options):
+        requeued = requeue_stale_jobs(options['stale_after'])
+        if requeued:
+            self.stdout.write(f"Requeued {requeued} stale job(s)")
+        requeued = requeue_stale_batches(options['stale_after'])
+        if requeued:
+            self.stdout.write(f"Requeued {requeued} stale batch(es)")
+
+        job_ids = list(
+            GenerationJob.objects.filter(status=GenerationJob.STATUS_PENDING)
+            .order_by('created_at')
+            .values_list('id', flat=True)
+        )
+        for job_id in job_ids:
+            run_generation_job(job_id)
+            job = GenerationJob.objects.get(id=job_id)
+            self.stdout.write(f"{job_id}: {job.status}")
+
+        batch_ids = list(
+            GenerationBatch.objects.filter(status=GenerationBatch.STATUS_PENDING)
+            .order_by('created_at')
+            .values_list('id', flat=True)
+        )
+        for batch_id in batch_ids:
+            run_generation_batch(batch_id)
+            batch = GenerationBatch.objects.get(id=batch_id)
+            self.stdout.write(f"Batch {batch_id}: {batch.status}")
+
+        self.stdout.write(self.style.SUCCESS(f"Processed {len(job_ids)} job(s) and {len(batch_ids)} batch(es)"))
@@ -0,0 +1,88 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Runs in a fresh interpreter: boots Django and loads every URLconf/view module like a
+# worker does before its first request, then imports each SDK still missing
+PROBE = """
+import json
+import time
+
+def rss_mb():
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+start = time.perf_counter()
+import django
+django.setup()
+from django.urls import get_resolver
+get_resolver().url_patterns
+boot = time.perf_counter() - start
+
+from myapp import clients
+loaded = clients.loaded_sdks()
+boot_rss = rss_mb()
+first_use = clients.preload_sdks()
+print(json.dumps({
+    'boot': boot,
+    'rss': boot_rss,
+    'loaded': loaded,
+    'first_use': first_use,
+    'full_rss': rss_mb(),
+}))
+"""
+
+
+class Command(BaseCommand):
+    help = "Measure a fresh worker's startup time and memory, with lazy and preloaded SDKs"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--runs', type=int, default=3,
+            help="Fresh interpreters per mode; medians are reported",
+        )
+
+    def probe(self, preload):
+        env = dict(os.environ, PRELOAD_SDKS='true' if preload else 'false')
+        env.setdefault('DJANGO_SETTINGS_MODULE', 'ytfinal.settings')
+        result = subprocess.run(
+            [sys.executable, '-c', PROBE], env=env, cwd=settings.BASE_DIR, capture_output=True, text=True,
+        )
+        if result.returncode != 0:
+            raise CommandError(f"Startup probe failed:\n{result.stderr}")
+        return json.loads(result.stdout.strip().splitlines()[-1])
+
+    def handle(self, *args, **options):
+        runs = max(1, options['runs'])
+        self.stdout.write(f"{'Mode':<10}{'Boot (s)':>10}{'RSS (MB)':>10}  SDKs loaded at boot")
+        for preload in (False, True):
+            samples = [self.probe(preload) for _ in range(runs)]
+            boot = statistics.median(sample['boot'] for sample in samples)
+            rss = statistics.median(sample['rss'] for sample in samples)
+            mode = 'preload' if preload else 'lazy'
+            self.stdout.write(f"{mode:<10}{boot:>10.2f}{rss:>10.1f}  {', '.join(samples[0]['loaded']) or '-'}")
+
+            if not preload:
+                first_use = {
+                    name: statistics.median(sample['first_use'][name] for sample in samples)
+                    for name in samples[0]['first_use']
+                }
+                full_rss = statistics.median(sample['full_rss'] for sample in samples)
+
+        self.stdout.write("\nFirst use of each SDK in a lazy worker:")
+        for name, seconds in first_use.items():
+            self.stdout.write(f"  {name:<24}{seconds:>6.2f}s")
+        self.stdout.write(f"  RSS with every SDK loaded: {full_rss:.1f} MB")
+        self.stdout.write("With PRELOAD_SDKS=true gunicorn's master pays the preload once and forked workers share it")
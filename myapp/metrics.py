@@ -0,0 +1,301 @@
+# metrics.py
+"""Counters and latency histograms for the generation pipeline, in Prometheus format.
+
+Every process keeps its own numbers and a background thread writes them to
+CACHE_DIR/metrics/<pid>-<id>.json when they change, at most every
+METRICS_FLUSH_INTERVAL seconds. The /metrics endpoint adds up the files of
+all workers, so a scrape sees the whole host whichever worker answers it.
+
+Stage durations recorded while a request is being handled are also kept for
+that request, for its Server-Timing header.
+"""
+import atexit
+import contextvars
+import functools
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+
+PREFIX = 'ytsummary_'
+BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+FLUSH_INTERVAL = getattr(settings, 'METRICS_FLUSH_INTERVAL', 2.0)
+# Files of workers that stopped writing this long ago are dropped (a counter reset for Prometheus)
+RETENTION = getattr(settings, 'METRICS_RETENTION', 7 * 24 * 3600)
+
+METRICS = {
+    'stage_duration_seconds': ('histogram', "Time spent in each generation stage"),
+    'bytes_total': ('counter', "Bytes fetched or sent per kind (captions, audio, prompts, completions)"),
+    'generations_total': ('counter', "Finished generations by method: fast captions, full transcription, reused or failed"),
+    'cache_requests_total': ('counter', "Cache lookups by cache and result"),
+    'ratelimit_wait_seconds_total': ('counter', "Time spent waiting for provider rate limits"),
+    'ratelimit_throttled_total': ('counter', "Calls a provider throttled"),
+}
+
+_lock = threading.Lock()
+_counters = {}
+_histograms = {}
+_dirty = False
+_pid = None
+_path = None
+_request_timings = contextvars.ContextVar('request_timings', default=None)
+
+
+def metrics_dir():
+    return Path(settings.CACHE_DIR) / 'metrics'
+
+
+def _key(name, labels):
+    return name, tuple(sorted(labels.items()))
+
+
+def _start_process():
+    """Fresh numbers and file for this process, also after a fork"""
+    global _pid, _path, _dirty
+    _pid = os.getpid()
+    _path = metrics_dir() / f"{_pid}-{uuid.uuid4().hex[:8]}.json"
+    _counters.clear()
+    _histograms.clear()
+    _dirty = False
+    threading.Thread(target=_flush_loop, name='metrics-flush', daemon=True).start()
+
+
+def _changed():
+    # Called with _lock held
+    global _dirty
+    if _pid != os.getpid():
+        _start_process()
+    _dirty = True
+
+
+def inc(name, value=1, **labels):
+    """Add value to a counter"""
+    with _lock:
+        _changed()
+        key = _key(name, labels)
+        _counters[key] = _counters.get(key, 0) + value
+
+
+def observe(name, value, **labels):
+    """Record a value in a histogram"""
+    with _lock:
+        _changed()
+        key = _key(name, labels)
+        histogram = _histograms.get(key)
+        if histogram is None:
+            histogram = _histograms[key] = {'buckets': [0] * len(BUCKETS), 'sum': 0.0, 'count': 0}
+        for index, bound in enumerate(BUCKETS):
+            if value <= bound:
+                histogram['buckets'][index] += 1
+                break
+        histogram['sum'] += value
+        histogram['count'] += 1
+
+
+def add_bytes(kind, count):
+    """Count bytes fetched or sent"""
+    if count:
+        inc('bytes_total', count, kind=kind)
+
+
+def record_stage(stage, seconds, outcome='ok'):
+    """Record a stage duration, for the metrics and the current request's Server-Timing"""
+    observe('stage_duration_seconds', seconds, stage=stage, outcome=outcome)
+    timings = _request_timings.get()
+    if timings is not None:
+        timings.append((stage, seconds))
+
+
+@contextmanager
+def timer(stage):
+    """Time the block as a stage; exceptions are recorded with outcome="error" """
+    start = time.perf_counter()
+    outcome = 'ok'
+    try:
+        yield
+    except Exception:
+        outcome = 'error'
+        raise
+    finally:
+        record_stage(stage, time.perf_counter() - start, outcome)
+
+
+def timed(stage):
+    """Decorator timing every call of a function as a stage"""
+    def decorator(func):
+        if iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with timer(stage):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with timer(stage):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+@contextmanager
+def capture_timings():
+    """Collect the stage durations recorded in this context (and in work it hands to threads with copy_context)"""
+    timings = []
+    token = _request_timings.set(timings)
+    try:
+        yield timings
+    finally:
+        try:
+            _request_timings.reset(token)
+        except ValueError:
+            # A streamed response can be closed from another context than the one that started it
+            pass
+
+
+def timing_summary(timings):
+    """{stage: milliseconds}, repeated stages added up, in the order they first finished"""
+    summary = {}
+    for stage, seconds in timings:
+        summary[stage] = summary.get(stage, 0.0) + seconds * 1000
+    return {stage: round(ms, 1) for stage, ms in summary.items()}
+
+
+def server_timing_header(timings, total=None):
+    entries = [f"{stage};dur={ms}" for stage, ms in timing_summary(timings).items()]
+    if total is not None:
+        entries.append(f"total;dur={total * 1000:.1f}")
+    return ', '.join(entries)
+
+
+def server_timing(view):
+    """View decorator adding a Server-Timing header with the stages the request went through"""
+    if iscoroutinefunction(view):
+        @functools.wraps(view)
+        async def async_wrapper(request, *args, **kwargs):
+            start = time.perf_counter()
+            with capture_timings() as timings:
+                response = await view(request, *args, **kwargs)
+            response['Server-Timing'] = server_timing_header(timings, time.perf_counter() - start)
+            return response
+        return async_wrapper
+
+    @functools.wraps(view)
+    def wrapper(request, *args, **kwargs):
+        start = time.perf_counter()
+        with capture_timings() as timings:
+            response = view(request, *args, **kwargs)
+        response['Server-Timing'] = server_timing_header(timings, time.perf_counter() - start)
+        return response
+    return wrapper
+
+
+def _snapshot():
+    with _lock:
+        return {
+            'counters': [[name, dict(labels), value] for (name, labels), value in _counters.items()],
+            'histograms': [
+                [name, dict(labels), histogram['buckets'], histogram['sum'], histogram['count']]
+                for (name, labels), histogram in _histograms.items()
+            ],
+        }
+
+
+def flush():
+    """Write this process's numbers for the other workers to read"""
+    global _dirty
+    with _lock:
+        if _pid != os.getpid() or not _dirty:
+            return
+        _dirty = False
+        path = _path
+    data = _snapshot()
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix('.tmp')
+        tmp.write_text(json.dumps(data))
+        os.replace(tmp, path)
+    except OSError as e:
+        print(f"Writing metrics failed: {e}")
+
+
+def _flush_loop():
+    pid = os.getpid()
+    while _pid == pid:
+        time.sleep(FLUSH_INTERVAL)
+        flush()
+
+
+atexit.register(flush)
+
+
+def collect():
+    """Counters and histograms of every worker on this host, added up"""
+    flush()
+    counters = {}
+    histograms = {}
+    now = time.time()
+    for path in metrics_dir().glob('*.json'):
+        try:
+            if now - path.stat().st_mtime > RETENTION:
+                path.unlink()
+                continue
+            data = json.loads(path.read_text())
+        except (OSError, ValueError):
+            continue
+        for name, labels, value in data.get('counters', []):
+            key = _key(name, labels)
+            counters[key] = counters.get(key, 0) + value
+        for name, labels, buckets, total, count in data.get('histograms', []):
+            key = _key(name, labels)
+            histogram = histograms.setdefault(key, {'buckets': [0] * len(BUCKETS), 'sum': 0.0, 'count': 0})
+            histogram['buckets'] = [a + b for a, b in zip(histogram['buckets'], buckets)]
+            histogram['sum'] += total
+            histogram['count'] += count
+    return counters, histograms
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    escaped = (
+        (name, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for name, value in labels
+    )
+    return '{' + ','.join(f'{name}="{value}"' for name, value in escaped) + '}'
+
+
+def _format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render():
+    """Every worker's metrics in the Prometheus text exposition format"""
+    counters, histograms = collect()
+    lines = []
+    for name, (kind, help_text) in METRICS.items():
+        full_name = PREFIX + name
+        lines.append(f"# HELP {full_name} {help_text}")
+        lines.append(f"# TYPE {full_name} {kind}")
+        if kind == 'histogram':
+            for (metric, labels), histogram in sorted(histograms.items()):
+                if metric != name:
+                    continue
+                cumulative = 0
+                for bound, count in zip(BUCKETS, histogram['buckets']):
+                    cumulative += count
+                    lines.append(f"{full_name}_bucket{_format_labels(labels + (('le', bound),))} {cumulative}")
+                lines.append(f"{full_name}_bucket{_format_labels(labels + (('le', '+Inf'),))} {histogram['count']}")
+                lines.append(f"{full_name}_sum{_format_labels(labels)} {_format_value(histogram['sum'])}")
+                lines.append(f"{full_name}_count{_format_labels(labels)} {histogram['count']}")
+        else:
+            for (metric, labels), value in sorted(counters.items()):
+                if metric == name:
+                    lines.append(f"{full_name}{_format_labels(labels)} {_format_value(value)}")
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.4 on 2026-10-18 04:35
+
+from django.db import migrations, models
+
+from myapp.utils import extract_video_id
+
+
+def backfill_video_id(apps, schema_editor):
+    BlogPost = apps.get_model('myapp', 'BlogPost')
+    for blog in BlogPost.objects.only('id', 'youtube_link').iterator():
+        video_id = extract_video_id(blog.youtube_link) or ''
+        # Existing blogs were all generated with the first prompt version
+        BlogPost.objects.filter(id=blog.id).update(video_id=video_id, prompt_version='v1')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='blogpost',
+            name='prompt_version',
+            field=models.CharField(blank=True, default='', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='blogpost',
+            name='video_id',
+            field=models.CharField(blank=True, db_index=True, default='', max_length=32),
+        ),
+        migrations.RunPython(backfill_video_id, migrations.RunPython.noop),
+    ]
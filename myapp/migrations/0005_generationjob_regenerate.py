@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-18 04:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0004_generationbatch'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='generationjob',
+            name='regenerate',
+            field=models.BooleanField(default=False),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.4 on 2026-10-18 04:53
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0005_generationjob_regenerate'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='blogpost',
+            index=models.Index(fields=['user', '-created_at', '-id'], name='blogpost_user_created_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-18 04:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0006_blogpost_user_created_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='blogpost',
+            name='rendered_html',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+    ]
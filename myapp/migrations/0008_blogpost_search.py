@@ -0,0 +1,90 @@
+from django.db import migrations
+
+# SQLite: an FTS5 index over the blog table (external content), kept in sync by triggers
+SQLITE_FORWARD = [
+    """
+    CREATE VIRTUAL TABLE myapp_blogpost_fts USING fts5(
+        youtube_title, channel_name, generated_content,
+        content='myapp_blogpost', content_rowid='id', tokenize='porter unicode61'
+    )
+    """,
+    """
+    CREATE TRIGGER myapp_blogpost_fts_insert AFTER INSERT ON myapp_blogpost BEGIN
+        INSERT INTO myapp_blogpost_fts (rowid, youtube_title, channel_name, generated_content)
+        VALUES (new.id, new.youtube_title, new.channel_name, new.generated_content);
+    END
+    """,
+    """
+    CREATE TRIGGER myapp_blogpost_fts_delete AFTER DELETE ON myapp_blogpost BEGIN
+        INSERT INTO myapp_blogpost_fts (myapp_blogpost_fts, rowid, youtube_title, channel_name, generated_content)
+        VALUES ('delete', old.id, old.youtube_title, old.channel_name, old.generated_content);
+    END
+    """,
+    """
+    CREATE TRIGGER myapp_blogpost_fts_update
+    AFTER UPDATE OF youtube_title, channel_name, generated_content ON myapp_blogpost BEGIN
+        INSERT INTO myapp_blogpost_fts (myapp_blogpost_fts, rowid, youtube_title, channel_name, generated_content)
+        VALUES ('delete', old.id, old.youtube_title, old.channel_name, old.generated_content);
+        INSERT INTO myapp_blogpost_fts (rowid, youtube_title, channel_name, generated_content)
+        VALUES (new.id, new.youtube_title, new.channel_name, new.generated_content);
+    END
+    """,
+    "INSERT INTO myapp_blogpost_fts (myapp_blogpost_fts) VALUES ('rebuild')",
+]
+
+SQLITE_BACKWARD = [
+    "DROP TRIGGER IF EXISTS myapp_blogpost_fts_update",
+    "DROP TRIGGER IF EXISTS myapp_blogpost_fts_delete",
+    "DROP TRIGGER IF EXISTS myapp_blogpost_fts_insert",
+    "DROP TABLE IF EXISTS myapp_blogpost_fts",
+]
+
+# PostgreSQL: a weighted tsvector column the database keeps up to date, with a GIN index
+POSTGRES_FORWARD = [
+    """
+    ALTER TABLE myapp_blogpost ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(youtube_title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(channel_name, '')), 'B') ||
+        setweight(to_tsvector('english', coalesce(generated_content, '')), 'C')
+    ) STORED
+    """,
+    "CREATE INDEX myapp_blogpost_search_idx ON myapp_blogpost USING GIN (search_vector)",
+]
+
+POSTGRES_BACKWARD = [
+    "DROP INDEX IF EXISTS myapp_blogpost_search_idx",
+    "ALTER TABLE myapp_blogpost DROP COLUMN IF EXISTS search_vector",
+]
+
+
+def run_statements(schema_editor, statements):
+    for statement in statements:
+        schema_editor.execute(statement)
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        run_statements(schema_editor, SQLITE_FORWARD)
+    elif vendor == 'postgresql':
+        run_statements(schema_editor, POSTGRES_FORWARD)
+    # Other databases fall back to unindexed substring search (see myapp.search)
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        run_statements(schema_editor, SQLITE_BACKWARD)
+    elif vendor == 'postgresql':
+        run_statements(schema_editor, POSTGRES_BACKWARD)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0007_blogpost_rendered_html'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.4 on 2026-10-18 04:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0008_blogpost_search'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='blogpost',
+            name='content_compressed',
+            field=models.BinaryField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='Transcript',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('video_id', models.CharField(max_length=32)),
+                ('source', models.CharField(choices=[('captions', 'YouTube captions'), ('assemblyai', 'AssemblyAI')], max_length=20)),
+                ('text_compressed', models.BinaryField()),
+                ('segments_compressed', models.BinaryField(blank=True, null=True)),
+                ('confidence', models.FloatField(blank=True, null=True)),
+                ('details', models.JSONField(blank=True, default=dict)),
+                ('char_count', models.IntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('video_id', 'source'), name='transcript_video_source_unique')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-18 06:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0009_transcript_blogpost_content_compressed'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='generationbatch',
+            name='items_dropped',
+            field=models.IntegerField(default=0),
+        ),
+    ]
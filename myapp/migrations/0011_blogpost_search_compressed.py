@@ -0,0 +1,71 @@
+from importlib import import_module
+
+from django.db import migrations
+
+search_0008 = import_module('myapp.migrations.0008_blogpost_search')
+
+# The article whether it is stored plain or compressed (myapp_decompress is added to every
+# SQLite connection by the app, see myapp.models.register_sqlite_functions)
+ARTICLE = "coalesce(nullif({row}.generated_content, ''), myapp_decompress({row}.content_compressed))"
+
+# SQLite: the FTS5 index now reads its content from a view that decompresses articles, and the
+# triggers index the decompressed text, so compressed blogs stay searchable and get snippets
+SQLITE_FORWARD = [
+    f"""
+    CREATE VIEW myapp_blogpost_text AS
+    SELECT id, youtube_title, channel_name, {ARTICLE.format(row='myapp_blogpost')} AS generated_content
+    FROM myapp_blogpost
+    """,
+    """
+    CREATE VIRTUAL TABLE myapp_blogpost_fts USING fts5(
+        youtube_title, channel_name, generated_content,
+        content='myapp_blogpost_text', content_rowid='id', tokenize='porter unicode61'
+    )
+    """,
+    f"""
+    CREATE TRIGGER myapp_blogpost_fts_insert AFTER INSERT ON myapp_blogpost BEGIN
+        INSERT INTO myapp_blogpost_fts (rowid, youtube_title, channel_name, generated_content)
+        VALUES (new.id, new.youtube_title, new.channel_name, {ARTICLE.format(row='new')});
+    END
+    """,
+    f"""
+    CREATE TRIGGER myapp_blogpost_fts_delete AFTER DELETE ON myapp_blogpost BEGIN
+        INSERT INTO myapp_blogpost_fts (myapp_blogpost_fts, rowid, youtube_title, channel_name, generated_content)
+        VALUES ('delete', old.id, old.youtube_title, old.channel_name, {ARTICLE.format(row='old')});
+    END
+    """,
+    f"""
+    CREATE TRIGGER myapp_blogpost_fts_update
+    AFTER UPDATE OF youtube_title, channel_name, generated_content, content_compressed ON myapp_blogpost BEGIN
+        INSERT INTO myapp_blogpost_fts (myapp_blogpost_fts, rowid, youtube_title, channel_name, generated_content)
+        VALUES ('delete', old.id, old.youtube_title, old.channel_name, {ARTICLE.format(row='old')});
+        INSERT INTO myapp_blogpost_fts (rowid, youtube_title, channel_name, generated_content)
+        VALUES (new.id, new.youtube_title, new.channel_name, {ARTICLE.format(row='new')});
+    END
+    """,
+    "INSERT INTO myapp_blogpost_fts (myapp_blogpost_fts) VALUES ('rebuild')",
+]
+
+SQLITE_BACKWARD = search_0008.SQLITE_BACKWARD + ["DROP VIEW IF EXISTS myapp_blogpost_text"]
+
+
+def index_compressed_articles(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        search_0008.run_statements(schema_editor, search_0008.SQLITE_BACKWARD + SQLITE_FORWARD)
+    # PostgreSQL doesn't store articles compressed (see BlogPost.compress_content)
+
+
+def index_plain_articles(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        search_0008.run_statements(schema_editor, SQLITE_BACKWARD + search_0008.SQLITE_FORWARD)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0010_generationbatch_items_dropped'),
+    ]
+
+    operations = [
+        migrations.RunPython(index_compressed_articles, index_plain_articles),
+    ]
@@ -1,11 +1,49 @@
-from django.db import models
+import json
+import uuid
+
+from django.conf import settings
+from django.db import connection, models
+from django.db.models import F, Func, Value
+from django.db.models.functions import Coalesce, NullIf
 from django.contrib.auth.models import User
 
+from .utils import compress_text, decompress_text, render_blog_html
+
+# SQL function added to every SQLite connection (see MyappConfig.ready), so the search index
+# and list excerpts can read articles stored compressed
+SQLITE_DECOMPRESS = 'myapp_decompress'
+
+def register_sqlite_functions(sender, connection, **kwargs):
+    """connection_created handler adding myapp_decompress() to SQLite connections"""
+    if connection.vendor == 'sqlite':
+        connection.connection.create_function(
+            SQLITE_DECOMPRESS, 1, lambda data: decompress_text(data) if data is not None else None,
+            deterministic=True,
+        )
+
+def article_text():
+    """A blog's article as an SQL expression, whether it is stored plain or compressed"""
+    if connection.vendor != 'sqlite':
+        return F('generated_content')
+    return Coalesce(
+        NullIf('generated_content', Value('')),
+        Func('content_compressed', function=SQLITE_DECOMPRESS),
+        output_field=models.TextField(),
+    )
+
 class BlogPost(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     youtube_title = models.CharField(max_length=300)
     youtube_link = models.URLField()
+    video_id = models.CharField(max_length=32, blank=True, default='', db_index=True)
+    prompt_version = models.CharField(max_length=20, blank=True, default='')
     generated_content = models.TextField()
+    # generated_content rendered to HTML on save, so pages don't parse markdown on every view
+    rendered_html = models.TextField(blank=True, default='', editable=False)
+    # With COMPRESS_BLOG_CONTENT on SQLite the article is stored here and the generated_content column
+    # is left empty; instances still expose the text as generated_content (see from_db and save), and
+    # queries read it with article_text()
+    content_compressed = models.BinaryField(null=True, blank=True, editable=False)
     
     
     # Enhanced fields (add these if they don't exist)
@@ -21,6 +59,199 @@ class BlogPost(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Blog list pages: one user's blogs, newest first (keyset on created_at, id)
+            models.Index(fields=['user', '-created_at', '-id'], name='blogpost_user_created_idx'),
+        ]
     
     def __str__(self):
-        return f"{self.youtube_title} - {self.user.username}"
\ No newline at end of file
+        return f"{self.youtube_title} - {self.user.username}"
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Deferred fields are missing from __dict__, only decompress what was loaded
+        if instance.__dict__.get('content_compressed') is not None:
+            instance.generated_content = decompress_text(instance.content_compressed)
+        return instance
+
+    def render_html(self):
+        """Refresh rendered_html from generated_content (bulk_create skips save(), call it first)"""
+        self.rendered_html = render_blog_html(self.generated_content)
+
+    def compress_content(self):
+        """Move generated_content into content_compressed if COMPRESS_BLOG_CONTENT is on (call before bulk_create).
+
+        Only on SQLite: PostgreSQL already compresses long text itself (TOAST),
+        and its search column is generated from the plain text.
+        """
+        compress = getattr(settings, 'COMPRESS_BLOG_CONTENT', False) and connection.vendor == 'sqlite'
+        if compress and self.generated_content:
+            self.content_compressed = compress_text(self.generated_content)
+            self.generated_content = ''
+        elif self.generated_content:
+            self.content_compressed = None
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or 'generated_content' in update_fields:
+            self.render_html()
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'rendered_html', 'content_compressed'}
+
+        content = self.generated_content
+        self.compress_content()
+        try:
+            super().save(*args, **kwargs)
+        finally:
+            self.generated_content = content
+
+class Transcript(models.Model):
+    """Transcript of a video, kept so regenerating a blog needs no download or transcription"""
+    SOURCE_CAPTIONS = 'captions'
+    SOURCE_ASSEMBLYAI = 'assemblyai'
+    SOURCE_CHOICES = [
+        (SOURCE_CAPTIONS, 'YouTube captions'),
+        (SOURCE_ASSEMBLYAI, 'AssemblyAI'),
+    ]
+
+    video_id = models.CharField(max_length=32)
+    source = models.CharField(max_length=20, choices=SOURCE_CHOICES)
+    # zlib-compressed text and JSON segments, use the text/segments accessors
+    text_compressed = models.BinaryField()
+    segments_compressed = models.BinaryField(null=True, blank=True)
+    confidence = models.FloatField(null=True, blank=True)
+    # Caption normalization stats, speakers... whatever the source reports
+    details = models.JSONField(default=dict, blank=True)
+    char_count = models.IntegerField(default=0)
+
+    # Timestamps
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['video_id', 'source'], name='transcript_video_source_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.video_id} ({self.source})"
+
+    @property
+    def text(self):
+        return decompress_text(self.text_compressed) if self.text_compressed else ''
+
+    @text.setter
+    def text(self, value):
+        self.text_compressed = compress_text(value or '')
+        self.char_count = len(value or '')
+
+    @property
+    def segments(self):
+        return json.loads(decompress_text(self.segments_compressed)) if self.segments_compressed else []
+
+    @segments.setter
+    def segments(self, value):
+        self.segments_compressed = compress_text(json.dumps(value, separators=(',', ':'))) if value else None
+
+    @classmethod
+    def lookup(cls, video_id):
+        """Stored transcript for a video, captions first like the generation pipeline"""
+        if not video_id:
+            return None
+        stored = {transcript.source: transcript for transcript in cls.objects.filter(video_id=video_id)}
+        return stored.get(cls.SOURCE_CAPTIONS) or stored.get(cls.SOURCE_ASSEMBLYAI)
+
+    @classmethod
+    async def alookup(cls, video_id):
+        """lookup() for async views"""
+        if not video_id:
+            return None
+        stored = {transcript.source: transcript async for transcript in cls.objects.filter(video_id=video_id)}
+        return stored.get(cls.SOURCE_CAPTIONS) or stored.get(cls.SOURCE_ASSEMBLYAI)
+
+    @classmethod
+    def store(cls, video_id, source, text, segments=None, confidence=None, details=None):
+        """Save (or replace) the transcript of a video from one source"""
+        transcript = cls.objects.filter(video_id=video_id, source=source).first() or cls(
+            video_id=video_id, source=source
+        )
+        transcript.text = text
+        transcript.segments = segments
+        transcript.confidence = confidence
+        transcript.details = details or {}
+        transcript.save()
+        return transcript
+
+class GenerationJob(models.Model):
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_SUCCEEDED = 'succeeded'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_SUCCEEDED, 'Succeeded'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    youtube_link = models.URLField()
+    video_id = models.CharField(max_length=32, blank=True, default='', db_index=True)
+    reuse = models.BooleanField(default=True)
+    regenerate = models.BooleanField(default=False)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_PENDING, db_index=True)
+    method = models.CharField(max_length=30, blank=True, default='')
+    error = models.TextField(blank=True, default='')
+    blog = models.ForeignKey(BlogPost, null=True, blank=True, on_delete=models.SET_NULL, related_name='generation_jobs')
+
+    # Timestamps
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.youtube_link} - {self.status}"
+
+    @property
+    def is_finished(self):
+        return self.status in (self.STATUS_SUCCEEDED, self.STATUS_FAILED)
+
+
+
+class GenerationBatch(models.Model):
+    STATUS_PENDING = GenerationJob.STATUS_PENDING
+    STATUS_RUNNING = GenerationJob.STATUS_RUNNING
+    STATUS_SUCCEEDED = GenerationJob.STATUS_SUCCEEDED
+    STATUS_FAILED = GenerationJob.STATUS_FAILED
+    STATUS_CHOICES = GenerationJob.STATUS_CHOICES
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    links = models.JSONField(default=list, blank=True)
+    playlist_url = models.URLField(blank=True, default='')
+    reuse = models.BooleanField(default=True)
+    concurrency = models.PositiveSmallIntegerField(default=4)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_PENDING, db_index=True)
+    # One entry per unique video: link, video_id, status, method, blog_id, error.
+    # Item status is a job status, or 'generated' while the blog waits for the bulk insert.
+    items = models.JSONField(default=list, blank=True)
+    duplicates_skipped = models.IntegerField(default=0)
+    # Videos past BATCH_MAX_ITEMS, from the links or the playlist, that weren't queued
+    items_dropped = models.IntegerField(default=0)
+    error = models.TextField(blank=True, default='')
+
+    # Timestamps
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"Batch {self.id} - {self.status}"
@@ -0,0 +1,75 @@
+# pagination.py
+"""Keyset (cursor) pagination on (created_at, id), newest first.
+
+A page is the rows strictly after the last row of the previous page, so the
+database seeks straight to it instead of counting or skipping rows, and
+blogs created meanwhile don't shift later pages.
+"""
+import base64
+import json
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+PAGE_SIZE = getattr(settings, 'BLOG_LIST_PAGE_SIZE', 20)
+MAX_PAGE_SIZE = getattr(settings, 'BLOG_LIST_MAX_PAGE_SIZE', 100)
+
+
+class InvalidCursor(ValueError):
+    """Raised for a cursor that was not produced by encode_cursor"""
+
+
+def encode_cursor(obj):
+    """Opaque cursor pointing just after obj"""
+    raw = json.dumps([obj.created_at.isoformat(), obj.pk]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Return (created_at, pk) from a cursor"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        created_at, pk = json.loads(raw)
+        created_at = parse_datetime(created_at)
+    except (TypeError, ValueError):
+        raise InvalidCursor('Invalid cursor')
+    if created_at is None or not isinstance(pk, int):
+        raise InvalidCursor('Invalid cursor')
+    return created_at, pk
+
+
+def get_page_size(value):
+    """Requested page size, clamped to MAX_PAGE_SIZE"""
+    try:
+        size = int(value)
+    except (TypeError, ValueError):
+        return PAGE_SIZE
+    return max(1, min(size, MAX_PAGE_SIZE))
+
+
+def page_queryset(queryset, cursor=None, size=PAGE_SIZE):
+    """Rows of the page after cursor, plus one extra row"""
+    queryset = queryset.order_by('-created_at', '-pk')
+    if cursor:
+        created_at, pk = decode_cursor(cursor)
+        queryset = queryset.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, pk__lt=pk))
+
+    # One extra row tells us whether there is a next page without a count query
+    return queryset[:size + 1]
+
+
+def split_page(items, size):
+    """Return (items, next_cursor) from the rows of page_queryset"""
+    next_cursor = encode_cursor(items[size - 1]) if len(items) > size else None
+    return items[:size], next_cursor
+
+
+def paginate(queryset, cursor=None, size=PAGE_SIZE):
+    """Return (items, next_cursor) for the page after cursor; next_cursor is None on the last page"""
+    return split_page(list(page_queryset(queryset, cursor, size)), size)
+
+
+async def apaginate(queryset, cursor=None, size=PAGE_SIZE):
+    """paginate() for async views"""
+    return split_page([item async for item in page_queryset(queryset, cursor, size)], size)
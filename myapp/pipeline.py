@@ -0,0 +1,435 @@
+# pipeline.py
+"""Blog generation pipeline: captions or transcription, then Gemini, then save"""
+import asyncio
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from . import metrics, views
+from .models import BlogPost, Transcript
+from .ratelimit import RateLimited
+from .utils import extract_video_id
+
+_executor = None
+_transcription_executor = None
+_executor_lock = threading.Lock()
+
+
+class GenerationError(Exception):
+    """Raised when no blog could be generated for a link"""
+
+
+def get_stage_executor():
+    """Thread pool for independent pipeline stages, shared by every request in this process"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'PIPELINE_STAGE_WORKERS', 16),
+                thread_name_prefix='pipeline-stage',
+            )
+        return _executor
+
+
+def get_transcription_executor():
+    """Thread pool for async generations' audio downloads and transcriptions.
+
+    They take minutes, so on the stage pool a burst of them would hold every
+    thread and leave captions and metadata lookups queued behind them.
+    """
+    global _transcription_executor
+    with _executor_lock:
+        if _transcription_executor is None:
+            _transcription_executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'PIPELINE_TRANSCRIPTION_WORKERS', 8),
+                thread_name_prefix='pipeline-transcription',
+            )
+        return _transcription_executor
+
+
+def submit_stage(func, *args):
+    """Run a stage on the stage pool, in a copy of the caller's context (for its request timings)"""
+    return get_stage_executor().submit(contextvars.copy_context().run, func, *args)
+
+
+def run_blocking(func, *args, executor=None):
+    """Awaitable running a blocking stage on the stage pool (or executor), so the event loop stays free"""
+    return sync_to_async(func, thread_sensitive=False, executor=executor or get_stage_executor())(*args)
+
+
+def stored_captions(stored):
+    """Captions result from a stored transcript, if it came from captions"""
+    if stored and stored.source == Transcript.SOURCE_CAPTIONS:
+        return {'text': stored.text, 'normalization': stored.details.get('normalization')}
+    return None
+
+
+def stored_transcript_data(stored):
+    """Transcription result from a stored transcript, if it came from AssemblyAI"""
+    if stored and stored.source == Transcript.SOURCE_ASSEMBLYAI:
+        return {
+            'text': stored.text,
+            'highlights': [],
+            'speakers': stored.details.get('speakers', {}),
+            'sentiment': [],
+            'entities': [],
+            'confidence': stored.confidence or 0.95,
+        }
+    return None
+
+
+def store_captions(video_id, captions):
+    """Keep caption text for later regenerations"""
+    try:
+        Transcript.store(
+            video_id, Transcript.SOURCE_CAPTIONS, captions['text'],
+            segments=captions.get('segments'),
+            details={'normalization': captions.get('normalization')},
+        )
+    except Exception as e:
+        print(f"Storing captions for {video_id} failed: {e}")
+
+
+def store_transcript_data(video_id, transcript_data):
+    """Keep an AssemblyAI transcription for later regenerations"""
+    try:
+        Transcript.store(
+            video_id, Transcript.SOURCE_ASSEMBLYAI, transcript_data['text'],
+            segments=transcript_data.get('segments'),
+            confidence=transcript_data.get('confidence'),
+            details={'speakers': transcript_data.get('speakers', {})},
+        )
+    except Exception as e:
+        print(f"Storing transcript for {video_id} failed: {e}")
+
+
+def generate_blog_content(yt_link, regenerate=False):
+    """Generate blog content for a link - tries fast method first, falls back to full method"""
+    # Counted here so every caller (views, jobs, batches) shows up in generations_total
+    try:
+        result = _generate_blog_content(yt_link, regenerate)
+    except Exception as e:
+        metrics.inc('generations_total', method=generation_outcome(e))
+        raise
+    metrics.inc('generations_total', method=result['method'])
+    return result
+
+
+def _generate_blog_content(yt_link, regenerate):
+    # A stored transcript makes this a pure Gemini call
+    video_id = extract_video_id(yt_link)
+    stored = Transcript.lookup(video_id)
+
+    # Captions and metadata are independent network calls, so fetch them together
+    captions_future = None if stored else submit_stage(views.get_captions, yt_link)
+    video_info_future = submit_stage(views.get_video_info_enhanced, yt_link)
+
+    # Method 1: Try fast generation with captions
+    try:
+        captions = stored_captions(stored) if stored else captions_future.result()
+        if captions and len(captions['text'].strip()) > 100:
+            if not stored:
+                store_captions(video_id, captions)
+            video_info = video_info_future.result()
+            return {
+                'method': 'fast_captions',
+                'content': views.generate_blog_instant(captions['text'], video_info, regenerate=regenerate),
+                'video_info': video_info,
+                'transcript_data': None,
+                'normalization': captions['normalization'],
+            }
+    except RateLimited:
+        # Falling back would only hit another throttled provider at a higher cost
+        raise
+    except Exception as e:
+        print(f"Fast method failed: {e}")
+
+    # Method 2: Fallback to full transcription, reusing the metadata fetched above
+    try:
+        video_info = video_info_future.result()
+        transcript_data = stored_transcript_data(stored)
+        if not transcript_data:
+            transcript_data = views.get_transcription_enhanced(yt_link)
+            if transcript_data and transcript_data.get('text'):
+                store_transcript_data(video_id, transcript_data)
+
+        if not transcript_data or not transcript_data.get('text'):
+            raise GenerationError('No audio/transcript available')
+
+        return {
+            'method': 'full_transcription',
+            'content': views.generate_blog_from_transcription_enhanced(
+                transcript_data, video_info, regenerate=regenerate
+            ),
+            'video_info': video_info,
+            'transcript_data': transcript_data,
+        }
+    except (GenerationError, RateLimited):
+        raise
+    except Exception as e:
+        raise GenerationError(f'Full transcription failed: {str(e)}')
+
+
+def build_blog_post(user, yt_link, result):
+    """Build an unsaved BlogPost from a generation result"""
+    video_info = result['video_info']
+    transcript_data = result['transcript_data'] or {}
+    blog_content = result['content']
+
+    return BlogPost(
+        user=user,
+        youtube_title=video_info.get('title', 'Unknown Title'),
+        youtube_link=yt_link,
+        video_id=extract_video_id(yt_link) or '',
+        prompt_version=views.PROMPT_VERSION,
+        generated_content=blog_content,
+        channel_name=video_info.get('channel', ''),
+        video_duration=video_info.get('duration', ''),
+        word_count=len(blog_content.split()),
+        transcript_confidence=transcript_data.get('confidence', 0.95),
+    )
+
+
+def build_metadata(result):
+    """Response metadata for a generation result"""
+    video_info = result['video_info']
+    metadata = {
+        'title': video_info.get('title'),
+        'channel': video_info.get('channel'),
+        'duration': video_info.get('duration'),
+        'word_count': len(result['content'].split())
+    }
+    if result.get('normalization'):
+        metadata['caption_normalization'] = result['normalization']
+    if result['transcript_data']:
+        metadata['speakers_detected'] = len(result['transcript_data'].get('speakers', {}))
+        metadata['transcript_confidence'] = result['transcript_data'].get('confidence', 0.95)
+    return metadata
+
+
+def reused_result(blog):
+    """Generation result for a blog that was reused instead of generated"""
+    return {
+        'method': 'reused',
+        'content': blog.generated_content,
+        'video_info': {
+            'title': blog.youtube_title,
+            'channel': blog.channel_name,
+            'duration': blog.video_duration,
+        },
+        'transcript_data': None,
+    }
+
+
+def generation_outcome(error):
+    """generations_total label for a generation that raised error"""
+    return 'rate_limited' if isinstance(error, RateLimited) else 'failed'
+
+
+def stream_generation(user, yt_link, reuse=True, regenerate=False):
+    """Yield (event, data) pairs: stage progress, then Gemini output as it arrives, then the saved blog"""
+    try:
+        for event, payload in _stream_generation(user, yt_link, reuse, regenerate):
+            if event == 'done':
+                metrics.inc('generations_total', method=payload['method'])
+            yield event, payload
+    except Exception as e:
+        metrics.inc('generations_total', method=generation_outcome(e))
+        raise
+
+
+def _stream_generation(user, yt_link, reuse, regenerate):
+    video_id = extract_video_id(yt_link)
+    if not video_id:
+        raise GenerationError('Invalid YouTube URL')
+
+    # Regenerating means the user wants a fresh article, not a reused one
+    if reuse and not regenerate:
+        reused_blog = views.get_reusable_blog(video_id, user, yt_link)
+        if reused_blog:
+            yield 'stage', {'stage': 'reused'}
+            yield 'token', {'text': reused_blog.generated_content}
+            yield 'done', {
+                'blog_id': reused_blog.id,
+                'method': 'reused',
+                'metadata': build_metadata(reused_result(reused_blog)),
+            }
+            return
+
+    stored = Transcript.lookup(video_id)
+    captions_future = None if stored else submit_stage(views.get_captions, yt_link)
+    video_info_future = submit_stage(views.get_video_info_enhanced, yt_link)
+
+    try:
+        captions = stored_captions(stored) if stored else captions_future.result()
+    except RateLimited:
+        raise
+    except Exception as e:
+        print(f"Fast method failed: {e}")
+        captions = None
+
+    normalization = None
+    if captions and len(captions['text'].strip()) > 100:
+        if stored:
+            yield 'stage', {'stage': 'stored_transcript', 'source': stored.source}
+        else:
+            store_captions(video_id, captions)
+        normalization = captions['normalization']
+        yield 'stage', {'stage': 'captions_found', 'characters': len(captions['text']), 'normalization': normalization}
+        video_info = video_info_future.result()
+        yield 'stage', {'stage': 'metadata', 'title': video_info.get('title'), 'channel': video_info.get('channel')}
+        method = 'fast_captions'
+        transcript_data = None
+        prompt = views.build_instant_prompt(captions['text'], video_info, regenerate=regenerate)
+    else:
+        transcript_data = stored_transcript_data(stored)
+        yield 'stage', {'stage': 'stored_transcript' if transcript_data else 'no_captions'}
+        video_info = video_info_future.result()
+        yield 'stage', {'stage': 'metadata', 'title': video_info.get('title'), 'channel': video_info.get('channel')}
+        if not transcript_data:
+            yield 'stage', {'stage': 'transcribing'}
+            try:
+                transcript_data = views.get_transcription_enhanced(yt_link)
+            except RateLimited:
+                raise
+            except Exception as e:
+                raise GenerationError(f'Full transcription failed: {str(e)}')
+            if not transcript_data or not transcript_data.get('text'):
+                raise GenerationError('No audio/transcript available')
+            store_transcript_data(video_id, transcript_data)
+        method = 'full_transcription'
+        prompt = views.build_enhanced_prompt(transcript_data, video_info, regenerate=regenerate)
+
+    yield 'stage', {'stage': 'generating'}
+    parts = []
+    for text in views.stream_blog_content(prompt, regenerate=regenerate):
+        parts.append(text)
+        yield 'token', {'text': text}
+
+    result = {
+        'method': method,
+        'content': ''.join(parts),
+        'video_info': video_info,
+        'transcript_data': transcript_data,
+        'normalization': normalization,
+    }
+    blog = build_blog_post(user, yt_link, result)
+    blog.save()
+    yield 'done', {'blog_id': blog.id, 'method': method, 'metadata': build_metadata(result)}
+
+
+async def astream_generation(user, yt_link, reuse=True, regenerate=False):
+    """stream_generation for async views: Gemini and the database are awaited, other stages run on the stage pool"""
+    try:
+        async for event, payload in _astream_generation(user, yt_link, reuse, regenerate):
+            if event == 'done':
+                metrics.inc('generations_total', method=payload['method'])
+            yield event, payload
+    except Exception as e:
+        metrics.inc('generations_total', method=generation_outcome(e))
+        raise
+
+
+async def _astream_generation(user, yt_link, reuse, regenerate):
+    video_id = extract_video_id(yt_link)
+    if not video_id:
+        raise GenerationError('Invalid YouTube URL')
+
+    if reuse and not regenerate:
+        reused_blog = await views.aget_reusable_blog(video_id, user, yt_link)
+        if reused_blog:
+            yield 'stage', {'stage': 'reused'}
+            yield 'token', {'text': reused_blog.generated_content}
+            yield 'done', {
+                'blog_id': reused_blog.id,
+                'method': 'reused',
+                'metadata': build_metadata(reused_result(reused_blog)),
+            }
+            return
+
+    stored = await Transcript.alookup(video_id)
+    captions_task = None if stored else asyncio.ensure_future(run_blocking(views.get_captions, yt_link))
+    video_info_task = asyncio.ensure_future(run_blocking(views.get_video_info_enhanced, yt_link))
+
+    try:
+        captions = stored_captions(stored) if stored else await captions_task
+    except RateLimited:
+        raise
+    except Exception as e:
+        print(f"Fast method failed: {e}")
+        captions = None
+
+    normalization = None
+    if captions and len(captions['text'].strip()) > 100:
+        if stored:
+            yield 'stage', {'stage': 'stored_transcript', 'source': stored.source}
+        else:
+            await sync_to_async(store_captions)(video_id, captions)
+        normalization = captions['normalization']
+        yield 'stage', {'stage': 'captions_found', 'characters': len(captions['text']), 'normalization': normalization}
+        video_info = await video_info_task
+        yield 'stage', {'stage': 'metadata', 'title': video_info.get('title'), 'channel': video_info.get('channel')}
+        method = 'fast_captions'
+        transcript_data = None
+        prepared = await views.prepare_transcript_for_prompt_async(captions['text'], video_info, regenerate)
+        prompt = views.build_instant_prompt(captions['text'], video_info, prepared=prepared)
+    else:
+        transcript_data = stored_transcript_data(stored)
+        yield 'stage', {'stage': 'stored_transcript' if transcript_data else 'no_captions'}
+        video_info = await video_info_task
+        yield 'stage', {'stage': 'metadata', 'title': video_info.get('title'), 'channel': video_info.get('channel')}
+        if not transcript_data:
+            yield 'stage', {'stage': 'transcribing'}
+            try:
+                transcript_data = await run_blocking(
+                    views.get_transcription_enhanced, yt_link, executor=get_transcription_executor()
+                )
+            except RateLimited:
+                raise
+            except Exception as e:
+                raise GenerationError(f'Full transcription failed: {str(e)}')
+            if not transcript_data or not transcript_data.get('text'):
+                raise GenerationError('No audio/transcript available')
+            await sync_to_async(store_transcript_data)(video_id, transcript_data)
+        method = 'full_transcription'
+        prepared = await views.prepare_transcript_for_prompt_async(transcript_data['text'], video_info, regenerate)
+        prompt = views.build_enhanced_prompt(transcript_data, video_info, prepared=prepared)
+
+    yield 'stage', {'stage': 'generating'}
+    parts = []
+    async for text in views.stream_blog_content_async(prompt, regenerate=regenerate):
+        parts.append(text)
+        yield 'token', {'text': text}
+
+    result = {
+        'method': method,
+        'content': ''.join(parts),
+        'video_info': video_info,
+        'transcript_data': transcript_data,
+        'normalization': normalization,
+    }
+    blog = build_blog_post(user, yt_link, result)
+    await blog.asave()
+    yield 'done', {'blog_id': blog.id, 'method': method, 'metadata': build_metadata(result)}
+
+
+def run_generation(user, yt_link, reuse=True, regenerate=False):
+    """Reuse or generate a blog for the user and return (blog, result)"""
+    video_id = extract_video_id(yt_link)
+    if not video_id:
+        raise GenerationError('Invalid YouTube URL')
+
+    # Regenerating means the user wants a fresh article, not a reused one
+    if reuse and not regenerate:
+        reused_blog = views.get_reusable_blog(video_id, user, yt_link)
+        if reused_blog:
+            metrics.inc('generations_total', method='reused')
+            return reused_blog, reused_result(reused_blog)
+
+    result = generate_blog_content(yt_link, regenerate=regenerate)
+    blog = build_blog_post(user, yt_link, result)
+    blog.save()
+    return blog, result
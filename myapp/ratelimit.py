@@ -0,0 +1,269 @@
+# ratelimit.py
+"""Per-provider rate limiting and retry/backoff for outbound API calls.
+
+Every provider (YouTube, AssemblyAI, Gemini) has a token bucket whose state
+lives in a small JSON file under CACHE_DIR. The file is locked with flock,
+so all gunicorn workers on the host draw from the same bucket. A throttled
+response pauses the whole bucket until its Retry-After has passed.
+"""
+import asyncio
+import json
+import random
+import threading
+import time
+from contextlib import contextmanager
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+
+from django.conf import settings
+
+from . import metrics
+
+try:
+    import fcntl
+except ImportError:  # Windows: buckets are only shared between threads
+    fcntl = None
+
+DEFAULT_LIMIT = {'rate': 1.0, 'burst': 5}
+THROTTLED_STATUS_CODES = (429, 503)
+# Exceptions the SDKs raise for throttling without an HTTP status attached
+THROTTLED_EXCEPTION_NAMES = ('TooManyRequests', 'ResourceExhausted')
+# YouTube IP bans: retrying and pausing the shared bucket won't lift them, callers fall back instead
+BLOCKED_EXCEPTION_NAMES = ('RequestBlocked', 'IpBlocked')
+
+MAX_RETRIES = getattr(settings, 'RATE_LIMIT_MAX_RETRIES', 4)
+BACKOFF_BASE = getattr(settings, 'RATE_LIMIT_BACKOFF_BASE', 1.0)
+BACKOFF_MAX = getattr(settings, 'RATE_LIMIT_BACKOFF_MAX', 60.0)
+MAX_WAIT = getattr(settings, 'RATE_LIMIT_MAX_WAIT', 120.0)
+
+_buckets = {}
+_buckets_lock = threading.Lock()
+
+
+class RateLimited(Exception):
+    """Raised when a provider is still throttling us after every retry"""
+
+    def __init__(self, provider, retry_after=None):
+        self.provider = provider
+        self.retry_after = retry_after
+        message = f"{provider} rate limit exceeded"
+        if retry_after:
+            message += f", retry in {retry_after:.1f}s"
+        super().__init__(message)
+
+
+class TokenBucket:
+    """Token bucket whose state is shared through a locked file"""
+
+    def __init__(self, provider, rate, burst):
+        self.provider = provider
+        self.rate = rate
+        self.burst = burst
+        self.path = Path(settings.CACHE_DIR) / 'ratelimit' / f'{provider}.json'
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.throttled = 0
+        self.waited = 0.0
+
+    @contextmanager
+    def _state(self):
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, 'a+') as f:
+                if fcntl:
+                    fcntl.flock(f, fcntl.LOCK_EX)
+                try:
+                    f.seek(0)
+                    try:
+                        state = json.loads(f.read() or '{}')
+                    except ValueError:
+                        state = {}
+                    yield state
+                    f.seek(0)
+                    f.truncate()
+                    f.write(json.dumps(state))
+                    f.flush()
+                finally:
+                    if fcntl:
+                        fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _take(self):
+        """Take a token and return 0, or return how long to wait for one"""
+        now = time.time()
+        with self._state() as state:
+            elapsed = max(0.0, now - state.get('updated', now))
+            tokens = min(self.burst, state.get('tokens', self.burst) + elapsed * self.rate)
+            state['updated'] = now
+            state['tokens'] = tokens
+
+            blocked_until = state.get('blocked_until', 0)
+            if blocked_until > now:
+                return blocked_until - now
+            if tokens >= 1:
+                state['tokens'] = tokens - 1
+                return 0.0
+            return (1 - tokens) / self.rate
+
+    def acquire(self):
+        """Block until a token is available and return the seconds waited"""
+        start = time.monotonic()
+        while True:
+            wait = self._take()
+            if wait <= 0:
+                break
+            if time.monotonic() - start + wait > MAX_WAIT:
+                raise RateLimited(self.provider, wait)
+            time.sleep(wait)
+
+        waited = time.monotonic() - start
+        with self._lock:
+            self.calls += 1
+            self.waited += waited
+        return waited
+
+    async def acquire_async(self):
+        """acquire() for event loops: waits with asyncio.sleep instead of blocking the thread"""
+        start = time.monotonic()
+        while True:
+            # The bucket file is read and flock'ed, which blocks; keep that off the event loop
+            wait = await asyncio.to_thread(self._take)
+            if wait <= 0:
+                break
+            if time.monotonic() - start + wait > MAX_WAIT:
+                raise RateLimited(self.provider, wait)
+            await asyncio.sleep(wait)
+
+        waited = time.monotonic() - start
+        with self._lock:
+            self.calls += 1
+            self.waited += waited
+        return waited
+
+    def pause(self, seconds):
+        """Hold back every worker's calls to this provider for a while"""
+        with self._state() as state:
+            state['blocked_until'] = max(state.get('blocked_until', 0), time.time() + seconds)
+        with self._lock:
+            self.throttled += 1
+        metrics.inc('ratelimit_throttled_total', provider=self.provider)
+
+    def stats(self):
+        """Call, throttle and wait counters for this process"""
+        with self._lock:
+            return {
+                'provider': self.provider,
+                'rate': self.rate,
+                'burst': self.burst,
+                'calls': self.calls,
+                'throttled': self.throttled,
+                'total_wait': round(self.waited, 3),
+                'average_wait': round(self.waited / self.calls, 3) if self.calls else 0.0,
+            }
+
+
+def get_bucket(provider):
+    """Token bucket for a provider, configured by PROVIDER_RATE_LIMITS"""
+    with _buckets_lock:
+        bucket = _buckets.get(provider)
+        if bucket is None:
+            limit = {**DEFAULT_LIMIT, **getattr(settings, 'PROVIDER_RATE_LIMITS', {}).get(provider, {})}
+            bucket = TokenBucket(provider, float(limit['rate']), int(limit['burst']))
+            _buckets[provider] = bucket
+        return bucket
+
+
+def rate_limit_stats():
+    """Counters of every provider used in this process"""
+    with _buckets_lock:
+        buckets = list(_buckets.values())
+    return [bucket.stats() for bucket in buckets]
+
+
+def is_throttled(exc):
+    """Whether an exception means the provider asked us to slow down"""
+    if isinstance(exc, RateLimited) or type(exc).__name__ in BLOCKED_EXCEPTION_NAMES:
+        return False
+    response = getattr(exc, 'response', None)
+    status_code = getattr(response, 'status_code', None) or getattr(exc, 'code', None)
+    if status_code in THROTTLED_STATUS_CODES:
+        return True
+    if type(exc).__name__ in THROTTLED_EXCEPTION_NAMES:
+        return True
+    message = str(exc)
+    return 'HTTP Error 429' in message or 'Too Many Requests' in message
+
+
+def retry_after_seconds(exc):
+    """Seconds from the Retry-After header of a throttled response, if it has one"""
+    headers = getattr(getattr(exc, 'response', None), 'headers', None)
+    value = headers.get('Retry-After') if hasattr(headers, 'get') else None
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(attempt):
+    """Full-jitter exponential backoff"""
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+
+
+def call(provider, func, retries=None):
+    """Run func() within the provider's rate limit, retrying throttled calls"""
+    bucket = get_bucket(provider)
+    retries = MAX_RETRIES if retries is None else retries
+    waited = 0.0
+
+    for attempt in range(retries + 1):
+        waited += bucket.acquire()
+        try:
+            result = func()
+        except Exception as e:
+            if not is_throttled(e):
+                raise
+            retry_after = retry_after_seconds(e)
+            # Jitter on top of Retry-After so workers don't all retry at the same instant
+            delay = retry_after + random.uniform(0, BACKOFF_BASE) if retry_after is not None else backoff_delay(attempt)
+            bucket.pause(delay)
+            if attempt == retries:
+                raise RateLimited(provider, delay) from e
+            print(f"{provider} throttled the call (attempt {attempt + 1}), retrying in {delay:.1f}s")
+            continue
+
+        if waited >= 0.01:
+            print(f"{provider} call waited {waited:.2f}s for its rate limit")
+            metrics.inc('ratelimit_wait_seconds_total', waited, provider=provider)
+        return result
+
+
+async def acall(provider, func, retries=None):
+    """call() for coroutines: func() returns an awaitable, and waits don't block the event loop"""
+    bucket = get_bucket(provider)
+    retries = MAX_RETRIES if retries is None else retries
+    waited = 0.0
+
+    for attempt in range(retries + 1):
+        waited += await bucket.acquire_async()
+        try:
+            result = await func()
+        except Exception as e:
+            if not is_throttled(e):
+                raise
+            retry_after = retry_after_seconds(e)
+            delay = retry_after + random.uniform(0, BACKOFF_BASE) if retry_after is not None else backoff_delay(attempt)
+            await asyncio.to_thread(bucket.pause, delay)
+            if attempt == retries:
+                raise RateLimited(provider, delay) from e
+            print(f"{provider} throttled the call (attempt {attempt + 1}), retrying in {delay:.1f}s")
+            continue
+
+        if waited >= 0.01:
+            print(f"{provider} call waited {waited:.2f}s for its rate limit")
+            metrics.inc('ratelimit_wait_seconds_total', waited, provider=provider)
+        return result
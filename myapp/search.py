@@ -0,0 +1,125 @@
+# search.py
+"""Full-text search over a user's blogs.
+
+Uses the index created by migrations 0008 and 0011: FTS5 on SQLite (over
+article_text(), so compressed articles are indexed too), a weighted
+tsvector column with a GIN index on PostgreSQL. Other databases fall back
+to a substring scan. Results are ranked by relevance, title matches first.
+"""
+import html
+import re
+
+from django.db import connection
+from django.db.models import Q
+
+from .models import BlogPost, article_text
+from .utils import make_excerpt
+
+# Private-use markers around matches, swapped for <mark> after escaping the snippet
+MATCH_START = '\ue000'
+MATCH_END = '\ue001'
+SNIPPET_WORDS = 24
+WORD_PATTERN = re.compile(r'\w+', re.UNICODE)
+
+SQLITE_SEARCH = f"""
+    SELECT b.id, b.youtube_title, b.channel_name, b.video_id, b.created_at,
+           snippet(myapp_blogpost_fts, 2, '{MATCH_START}', '{MATCH_END}', '…', {SNIPPET_WORDS}) AS snippet,
+           bm25(myapp_blogpost_fts, 10.0, 5.0, 1.0) AS rank
+    FROM myapp_blogpost_fts
+    JOIN myapp_blogpost b ON b.id = myapp_blogpost_fts.rowid
+    WHERE myapp_blogpost_fts MATCH %s AND b.user_id = %s
+    ORDER BY rank
+    LIMIT %s OFFSET %s
+"""
+
+# The headline is only built for the rows of the requested page
+POSTGRES_SEARCH = f"""
+    SELECT b.id, b.youtube_title, b.channel_name, b.video_id, b.created_at,
+           ts_headline('english', b.generated_content, q.query,
+                       'StartSel={MATCH_START}, StopSel={MATCH_END}, MaxWords={SNIPPET_WORDS}, MinWords=10') AS snippet,
+           page.rank
+    FROM (
+        SELECT b.id, ts_rank_cd(b.search_vector, q.query) AS rank
+        FROM myapp_blogpost b, websearch_to_tsquery('english', %s) AS q(query)
+        WHERE b.user_id = %s AND b.search_vector @@ q.query
+        ORDER BY rank DESC, b.id DESC
+        LIMIT %s OFFSET %s
+    ) AS page
+    JOIN myapp_blogpost b ON b.id = page.id,
+    websearch_to_tsquery('english', %s) AS q(query)
+    ORDER BY page.rank DESC, b.id DESC
+"""
+
+RESULT_COLUMNS = ['id', 'youtube_title', 'channel_name', 'video_id', 'created_at', 'snippet', 'rank']
+
+
+def fts5_query(text):
+    """FTS5 query matching every word of the user's text, the last one as a prefix"""
+    words = WORD_PATTERN.findall(text)
+    if not words:
+        return ''
+    terms = [f'"{word}"' for word in words]
+    # Prefix match on the last word so results follow the user as they type
+    terms[-1] += '*'
+    return ' '.join(terms)
+
+
+def format_snippet(snippet):
+    """Escape a snippet and turn the match markers into <mark> tags"""
+    snippet = html.escape(snippet or '')
+    return snippet.replace(MATCH_START, '<mark>').replace(MATCH_END, '</mark>')
+
+
+def search_blogs(user, text, page=1, size=20):
+    """Return (results, has_next) for one page of the user's blogs matching text, best match first"""
+    offset = (page - 1) * size
+    vendor = connection.vendor
+
+    if vendor == 'sqlite':
+        query = fts5_query(text)
+        if not query:
+            return [], False
+        with connection.cursor() as cursor:
+            cursor.execute(SQLITE_SEARCH, [query, user.id, size + 1, offset])
+            rows = [dict(zip(RESULT_COLUMNS, row)) for row in cursor.fetchall()]
+        for row in rows:
+            # bm25 is lower for better matches, report it like ts_rank_cd (higher is better)
+            row['rank'] = -row['rank']
+    elif vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute(POSTGRES_SEARCH, [text, user.id, size + 1, offset, text])
+            rows = [dict(zip(RESULT_COLUMNS, row)) for row in cursor.fetchall()]
+    else:
+        rows = _substring_search(user, text, size + 1, offset)
+
+    for row in rows:
+        row['snippet'] = format_snippet(row['snippet'])
+        row['rank'] = round(row['rank'], 4) if row['rank'] is not None else None
+    return rows[:size], len(rows) > size
+
+
+def _substring_search(user, text, limit, offset):
+    """Unindexed fallback for databases without a search index"""
+    words = WORD_PATTERN.findall(text)
+    if not words:
+        return []
+    condition = Q()
+    for word in words:
+        condition &= (
+            Q(youtube_title__icontains=word)
+            | Q(channel_name__icontains=word)
+            | Q(article__icontains=word)
+        )
+    blogs = BlogPost.objects.alias(article=article_text()).filter(condition, user=user).order_by('-created_at', '-id')
+    return [
+        {
+            'id': blog.id,
+            'youtube_title': blog.youtube_title,
+            'channel_name': blog.channel_name,
+            'video_id': blog.video_id,
+            'created_at': blog.created_at,
+            'snippet': make_excerpt(blog.generated_content),
+            'rank': None,
+        }
+        for blog in blogs[offset:offset + limit]
+    ]
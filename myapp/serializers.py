@@ -1,13 +1,37 @@
 from rest_framework import serializers
-from .models import BlogPost
+from django.conf import settings
+from .models import BlogPost, GenerationBatch, GenerationJob
+from .utils import make_excerpt
 from django.contrib.auth.models import User
 
 class BlogPostSerializer(serializers.ModelSerializer):
     class Meta:
         model = BlogPost
-        fields = '__all__'
+        # The compressed bytes are storage only, generated_content already carries the article
+        exclude = ['content_compressed']
         read_only_fields = ['user', 'created_at']
 
+class BlogPostListSerializer(serializers.ModelSerializer):
+    """Blog without the full article, for list endpoints (expects blog_summaries querysets)"""
+    excerpt = serializers.SerializerMethodField()
+
+    class Meta:
+        model = BlogPost
+        fields = ['id', 'youtube_title', 'youtube_link', 'video_id', 'channel_name', 'video_duration',
+                  'word_count', 'excerpt', 'created_at', 'updated_at']
+
+    def get_excerpt(self, obj):
+        return make_excerpt(obj.excerpt_source)
+
+class BlogSearchResultSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    youtube_title = serializers.CharField()
+    channel_name = serializers.CharField()
+    video_id = serializers.CharField()
+    created_at = serializers.DateTimeField()
+    snippet = serializers.CharField()
+    rank = serializers.FloatField(allow_null=True)
+
 class UserSerializer(serializers.ModelSerializer):
     class Meta:
         model = User
@@ -15,9 +39,55 @@ class UserSerializer(serializers.ModelSerializer):
         
 class BlogGenerationRequestSerializer(serializers.Serializer):
     link = serializers.URLField()
+    reuse = serializers.BooleanField(default=True, required=False)
+    regenerate = serializers.BooleanField(default=False, required=False)
     
 class BlogGenerationResponseSerializer(serializers.Serializer):
     success = serializers.BooleanField()
     content = serializers.CharField()
     method = serializers.CharField()
-    metadata = serializers.DictField()
\ No newline at end of file
+    metadata = serializers.DictField()
+
+class GenerationJobSerializer(serializers.ModelSerializer):
+    job_id = serializers.UUIDField(source='id', read_only=True)
+    blog_id = serializers.IntegerField(source='blog.id', read_only=True, default=None)
+
+    class Meta:
+        model = GenerationJob
+        fields = ['job_id', 'youtube_link', 'video_id', 'status', 'method', 'error',
+                  'blog_id', 'created_at', 'started_at', 'finished_at']
+
+
+class BatchGenerationRequestSerializer(serializers.Serializer):
+    links = serializers.ListField(child=serializers.URLField(), required=False, default=list,
+                                  max_length=getattr(settings, 'BATCH_MAX_ITEMS', 200))
+    playlist = serializers.URLField(required=False, allow_blank=True, default='')
+    reuse = serializers.BooleanField(default=True, required=False)
+    concurrency = serializers.IntegerField(min_value=1, max_value=getattr(settings, 'BATCH_MAX_CONCURRENCY', 8),
+                                           required=False, default=4)
+
+    def validate(self, data):
+        if not data['links'] and not data['playlist']:
+            raise serializers.ValidationError('Provide a list of links or a playlist URL')
+        return data
+
+
+class GenerationBatchSerializer(serializers.ModelSerializer):
+    batch_id = serializers.UUIDField(source='id', read_only=True)
+    total = serializers.SerializerMethodField()
+    completed = serializers.SerializerMethodField()
+    failed = serializers.SerializerMethodField()
+
+    class Meta:
+        model = GenerationBatch
+        fields = ['batch_id', 'status', 'playlist_url', 'concurrency', 'total', 'completed', 'failed',
+                  'duplicates_skipped', 'items_dropped', 'error', 'items', 'created_at', 'started_at', 'finished_at']
+
+    def get_total(self, obj):
+        return len(obj.items)
+
+    def get_completed(self, obj):
+        return sum(1 for item in obj.items if item['status'] == GenerationJob.STATUS_SUCCEEDED)
+
+    def get_failed(self, obj):
+        return sum(1 for item in obj.items if item['status'] == GenerationJob.STATUS_FAILED)
@@ -1,3 +1,1019 @@
-from django.test import TestCase
+import asyncio
+import importlib
+import io
+import json
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from datetime import timedelta
+from pathlib import Path
+from types import SimpleNamespace
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.apps import apps
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from youtube_transcript_api import IpBlocked, NoTranscriptFound, RequestBlocked
+
+from . import audio, fakes, jobs, ratelimit, search, views
+from .captions import normalize_captions
+from .circuit import caption_breaker
+from .models import BlogPost, GenerationBatch, GenerationJob
+from .pagination import encode_cursor, page_queryset
+from .pipeline import GenerationError
+from .search import search_blogs
+from .utils import extract_video_id, parse_flag, render_blog_html
+
+
+def cue(text, start=0.0, duration=2.0):
+    return {'text': text, 'start': start, 'duration': duration}
+
+
+class NormalizeCaptionsTests(SimpleTestCase):
+    def test_keeps_meaningful_repeated_words(self):
+        text, _ = normalize_captions([cue("I know that that is true and we had had very very little time.")])
+        self.assertEqual(text, "I know that that is true and we had had very very little time.")
+
+    def test_collapses_repeated_phrases(self):
+        text, _ = normalize_captions([cue("so you know you know it works, I mean I mean really.")])
+        self.assertEqual(text, "So you know it works, I mean really.")
+
+    def test_drops_words_repeated_across_rolling_cues(self):
+        text, _ = normalize_captions([
+            cue("welcome back to the", 0.0),
+            cue("to the channel today we", 2.0),
+            cue("today we look at caching.", 4.0),
+        ])
+        self.assertEqual(text, "Welcome back to the channel today we look at caching.")
+
+    def test_strips_markup_and_fillers(self):
+        text, _ = normalize_captions([cue("[Music] &amp;gt;&amp;gt; um so it&amp;#39;s uh ready ♪")])
+        self.assertEqual(text, "So it's ready.")
+
+    def test_sentences_split_on_pauses(self):
+        text, _ = normalize_captions([cue("first point", 0.0, 1.0), cue("second point", 3.0, 1.0)])
+        self.assertEqual(text, "First point. Second point.")
+
+    def test_single_shared_word_is_not_an_overlap(self):
+        text, _ = normalize_captions([cue("we went to the", 0.0), cue("the end", 2.0)])
+        self.assertEqual(text, "We went to the the end.")
+
+    def test_stats_report_savings(self):
+        raw = "[Music] um the the plan plan is is simple"
+        text, stats = normalize_captions([cue(raw)])
+        self.assertEqual(stats['chars_before'], len(raw))
+        self.assertEqual(stats['chars_after'], len(text))
+        self.assertEqual(stats['chars_saved'] - stats['segmentation_chars'], len(raw) - len(text))
+        self.assertGreater(stats['chars_saved'], 0)
+
+    def test_segmentation_is_not_counted_against_savings(self):
+        # Clean captions only gain punctuation, which isn't negative savings
+        text, stats = normalize_captions([cue("first point", 0.0, 1.0), cue("second point", 3.0, 1.0)])
+        self.assertEqual(text, "First point. Second point.")
+        self.assertEqual(stats['chars_saved'], 0)
+        self.assertEqual(stats['tokens_saved'], 0)
+        self.assertEqual(stats['segmentation_chars'], 2)
+
+
+class RateLimitTests(SimpleTestCase):
+    provider = 'test-provider'
+
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.cache_dir, ignore_errors=True)
+        settings_override = override_settings(CACHE_DIR=Path(self.cache_dir))
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.addCleanup(ratelimit._buckets.pop, self.provider, None)
+
+    def test_throttling_errors_are_throttled(self):
+        class ResourceExhausted(Exception):
+            pass
+
+        response_error = Exception("busy")
+        response_error.response = SimpleNamespace(status_code=429, headers={})
+        self.assertTrue(ratelimit.is_throttled(ResourceExhausted()))
+        self.assertTrue(ratelimit.is_throttled(response_error))
+        self.assertFalse(ratelimit.is_throttled(ValueError("bad input")))
+
+    def test_youtube_ip_bans_are_not_throttling(self):
+        self.assertFalse(ratelimit.is_throttled(RequestBlocked('abc')))
+        self.assertFalse(ratelimit.is_throttled(IpBlocked('abc')))
+
+    def test_ip_ban_is_raised_at_once_without_pausing_the_bucket(self):
+        calls = []
+
+        def blocked():
+            calls.append(1)
+            raise IpBlocked('abc')
+
+        with self.assertRaises(IpBlocked):
+            ratelimit.call(self.provider, blocked)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(ratelimit.get_bucket(self.provider).stats()['throttled'], 0)
+
+    def test_throttled_call_is_retried(self):
+        class ResourceExhausted(Exception):
+            pass
+
+        attempts = []
+
+        def flaky():
+            attempts.append(1)
+            if len(attempts) < 2:
+                raise ResourceExhausted()
+            return 'ok'
+
+        with mock.patch.object(ratelimit, 'backoff_delay', return_value=0.0):
+            self.assertEqual(ratelimit.call(self.provider, flaky), 'ok')
+        self.assertEqual(len(attempts), 2)
+        self.assertEqual(ratelimit.get_bucket(self.provider).stats()['throttled'], 1)
+
+    def test_async_calls_touch_the_bucket_file_off_the_event_loop(self):
+        class ResourceExhausted(Exception):
+            pass
+
+        bucket = ratelimit.get_bucket(self.provider)
+        threads = []
+        attempts = []
+
+        def record(method):
+            def wrapper(*args):
+                threads.append(threading.current_thread())
+                return method(*args)
+            return wrapper
+
+        async def flaky():
+            attempts.append(1)
+            if len(attempts) < 2:
+                raise ResourceExhausted()
+            return threading.current_thread()
+
+        with mock.patch.object(bucket, '_take', record(bucket._take)), \
+                mock.patch.object(bucket, 'pause', record(bucket.pause)), \
+                mock.patch.object(ratelimit, 'backoff_delay', return_value=0.0):
+            loop_thread = asyncio.run(ratelimit.acall(self.provider, flaky))
+        # take, pause after the throttled attempt, take again
+        self.assertEqual(len(threads), 3)
+        self.assertNotIn(loop_thread, threads)
+
+
+class TranscribeFileTests(SimpleTestCase):
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.cache_dir, ignore_errors=True)
+        settings_override = override_settings(CACHE_DIR=Path(self.cache_dir))
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.addCleanup(ratelimit._buckets.pop, 'assemblyai', None)
+        backoff = mock.patch.object(ratelimit, 'backoff_delay', return_value=0.0)
+        backoff.start()
+        self.addCleanup(backoff.stop)
+
+    class TooManyRequests(Exception):
+        response = SimpleNamespace(status_code=429, headers={})
+
+    def test_throttled_submit_is_retried(self):
+        job = mock.Mock(status='completed')
+        job.wait_for_completion.return_value = job
+        transcriber = mock.Mock()
+        transcriber.submit.side_effect = [self.TooManyRequests(), job]
+        self.assertIs(views.transcribe_file(transcriber, 'audio.m4a'), job)
+        self.assertEqual(transcriber.submit.call_count, 2)
+        transcriber.transcribe.assert_not_called()
+
+    def test_polling_is_not_retried_with_a_new_upload(self):
+        job = mock.Mock()
+        job.wait_for_completion.side_effect = self.TooManyRequests()
+        transcriber = mock.Mock()
+        transcriber.submit.return_value = job
+        with self.assertRaises(self.TooManyRequests):
+            views.transcribe_file(transcriber, 'audio.m4a')
+        self.assertEqual(transcriber.submit.call_count, 1)
+        self.assertEqual(ratelimit.get_bucket('assemblyai').stats()['throttled'], 0)
+
+
+@override_settings(CACHES={
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'tests-default'},
+    'shared': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'tests-shared'},
+})
+class GetCaptionsTests(SimpleTestCase):
+    link = 'https://www.youtube.com/watch?v=captions001'
+
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.cache_dir, ignore_errors=True)
+        settings_override = override_settings(CACHE_DIR=Path(self.cache_dir))
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.addCleanup(ratelimit._buckets.pop, 'youtube', None)
+        self.addCleanup(caption_breaker.record_success)
+        views.transcript_cache.delete('normalized_captions:captions001')
+        views.no_captions_cache.delete('captions001')
+        caption_breaker.record_success()
+
+    def patch_fetch(self, fetch):
+        api = mock.patch('youtube_transcript_api.YouTubeTranscriptApi')
+        self.addCleanup(api.stop)
+        api.start().return_value.fetch.side_effect = fetch
+
+    def test_fetches_captions_with_the_instance_api(self):
+        fetched = mock.Mock()
+        fetched.to_raw_data.return_value = [cue("caching makes it fast", 0.0), cue("and cheap", 2.0)]
+        self.patch_fetch(lambda video_id, languages: fetched)
+        captions = views.get_captions(self.link)
+        self.assertEqual(captions['text'], "Caching makes it fast and cheap.")
+        self.assertEqual(len(captions['segments']), 2)
+
+    def test_ip_ban_trips_the_breaker_and_falls_back(self):
+        self.patch_fetch(IpBlocked('captions001'))
+        self.assertIsNone(views.get_captions(self.link))
+        self.assertEqual(caption_breaker.stats()['failures'], 1)
+        self.assertFalse(views.no_captions_cache.get('captions001'))
+
+    def test_missing_captions_are_cached_and_keep_the_breaker_closed(self):
+        self.patch_fetch(NoTranscriptFound('captions001', ['en'], []))
+        self.assertIsNone(views.get_captions(self.link))
+        self.assertEqual(caption_breaker.stats()['failures'], 0)
+        self.assertTrue(views.no_captions_cache.get('captions001'))
+
+
+@override_settings(CACHES={
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'tests-default'},
+    'shared': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'tests-shared'},
+})
+class LLMCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.model = mock.Mock()
+        self.model.generate_content.side_effect = lambda prompt: SimpleNamespace(text=f"reply {uuid.uuid4().hex}")
+        for patcher in (
+            mock.patch.object(views.clients, 'get_gemini_model', return_value=self.model),
+            mock.patch.object(views.ratelimit, 'call', side_effect=lambda provider, func: func()),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.prompt = f"Summarize video {uuid.uuid4().hex}"
+
+    def test_repeated_prompt_is_served_from_the_cache(self):
+        first = views.generate_content_cached(self.prompt)
+        self.assertEqual(views.generate_content_cached(self.prompt), first)
+        self.assertEqual(self.model.generate_content.call_count, 1)
+
+    def test_key_changes_with_the_prompt_model_and_template_version(self):
+        key = views.llm_cache_key(self.prompt)
+        self.assertEqual(views.llm_cache_key(self.prompt), key)
+        self.assertNotEqual(views.llm_cache_key(self.prompt + '!'), key)
+        self.assertNotEqual(views.llm_cache_key(self.prompt, 'another-model'), key)
+        with mock.patch.object(views, 'PROMPT_VERSION', 'v-next'):
+            self.assertNotEqual(views.llm_cache_key(self.prompt), key)
+
+        views.generate_content_cached(self.prompt)
+        views.generate_content_cached(self.prompt, model_name='another-model')
+        self.assertEqual(self.model.generate_content.call_count, 2)
+
+    def test_regenerate_bypasses_and_refreshes_the_cache(self):
+        first = views.generate_content_cached(self.prompt)
+        second = views.generate_content_cached(self.prompt, regenerate=True)
+        self.assertNotEqual(second, first)
+        self.assertEqual(views.generate_content_cached(self.prompt), second)
+        self.assertEqual(self.model.generate_content.call_count, 2)
+
+    def long_transcript(self):
+        return ' '.join(f"Sentence number {n} about caching." for n in range(3000))
+
+    def test_regenerate_reaches_the_chunk_summaries(self):
+        with mock.patch.object(views, 'generate_content_cached', return_value='notes') as generate:
+            views.condense_transcript(self.long_transcript(), {}, regenerate=True)
+        self.assertGreater(generate.call_count, 1)
+        self.assertTrue(all(call.kwargs['regenerate'] for call in generate.call_args_list))
+
+    async def test_regenerate_reaches_the_async_chunk_summaries(self):
+        with mock.patch.object(views, 'generate_content_cached_async', return_value='notes') as generate:
+            await views.condense_transcript_async(self.long_transcript(), {}, regenerate=True)
+        self.assertGreater(generate.call_count, 1)
+        self.assertTrue(all(call.kwargs['regenerate'] for call in generate.call_args_list))
+
+
+@override_settings(
+    CACHES={
+        'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'tests-default'},
+        'shared': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'tests-shared'},
+    },
+    PROVIDER_RATE_LIMITS={provider: {'rate': 1000, 'burst': 1000} for provider in ('youtube', 'assemblyai', 'gemini')},
+)
+class OfflineTestCase(TestCase):
+    """Generations against fakes.install(), with a private cache directory and no rate limit waits"""
+
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.cache_dir, ignore_errors=True)
+        settings_override = override_settings(CACHE_DIR=Path(self.cache_dir))
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        for provider in ('youtube', 'assemblyai', 'gemini'):
+            self.addCleanup(ratelimit._buckets.pop, provider, None)
+        self.user = User.objects.create_user('offline', password='offline-pass')
+        self.client.force_login(self.user)
+        self.async_client.force_login(self.user)
+
+    def install_fakes(self, *overrides):
+        latencies = [f"{name}=0" for name in fakes.DEFAULTS if name.endswith('_latency')]
+        providers = fakes.install(fakes.parse_config([*latencies, 'seed=1', *overrides]))
+        self.addCleanup(fakes.uninstall, providers)
+        return {'link': new_link()}
+
+
+def new_link():
+    return f"https://www.youtube.com/watch?v={uuid.uuid4().hex[:11]}"
+
+
+class OfflinePipelineTests(OfflineTestCase):
+    """The whole generation path against fakes.install(), as CI runs it"""
+
+    def generate(self, *overrides):
+        response = self.client.post('/generate_blog_smart/', self.install_fakes(*overrides), content_type='application/json')
+        self.assertEqual(response.status_code, 200, response.content)
+        return json.loads(response.content)
+
+    def test_generates_from_captions(self):
+        body = self.generate('no_captions_rate=0')
+        self.assertEqual(body['method'], 'fast_captions')
+        self.assertTrue(body['content'])
+        self.assertIn('caption_normalization', body['metadata'])
+
+    def test_falls_back_to_transcription_without_captions(self):
+        body = self.generate('no_captions_rate=1')
+        self.assertEqual(body['method'], 'full_transcription')
+        self.assertTrue(body['content'])
+
+    def test_stream_is_sent_event_by_event(self):
+        response = self.client.post(
+            '/generate_blog_stream/', self.install_fakes('no_captions_rate=0'), content_type='application/json'
+        )
+        self.assertFalse(response.is_async)
+        events = b''.join(response.streaming_content).decode()
+        self.assertIn('event: token', events)
+        self.assertTrue(events.rstrip().split('\n\n')[-1].startswith('event: done'), events[-300:])
+
+    async def test_stream_under_asgi_is_an_async_iterator(self):
+        # A sync iterator would be read whole before the first event went out
+        response = await self.async_client.post(
+            '/generate_blog_stream/', self.install_fakes('no_captions_rate=0'), content_type='application/json'
+        )
+        self.assertTrue(response.is_async)
+        events = b''.join([chunk async for chunk in response.streaming_content]).decode()
+        self.assertIn('event: token', events)
+        self.assertTrue(events.rstrip().split('\n\n')[-1].startswith('event: done'), events[-300:])
+
+    def test_chunking_reads_the_duration_when_the_raw_info_has_expired(self):
+        with mock.patch.object(audio, 'ffmpeg_available', return_value=True):
+            long_video = self.install_fakes('audio_seconds=1800')['link']
+            self.assertIsNone(views.raw_info_cache.get(views.extract_video_id(long_video)))
+            self.assertTrue(views.wants_chunked_transcription(long_video))
+            # Kept for the download that follows
+            self.assertIsNotNone(views.raw_info_cache.get(views.extract_video_id(long_video)))
+            self.assertFalse(views.wants_chunked_transcription(self.install_fakes('audio_seconds=0')['link']))
+
+    @skipUnless(audio.ffmpeg_available(), "Needs ffmpeg")
+    def test_downloaded_audio_is_measured_by_its_header(self):
+        providers = fakes.FakeProviders(fakes.parse_config(['audio_seconds=1500']))
+        self.addCleanup(providers.close)
+        self.assertTrue(views.is_long_audio(providers.audio_file()))
+        short = fakes.FakeProviders(fakes.parse_config(['audio_seconds=30']))
+        self.addCleanup(short.close)
+        self.assertFalse(views.is_long_audio(short.audio_file()))
+
+    async def test_async_transcription_runs_on_its_own_pool(self):
+        transcribe = views.get_transcription_enhanced
+        threads = []
+
+        def recording_transcribe(link):
+            threads.append(threading.current_thread().name)
+            return transcribe(link)
+
+        data = self.install_fakes('no_captions_rate=1')
+        with mock.patch.object(views, 'get_transcription_enhanced', recording_transcribe):
+            response = await self.async_client.post('/async/generate-blog/', data, content_type='application/json')
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(json.loads(response.content)['method'], 'full_transcription')
+        self.assertEqual(len(threads), 1)
+        self.assertTrue(threads[0].startswith('pipeline-transcription'), threads[0])
+
+
+class StreamTokenTests(OfflineTestCase):
+    def stream_url(self):
+        response = self.client.post(
+            '/generate_blog_stream/token/', self.install_fakes('no_captions_rate=0'), content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 200)
+        return response.json()['stream_url']
+
+    def test_get_without_a_token_is_refused(self):
+        response = self.client.get('/generate_blog_stream/', self.install_fakes('no_captions_rate=0'))
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(BlogPost.objects.exists())
+
+    def test_post_needs_the_csrf_token(self):
+        client = Client(enforce_csrf_checks=True)
+        client.force_login(self.user)
+        for path in ('/generate_blog_stream/', '/generate_blog_stream/token/', '/async/generate-blog/stream/'):
+            response = client.post(path, self.install_fakes(), content_type='application/json')
+            self.assertEqual(response.status_code, 403, path)
+        self.assertFalse(BlogPost.objects.exists())
+
+    def test_token_streams_the_generation(self):
+        response = self.client.get(self.stream_url())
+        self.assertEqual(response.status_code, 200)
+        events = b''.join(response.streaming_content).decode()
+        self.assertTrue(events.rstrip().split('\n\n')[-1].startswith('event: done'), events[-300:])
+        self.assertEqual(BlogPost.objects.filter(user=self.user).count(), 1)
+
+    def test_token_works_on_the_async_stream(self):
+        url = self.stream_url().replace('/generate_blog_stream/', '/async/generate-blog/stream/')
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+
+    def test_bad_tokens_are_refused(self):
+        url = self.stream_url()
+        other = User.objects.create_user('other', password='pw')
+        client = Client()
+        client.force_login(other)
+        self.assertEqual(client.get(url).status_code, 403)
+        self.assertEqual(self.client.get(url[:-2] + 'xx').status_code, 403)
+        with mock.patch.object(views, 'STREAM_TOKEN_MAX_AGE', -1):
+            self.assertEqual(self.client.get(url).status_code, 403)
+        self.assertFalse(BlogPost.objects.exists())
+
+
+class ParseFlagTests(SimpleTestCase):
+    def test_json_and_query_string_values(self):
+        for value in (True, 'true', 'True', '1', 1, 'yes', 'on'):
+            self.assertIs(parse_flag(value), True, value)
+        for value in (False, 'false', 'FALSE', '0', 0, 'no', 'off'):
+            self.assertIs(parse_flag(value, True), False, value)
+
+    def test_missing_or_unknown_values_use_the_default(self):
+        self.assertIs(parse_flag(None, True), True)
+        self.assertIs(parse_flag('maybe', True), True)
+        self.assertIs(parse_flag('maybe'), False)
+
+
+class BlogReuseTests(OfflineTestCase):
+    def blog(self, user, link, **fields):
+        fields.setdefault('prompt_version', views.PROMPT_VERSION)
+        return BlogPost.objects.create(
+            user=user, youtube_title='Shared video', youtube_link=link, video_id=extract_video_id(link),
+            generated_content='An article worth reusing.', **fields,
+        )
+
+    def test_own_blog_is_returned_without_a_copy(self):
+        link = new_link()
+        own = self.blog(self.user, link)
+        self.blog(User.objects.create_user('other'), link)
+        self.assertEqual(views.get_reusable_blog(extract_video_id(link), self.user, link).pk, own.pk)
+        self.assertEqual(BlogPost.objects.filter(user=self.user).count(), 1)
+
+    def test_another_users_blog_is_cloned_for_the_user(self):
+        link = new_link()
+        source = self.blog(User.objects.create_user('other'), link.replace('www.youtube.com/watch?v=', 'youtu.be/'))
+        blog = views.get_reusable_blog(source.video_id, self.user, link)
+        self.assertNotEqual(blog.pk, source.pk)
+        self.assertEqual(blog.user, self.user)
+        self.assertEqual(blog.youtube_link, link)
+        self.assertEqual(blog.generated_content, source.generated_content)
+        self.assertEqual(blog.rendered_html, source.rendered_html)
+        self.assertEqual(BlogPost.objects.filter(video_id=source.video_id).count(), 2)
+
+    def test_old_prompts_and_old_blogs_are_not_reused(self):
+        link = new_link()
+        self.blog(self.user, link, prompt_version='v0')
+        stale = self.blog(self.user, link)
+        BlogPost.objects.filter(pk=stale.pk).update(created_at=timezone.now() - timedelta(days=30))
+        self.assertIsNone(views.get_reusable_blog(extract_video_id(link), self.user, link))
+
+    def test_api_answers_200_for_a_reused_blog_and_201_for_a_new_one(self):
+        data = self.install_fakes('no_captions_rate=0')
+        self.blog(self.user, data['link'])
+        response = self.client.post('/api/generate-blog/', data, content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['method'], 'reused')
+
+        response = self.client.post('/api/generate-blog/', {'link': new_link()}, content_type='application/json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['method'], 'fast_captions')
+
+    def test_reuse_false_as_a_string_generates_a_fresh_blog(self):
+        data = self.install_fakes('no_captions_rate=0')
+        self.blog(self.user, data['link'])
+        for reuse, method in (('false', 'fast_captions'), ('true', 'reused')):
+            response = self.client.post(
+                '/generate_blog_smart/', {**data, 'reuse': reuse}, content_type='application/json'
+            )
+            self.assertEqual(response.json()['method'], method, reuse)
+
+
+def run_inline(test):
+    """Make the job worker pool run submitted work right away, in the test's thread"""
+    executor = mock.patch.object(jobs, 'get_executor', return_value=SimpleNamespace(submit=lambda func, *args: func(*args)))
+    executor.start()
+    test.addCleanup(executor.stop)
+
+
+class GenerationJobTests(OfflineTestCase):
+    def create_job(self, data):
+        with self.captureOnCommitCallbacks() as callbacks:
+            response = self.client.post('/api/jobs/', data, content_type='application/json')
+        self.assertEqual(response.status_code, 202)
+        body = response.json()
+        self.assertEqual(body['status'], GenerationJob.STATUS_PENDING)
+        # Submitted to the pool only once the job row is committed
+        self.assertEqual(len(callbacks), 1)
+        return body, callbacks[0]
+
+    def test_job_runs_after_commit_and_serves_its_result(self):
+        body, submit = self.create_job(self.install_fakes('no_captions_rate=0'))
+        self.assertEqual(self.client.get(body['result_url']).status_code, 202)
+
+        run_inline(self)
+        submit()
+
+        status = self.client.get(body['status_url']).json()
+        self.assertEqual(status['status'], GenerationJob.STATUS_SUCCEEDED)
+        self.assertEqual(status['method'], 'fast_captions')
+        result = self.client.get(body['result_url'])
+        self.assertEqual(result.status_code, 200)
+        self.assertEqual(result.json()['blog_id'], status['blog_id'])
+        self.assertEqual(result.json()['content'], BlogPost.objects.get(pk=status['blog_id']).generated_content)
+
+    def test_failed_job_reports_its_error(self):
+        body, submit = self.create_job(self.install_fakes('llm_error_rate=1'))
+        run_inline(self)
+        submit()
+
+        self.assertEqual(self.client.get(body['status_url']).json()['status'], GenerationJob.STATUS_FAILED)
+        result = self.client.get(body['result_url'])
+        self.assertEqual(result.status_code, 500)
+        self.assertTrue(result.json()['error'])
+        self.assertFalse(BlogPost.objects.exists())
+
+    def test_a_claimed_job_is_not_run_again(self):
+        job = GenerationJob.objects.create(user=self.user, youtube_link=new_link())
+        with mock.patch.object(jobs, 'run_generation', side_effect=GenerationError('boom')) as run_generation:
+            jobs.run_generation_job(job.id)
+            jobs.run_generation_job(job.id)
+        self.assertEqual(run_generation.call_count, 1)
+
+    def test_stale_running_jobs_are_requeued(self):
+        stale = GenerationJob.objects.create(
+            user=self.user, youtube_link=new_link(), status=GenerationJob.STATUS_RUNNING,
+            started_at=timezone.now() - timedelta(hours=1),
+        )
+        fresh = GenerationJob.objects.create(
+            user=self.user, youtube_link=new_link(), status=GenerationJob.STATUS_RUNNING, started_at=timezone.now(),
+        )
+        self.assertEqual(jobs.requeue_stale_jobs(600), 1)
+        stale.refresh_from_db()
+        fresh.refresh_from_db()
+        self.assertEqual((stale.status, stale.started_at), (GenerationJob.STATUS_PENDING, None))
+        self.assertEqual(fresh.status, GenerationJob.STATUS_RUNNING)
+
+    def test_other_users_jobs_are_not_found(self):
+        job = GenerationJob.objects.create(user=User.objects.create_user('other'), youtube_link=new_link())
+        self.assertEqual(self.client.get(f'/api/jobs/{job.id}/').status_code, 404)
+        self.assertEqual(self.client.get(f'/api/jobs/{job.id}/result/').status_code, 404)
+
+
+def fake_generation(link):
+    return {
+        'video_info': {'title': f"Video {extract_video_id(link)}", 'channel': 'Channel'},
+        'transcript_data': None,
+        'content': "# Title\n\nSome article text.",
+        'method': 'fast_captions',
+    }
+
+
+class GenerationBatchTests(TransactionTestCase):
+    # Batch items run on their own threads, which only see committed rows
+
+    def setUp(self):
+        self.user = User.objects.create_user('batcher', password='pw')
+        self.client.force_login(self.user)
+
+    def run_batch(self, links=(), **fields):
+        batch = GenerationBatch.objects.create(user=self.user, links=list(links), reuse=False, **fields)
+        jobs.run_generation_batch(batch.id)
+        batch.refresh_from_db()
+        return batch
+
+    def test_duplicate_videos_become_one_item(self):
+        link = new_link()
+        short_link = f"https://youtu.be/{extract_video_id(link)}"
+        with mock.patch.object(jobs, 'generate_blog_content', side_effect=fake_generation) as generate:
+            batch = self.run_batch([link, short_link, link, new_link()])
+        self.assertEqual((len(batch.items), batch.duplicates_skipped), (2, 2))
+        self.assertEqual(generate.call_count, 2)
+        self.assertEqual(BlogPost.objects.filter(user=self.user).count(), 2)
+
+    def test_concurrency_is_bounded(self):
+        lock = threading.Lock()
+        running = [0, 0]
+
+        def slow_generation(link):
+            with lock:
+                running[0] += 1
+                running[1] = max(running)
+            time.sleep(0.05)
+            with lock:
+                running[0] -= 1
+            return fake_generation(link)
+
+        with mock.patch.object(jobs, 'generate_blog_content', side_effect=slow_generation):
+            batch = self.run_batch([new_link() for _ in range(6)], concurrency=2)
+        self.assertEqual(batch.status, GenerationBatch.STATUS_SUCCEEDED)
+        self.assertEqual(running[1], 2)
+
+    def test_blogs_are_inserted_in_one_bulk_create(self):
+        bulk_create = BlogPost.objects.bulk_create
+        with mock.patch.object(jobs, 'generate_blog_content', side_effect=fake_generation), \
+                mock.patch.object(BlogPost.objects, 'bulk_create', side_effect=bulk_create) as spy, \
+                mock.patch.object(BlogPost, 'save', side_effect=AssertionError("saved one by one")):
+            batch = self.run_batch([new_link() for _ in range(3)], concurrency=3)
+        self.assertEqual(spy.call_count, 1)
+        self.assertEqual(len(spy.call_args.args[0]), 3)
+        blog_ids = {item['blog_id'] for item in batch.items}
+        self.assertEqual(blog_ids, set(BlogPost.objects.values_list('id', flat=True)))
+        self.assertTrue(all(item['status'] == GenerationJob.STATUS_SUCCEEDED for item in batch.items))
+
+    def test_playlist_is_capped_at_the_batch_limit(self):
+        playlist = [new_link() for _ in range(5)]
+        with override_settings(BATCH_MAX_ITEMS=3), \
+                mock.patch.object(views, 'expand_playlist',
+                                  side_effect=lambda url, limit=None: (playlist[:limit], len(playlist))) as expand, \
+                mock.patch.object(jobs, 'generate_blog_content', side_effect=fake_generation):
+            batch = self.run_batch([new_link()], playlist_url='https://www.youtube.com/playlist?list=PL1')
+        self.assertEqual(expand.call_args.kwargs['limit'], 3)
+        # Two playlist videos never fetched, one link past the limit
+        self.assertEqual((len(batch.items), batch.items_dropped), (3, 3))
+        self.assertEqual(BlogPost.objects.count(), 3)
+        self.assertEqual(self.client.get(f'/api/batches/{batch.id}/').json()['items_dropped'], 3)
+
+    def test_playlist_expansion_asks_yt_dlp_for_the_limit(self):
+        ydl = mock.Mock()
+        ydl.extract_info.return_value = {'entries': [{'id': 'a' * 11}, {'id': 'b' * 11}], 'playlist_count': 40}
+        with mock.patch.object(views.clients, 'borrow_ydl') as borrow_ydl, \
+                mock.patch.object(views.ratelimit, 'call', side_effect=lambda provider, func: func()):
+            borrow_ydl.return_value.__enter__.return_value = ydl
+            urls, total = views.expand_playlist('https://www.youtube.com/playlist?list=PL1', limit=2)
+        self.assertEqual(borrow_ydl.call_args.args[0]['playlistend'], 2)
+        self.assertEqual((len(urls), total), (2, 40))
+
+    def test_failed_items_fail_the_batch(self):
+        with mock.patch.object(jobs, 'generate_blog_content', side_effect=GenerationError('boom')):
+            batch = self.run_batch([new_link(), 'https://example.com/not-youtube'])
+        self.assertEqual(batch.status, GenerationBatch.STATUS_FAILED)
+        self.assertEqual([item['status'] for item in batch.items], [GenerationJob.STATUS_FAILED] * 2)
+        self.assertEqual([item['error'] for item in batch.items], ['boom', 'Invalid YouTube URL'])
+        self.assertFalse(BlogPost.objects.exists())
+
+    def test_one_success_is_enough(self):
+        links = [new_link(), new_link()]
+
+        def generate(link):
+            if link == links[0]:
+                raise GenerationError('boom')
+            return fake_generation(link)
+
+        with mock.patch.object(jobs, 'generate_blog_content', side_effect=generate):
+            batch = self.run_batch(links)
+        self.assertEqual(batch.status, GenerationBatch.STATUS_SUCCEEDED)
+        self.assertEqual([item['status'] for item in batch.items],
+                         [GenerationJob.STATUS_FAILED, GenerationJob.STATUS_SUCCEEDED])
+
+    def test_playlist_expansion_failure_fails_the_batch(self):
+        with mock.patch.object(views, 'expand_playlist', side_effect=Exception('private playlist')):
+            batch = self.run_batch(playlist_url='https://www.youtube.com/playlist?list=PL1')
+        self.assertEqual(batch.status, GenerationBatch.STATUS_FAILED)
+        self.assertIn('private playlist', batch.error)
+
+    def test_stale_running_batches_are_requeued(self):
+        stale = GenerationBatch.objects.create(
+            user=self.user, links=[new_link()], status=GenerationBatch.STATUS_RUNNING,
+            started_at=timezone.now() - timedelta(hours=1),
+        )
+        fresh = GenerationBatch.objects.create(
+            user=self.user, links=[new_link()], status=GenerationBatch.STATUS_RUNNING, started_at=timezone.now(),
+        )
+        self.assertEqual(jobs.requeue_stale_batches(600), 1)
+        stale.refresh_from_db()
+        fresh.refresh_from_db()
+        self.assertEqual((stale.status, stale.started_at), (GenerationBatch.STATUS_PENDING, None))
+        self.assertEqual(fresh.status, GenerationBatch.STATUS_RUNNING)
+
+        with mock.patch.object(jobs, 'generate_blog_content', side_effect=fake_generation):
+            call_command('run_generation_jobs', stdout=io.StringIO())
+        stale.refresh_from_db()
+        self.assertEqual(stale.status, GenerationBatch.STATUS_SUCCEEDED)
+
+
+class VideoIdBackfillMigrationTests(TestCase):
+    def test_backfill_sets_video_id_and_the_first_prompt_version(self):
+        migration = importlib.import_module('myapp.migrations.0002_blogpost_video_id')
+        user = User.objects.create_user('legacy')
+        blog = BlogPost.objects.create(
+            user=user, youtube_title='Legacy', youtube_link='https://youtu.be/legacy00001', generated_content='Body',
+        )
+        unknown = BlogPost.objects.create(
+            user=user, youtube_title='Legacy', youtube_link='https://example.com/video', generated_content='Body',
+        )
+        BlogPost.objects.update(video_id='', prompt_version='')
+
+        migration.backfill_video_id(apps, None)
+
+        blog.refresh_from_db()
+        unknown.refresh_from_db()
+        self.assertEqual((blog.video_id, blog.prompt_version), ('legacy00001', 'v1'))
+        self.assertEqual((unknown.video_id, unknown.prompt_version), ('', 'v1'))
+
+
+class AudioChunkingTests(SimpleTestCase):
+    def test_cut_targets_are_evenly_spaced(self):
+        self.assertEqual(audio.cut_targets(1800, 600), [600, 1200])
+        self.assertEqual(audio.cut_targets(500, 600), [])
+
+    def test_cuts_go_in_the_nearest_silence_within_reach(self):
+        # Silences centred at 591 and 615.5 are both near 600; 1230.5 is too far from 1200
+        silences = [(590, 592), (615, 616), (1230, 1231)]
+        chunks = audio.plan_chunks(1800, silences, [600, 1200], overlap=2)
+        self.assertEqual(
+            [(chunk['keep_start'], chunk['keep_end']) for chunk in chunks],
+            [(0.0, 591.0), (591.0, 1200), (1200, 1800)],
+        )
+        self.assertEqual(
+            [(chunk['start'], chunk['end']) for chunk in chunks],
+            [(0.0, 593.0), (589.0, 1202), (1198, 1800)],
+        )
+
+    def test_cuts_never_go_back_before_the_previous_one(self):
+        chunks = audio.plan_chunks(100, [(39, 41)], [40, 45], overlap=0)
+        self.assertEqual([chunk['keep_start'] for chunk in chunks], [0.0, 40.0, 45])
+
+    def test_stitch_keeps_each_word_once_on_the_full_timeline(self):
+        first = {'start': 0.0, 'end': 12.0, 'keep_start': 0.0, 'keep_end': 10.0}
+        second = {'start': 8.0, 'end': 20.0, 'keep_start': 10.0, 'keep_end': 20.0}
+        words = audio.stitch([
+            (first, [
+                {'start': 1.0, 'end': 1.5, 'text': 'a'},
+                {'start': 9.0, 'end': 9.5, 'text': 'b'},
+                # Past the cut, so it belongs to the second chunk
+                {'start': 10.2, 'end': 10.6, 'text': 'c'},
+            ]),
+            (second, [
+                {'start': 1.0, 'end': 1.5, 'text': 'b'},
+                {'start': 2.2, 'end': 2.6, 'text': 'c'},
+                {'start': 5.0, 'end': 5.5, 'text': 'd'},
+                # Beyond keep_end, but the last chunk keeps everything to the end
+                {'start': 12.5, 'end': 13.0, 'text': 'e'},
+            ]),
+        ])
+        self.assertEqual(
+            [(word['text'], word['start'], word['end']) for word in words],
+            [('a', 1.0, 1.5), ('b', 9.0, 9.5), ('c', 10.2, 10.6), ('d', 13.0, 13.5), ('e', 20.5, 21.0)],
+        )
+
+    def test_stitch_drops_a_word_both_chunks_heard_at_the_cut(self):
+        first = {'start': 0.0, 'end': 12.0, 'keep_start': 0.0, 'keep_end': 10.0}
+        second = {'start': 8.0, 'end': 20.0, 'keep_start': 10.0, 'keep_end': 20.0}
+        words = audio.stitch([
+            (first, [{'start': 9.8, 'end': 10.05, 'text': 'cut'}]),
+            (second, [{'start': 2.0, 'end': 2.3, 'text': 'cut'}, {'start': 3.0, 'end': 3.4, 'text': 'here'}]),
+        ])
+        self.assertEqual([word['text'] for word in words], ['cut', 'here'])
+
+
+class BlogListPaginationTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('reader', password='reader-pass')
+        self.client.force_login(self.user)
+        now = timezone.now()
+        # Two blogs share a timestamp, so the id has to break the tie
+        for minutes in (5, 4, 4, 3, 1):
+            blog = BlogPost.objects.create(
+                user=self.user, youtube_title=f"Blog {minutes}", youtube_link='https://youtu.be/x', generated_content='Body',
+            )
+            BlogPost.objects.filter(pk=blog.pk).update(created_at=now - timedelta(minutes=minutes))
+        other = User.objects.create_user('other', password='other-pass')
+        BlogPost.objects.create(user=other, youtube_title='Not mine', youtube_link='https://youtu.be/y', generated_content='Body')
+
+    def test_cursor_walks_every_blog_once_newest_first(self):
+        expected = list(BlogPost.objects.filter(user=self.user).order_by('-created_at', '-pk').values_list('pk', flat=True))
+        seen = []
+        url = '/api/blogs/?page_size=2'
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            body = response.json()
+            self.assertLessEqual(len(body['blogs']), 2)
+            self.assertNotIn('generated_content', body['blogs'][0])
+            seen.extend(row['id'] for row in body['blogs'])
+            url = body['next']
+        self.assertEqual(seen, expected)
+
+    def test_last_page_has_no_cursor(self):
+        body = self.client.get('/api/blogs/?page_size=5').json()
+        self.assertEqual(len(body['blogs']), 5)
+        self.assertIsNone(body['next_cursor'])
+        self.assertIsNone(body['next'])
+
+    def test_invalid_cursor_is_a_bad_request(self):
+        for cursor in ('not-a-cursor', 'WzFd', 'WyJub3QgYSBkYXRlIiwgMV0'):
+            response = self.client.get('/api/blogs/', {'cursor': cursor})
+            self.assertEqual(response.status_code, 400, cursor)
+            self.assertEqual(response.json(), {'error': 'Invalid cursor'})
+
+
+@skipUnless(connection.vendor == 'sqlite', "Reads SQLite's EXPLAIN QUERY PLAN output")
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('etags', password='pw')
+        self.client.force_login(self.user)
+        self.blogs = [
+            BlogPost.objects.create(
+                user=self.user, youtube_title=f"Blog {n}", youtube_link=new_link(), generated_content='Body',
+            )
+            for n in range(3)
+        ]
+
+    def assert_revalidates(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        etag = response.headers['ETag']
+        self.assertEqual(self.client.get(url, headers={'If-None-Match': etag}).status_code, 304)
+        return etag
+
+    def test_detail_is_not_modified_until_the_blog_changes(self):
+        blog = self.blogs[0]
+        for url in (f'/api/blogs/{blog.pk}/', f'/blog_details/{blog.pk}/'):
+            etag = self.assert_revalidates(url)
+            last_modified = self.client.get(url).headers['Last-Modified']
+            self.assertEqual(self.client.get(url, headers={'If-Modified-Since': last_modified}).status_code, 304)
+
+            BlogPost.objects.filter(pk=blog.pk).update(updated_at=timezone.now() + timedelta(seconds=5))
+            self.assertEqual(self.client.get(url, headers={'If-None-Match': etag}).status_code, 200)
+
+    def test_each_list_page_has_its_own_etag(self):
+        for path in ('/api/blogs/', '/async/blogs/'):
+            first = self.assert_revalidates(f'{path}?page_size=1')
+            next_url = self.client.get(f'{path}?page_size=1').json()['next']
+            second = self.assert_revalidates(next_url)
+            self.assertNotEqual(first, second)
+            for url in (next_url, f'{path}?page_size=2', path):
+                self.assertEqual(self.client.get(url, headers={'If-None-Match': first}).status_code, 200, url)
+
+    def test_list_etag_changes_when_a_blog_is_deleted(self):
+        for path in ('/api/blogs/', '/async/blogs/'):
+            etag = self.assert_revalidates(path)
+            self.blogs.pop(0).delete()
+            self.assertEqual(self.client.get(path, headers={'If-None-Match': etag}).status_code, 200)
+
+    def test_invalid_cursor_is_not_answered_with_304(self):
+        for path in ('/api/blogs/', '/async/blogs/'):
+            response = self.client.get(path, {'cursor': 'not-a-cursor'}, headers={'If-None-Match': '*'})
+            self.assertEqual(response.status_code, 400)
+
+
+class BlogListQueryPlanTests(TestCase):
+    def assert_uses_index_without_sort(self, queryset):
+        plan = queryset.explain()
+        self.assertIn('blogpost_user_created_idx', plan)
+        self.assertNotIn('TEMP B-TREE', plan)
+
+    def test_first_page_reads_the_index_in_order(self):
+        user = User.objects.create_user('planner')
+        self.assert_uses_index_without_sort(page_queryset(views.blog_summaries(user)))
+
+    def test_later_pages_seek_on_the_index(self):
+        user = User.objects.create_user('planner')
+        cursor = encode_cursor(SimpleNamespace(created_at=timezone.now(), pk=10))
+        self.assert_uses_index_without_sort(page_queryset(views.blog_summaries(user), cursor))
+
+
+class RenderBlogHtmlCommandTests(TestCase):
+    def test_renders_missing_html_and_bumps_updated_at(self):
+        user = User.objects.create_user('writer')
+        blog = BlogPost.objects.create(
+            user=user, youtube_title='Old', youtube_link='https://youtu.be/x', generated_content='# Title\n\nBody',
+        )
+        stale = timezone.now() - timedelta(days=1)
+        BlogPost.objects.filter(pk=blog.pk).update(rendered_html='', updated_at=stale)
+
+        call_command('render_blog_html', stdout=io.StringIO())
+
+        blog.refresh_from_db()
+        self.assertEqual(blog.rendered_html, render_blog_html(blog.generated_content))
+        self.assertGreater(blog.updated_at, stale)
+
+
+@skipUnless(connection.vendor == 'sqlite', "Tests the FTS5 index and its triggers")
+class BlogSearchTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('searcher')
+
+    def blog(self, title, content, channel='', user=None):
+        return BlogPost.objects.create(
+            user=user or self.user, youtube_title=title, channel_name=channel,
+            youtube_link='https://youtu.be/x', generated_content=content,
+        )
+
+    def found(self, text):
+        results, _ = search_blogs(self.user, text)
+        return [row['id'] for row in results]
+
+    def test_triggers_keep_the_index_in_sync(self):
+        blog = self.blog('Kitchen tour', 'We compare sourdough starters.')
+        self.assertEqual(self.found('sourdough'), [blog.pk])
+
+        blog.generated_content = 'We compare espresso grinders.'
+        blog.save()
+        self.assertEqual(self.found('sourdough'), [])
+        self.assertEqual(self.found('espresso'), [blog.pk])
+
+        blog.youtube_title = 'Coffee corner'
+        blog.save(update_fields=['youtube_title'])
+        self.assertEqual(self.found('kitchen'), [])
+        self.assertEqual(self.found('coffee'), [blog.pk])
+
+        blog.delete()
+        self.assertEqual(self.found('espresso'), [])
+
+    def test_title_matches_outrank_channel_and_content_matches(self):
+        in_content = self.blog('Weekly notes', 'A long article that mentions databases once among many other words.')
+        in_channel = self.blog('Weekly notes', 'Nothing relevant here.', channel='Databases daily')
+        in_title = self.blog('Databases explained', 'Nothing relevant here.')
+        self.assertEqual(self.found('databases'), [in_title.pk, in_channel.pk, in_content.pk])
+
+    def test_only_the_users_blogs_match_and_snippets_are_escaped(self):
+        mine = self.blog('Mine', 'Rust <b>ownership</b> explained.')
+        self.blog('Theirs', 'Rust ownership explained.', user=User.objects.create_user('someone'))
+        results, has_next = search_blogs(self.user, 'owner')
+        self.assertEqual([row['id'] for row in results], [mine.pk])
+        self.assertFalse(has_next)
+        self.assertIn('<mark>ownership</mark>', results[0]['snippet'])
+        self.assertIn('&lt;b&gt;', results[0]['snippet'])
+
+    @override_settings(COMPRESS_BLOG_CONTENT=True)
+    def test_compressed_articles_are_searchable(self):
+        blog = self.blog('Kitchen tour', 'We compare sourdough starters.')
+        stored = BlogPost.objects.filter(pk=blog.pk).values('generated_content', 'content_compressed').get()
+        self.assertEqual(stored['generated_content'], '')
+        self.assertIsNotNone(stored['content_compressed'])
+
+        results, _ = search_blogs(self.user, 'sourdough')
+        self.assertEqual([row['id'] for row in results], [blog.pk])
+        self.assertIn('<mark>sourdough</mark>', results[0]['snippet'])
+
+        blog.generated_content = 'We compare espresso grinders.'
+        blog.save()
+        self.assertEqual(self.found('sourdough'), [])
+        self.assertEqual(self.found('espresso'), [blog.pk])
+        # The unindexed fallback reads the same text
+        self.assertEqual([row['id'] for row in search._substring_search(self.user, 'espresso', 10, 0)], [blog.pk])
+
+        blog.delete()
+        self.assertEqual(self.found('espresso'), [])
+
+    @override_settings(COMPRESS_BLOG_CONTENT=True)
+    def test_compressed_articles_have_list_excerpts(self):
+        self.client.force_login(self.user)
+        self.blog('Kitchen tour', '# Starters\n\nWe compare sourdough starters.')
+        for url in ('/api/blogs/', '/async/blogs/'):
+            self.assertEqual(self.client.get(url).json()['blogs'][0]['excerpt'], 'Starters We compare sourdough starters.')
+
+
+@override_settings(COMPRESS_BLOG_CONTENT=True)
+class BlogDetailTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('detail')
+        self.client.force_login(self.user)
+        self.blog = BlogPost.objects.create(
+            user=self.user, youtube_title='Compressed', youtube_link='https://youtu.be/x', generated_content='Full article',
+        )
+
+    def test_detail_returns_the_article_without_the_compressed_bytes(self):
+        for url in (f'/api/blogs/{self.blog.pk}/', f'/async/blogs/{self.blog.pk}/'):
+            body = self.client.get(url).json()
+            self.assertEqual(body['generated_content'], 'Full article', url)
+            self.assertNotIn('content_compressed', body, url)
+
+
+class MetricsEndpointTests(TestCase):
+    @override_settings(METRICS_TOKEN='s3cret')
+    def test_bearer_token_is_required(self):
+        self.assertEqual(self.client.get('/metrics/').status_code, 403)
+        self.assertEqual(self.client.get('/metrics/', headers={'Authorization': 'Bearer wrong'}).status_code, 403)
+        self.assertEqual(self.client.get('/metrics/', headers={'Authorization': 'Bearer s3crét'}).status_code, 403)
+        self.assertEqual(self.client.get('/metrics/', headers={'Authorization': 'Bearer s3cret'}).status_code, 200)
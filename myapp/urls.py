@@ -1,6 +1,7 @@
 from django.urls import path, include
 from . import views
 from . import api_views
+from . import async_views
 
 urlpatterns = [
     path('', views.index, name='index'),
@@ -12,8 +13,23 @@ urlpatterns = [
     path('blog_details/<int:pk>/', views.blog_details, name='blog_details'),
     # path('generate-blog-fast/', views.generate_blog_fast, name='generate_blog_fast'),
     path('generate_blog_smart/', views.generate_blog_smart, name='generate_blog_smart'),
+    path('generate_blog_stream/', views.generate_blog_stream, name='generate_blog_stream'),
+    path('generate_blog_stream/token/', views.generate_blog_stream_token, name='generate_blog_stream_token'),
     path('api/generate-blog/', api_views.generate_blog_api, name='generate_blog_api'),
+    path('api/jobs/', api_views.generation_job_create_api, name='generation_job_create_api'),
+    path('api/jobs/<uuid:job_id>/', api_views.generation_job_status_api, name='generation_job_status_api'),
+    path('api/jobs/<uuid:job_id>/result/', api_views.generation_job_result_api, name='generation_job_result_api'),
+    path('api/batches/', api_views.generation_batch_create_api, name='generation_batch_create_api'),
+    path('api/batches/<uuid:batch_id>/', api_views.generation_batch_status_api, name='generation_batch_status_api'),
     path('api/blogs/', api_views.blog_list_api, name='blog_list_api'),
+    path('api/blogs/search/', api_views.blog_search_api, name='blog_search_api'),
     path('api/blogs/<int:pk>/', api_views.blog_detail_api, name='blog_detail_api'),
     path('api/blogs/<int:pk>/delete/', api_views.blog_delete_api, name='blog_delete_api'),
+    path('api/cache-stats/', api_views.cache_stats_api, name='cache_stats_api'),
+    path('api/client-health/', api_views.client_health_api, name='client_health_api'),
+    path('async/generate-blog/', async_views.generate_blog_async, name='generate_blog_async'),
+    path('async/generate-blog/stream/', async_views.generate_blog_stream_async, name='generate_blog_stream_async'),
+    path('async/blogs/', async_views.blog_list_async, name='blog_list_async'),
+    path('async/blogs/<int:pk>/', async_views.blog_detail_async, name='blog_detail_async'),
+    path('metrics/', views.metrics_endpoint, name='metrics'),
 ]
\ No newline at end of file
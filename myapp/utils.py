@@ -0,0 +1,62 @@
+# utils.py
+import re
+import zlib
+
+from django.template.defaultfilters import linebreaksbr
+from markdownify.templatetags.markdownify import markdownify
+
+
+def extract_video_id(url):
+    """Extract YouTube video ID from URL"""
+    patterns = [
+        r'(?:https?://)?(?:www\.)?youtube\.com/watch\?v=([^&\n?#]+)',
+        r'(?:https?://)?(?:www\.)?youtu\.be/([^&\n?#]+)',
+        r'(?:https?://)?(?:www\.)?youtube\.com/embed/([^&\n?#]+)',
+        r'(?:https?://)?(?:www\.)?youtube\.com/shorts/([^&\n?#]+)',
+    ]
+    
+    for pattern in patterns:
+        match = re.search(pattern, url)
+        if match:
+            return match.group(1)
+    return None
+
+def parse_flag(value, default=False):
+    """Boolean option from a JSON body or query string: true/false, 1/0, yes/no, on/off"""
+    if value is None:
+        return default
+    if isinstance(value, bool):
+        return value
+    value = str(value).strip().lower()
+    if value in ('true', '1', 'yes', 'on'):
+        return True
+    if value in ('false', '0', 'no', 'off'):
+        return False
+    return default
+
+def estimate_tokens(text):
+    """Rough token count (about 4 characters per token for English)"""
+    return len(text) // 4 + 1
+
+# Markdown markup that shouldn't show up in plain-text excerpts
+MARKDOWN_PATTERN = re.compile(r'[#*_`>]+|\[([^\]]*)\]\([^)]*\)')
+
+def make_excerpt(text, length=200):
+    """Plain-text start of a markdown article, cut at a word boundary"""
+    text = MARKDOWN_PATTERN.sub(lambda match: match.group(1) or ' ', text or '')
+    text = ' '.join(text.split())
+    if len(text) <= length:
+        return text
+    return text[:length].rsplit(' ', 1)[0].rstrip('.,;:') + '…'
+
+def render_blog_html(markdown_text):
+    """Sanitized HTML for an article, as blog-details.html used to render it on every view"""
+    return str(linebreaksbr(markdownify(markdown_text or '')))
+
+def compress_text(text):
+    """zlib-compressed UTF-8 bytes of text"""
+    return zlib.compress(text.encode('utf-8'), 6)
+
+def decompress_text(data):
+    """Text stored with compress_text (also takes the memoryview PostgreSQL returns)"""
+    return zlib.decompress(bytes(data)).decode('utf-8')
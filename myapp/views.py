@@ -1,23 +1,41 @@
 # views.py
+import asyncio
+import contextvars
 import json
 import os
 import re
 import tempfile
 from django.contrib.auth.models import User
 from django.contrib.auth import authenticate, login, logout
+import io
 import time
 import shutil
+import copy
+import hashlib
+import hmac
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
 from django.shortcuts import render, redirect
-from django.http import JsonResponse
+from django.http import HttpResponse, JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.contrib.auth.decorators import login_required
+from django.core.handlers.asgi import ASGIRequest
 from django.conf import settings
-import yt_dlp
-import assemblyai as aai
-import google.generativeai as genai
+from django.core import signing
+from django.urls import reverse
+from django.utils import timezone
+from django.db.models import Count, Max
+from django.db.models.functions import Substr
+from django.views.decorators.http import condition
+from asgiref.sync import sync_to_async
 from dotenv import load_dotenv
-from .models import BlogPost
-from youtube_transcript_api import YouTubeTranscriptApi
+from .models import BlogPost, article_text
+from . import audio, clients, metrics, pipeline, ratelimit
+from .cache import llm_cache, metadata_cache, no_captions_cache, raw_info_cache, transcript_cache
+from .circuit import CircuitOpen, caption_breaker
+from .utils import estimate_tokens, extract_video_id, make_excerpt, parse_flag
+from .pagination import InvalidCursor, decode_cursor, get_page_size, paginate
+from .captions import normalize_captions
 from django.http import StreamingHttpResponse
 
 # Load environment variables
@@ -27,9 +45,30 @@ load_dotenv()
 def index(request):
     return render(request, 'index.html')
 
-# Configure APIs
-aai.settings.api_key = os.getenv("ASSEMBLYAI_API_KEY")
-genai.configure(api_key=os.getenv('GEMINI_API_KEY'))
+# API keys are configured by clients.py when each SDK is first used
+
+# Bump whenever the generation prompts change so older blogs are not reused
+PROMPT_VERSION = 'v2'
+GEMINI_MODEL = 'gemini-1.5-flash'
+
+# Transcripts longer than this are condensed section by section before the blog prompt
+SINGLE_PROMPT_CHARS = getattr(settings, 'SINGLE_PROMPT_CHARS', 8000)
+TRANSCRIPT_CHUNK_TOKENS = getattr(settings, 'TRANSCRIPT_CHUNK_TOKENS', 2000)
+LLM_MAX_CONCURRENCY = getattr(settings, 'LLM_MAX_CONCURRENCY', 4)
+
+# Stream tokens let an EventSource GET start a generation the user asked for with a POST
+STREAM_TOKEN_SALT = 'myapp.generate_blog_stream'
+STREAM_TOKEN_MAX_AGE = getattr(settings, 'STREAM_TOKEN_MAX_AGE', 60)
+
+# Characters of the article read from the database for list excerpts
+EXCERPT_SOURCE_CHARS = 400
+
+# Smallest useful audio-only stream, with a muxed mp4 as the last resort
+AUDIO_FORMAT = getattr(settings, 'AUDIO_DOWNLOAD_FORMAT', 'bestaudio[abr<=64]/worstaudio/worst[ext=mp4]')
+
+# Audio at least this long is transcribed in parallel chunks (see audio.py)
+CHUNKED_TRANSCRIPTION = getattr(settings, 'CHUNKED_TRANSCRIPTION', True)
+CHUNKED_TRANSCRIPTION_MIN_SECONDS = getattr(settings, 'CHUNKED_TRANSCRIPTION_MIN_SECONDS', 1200)
 
 def user_login(request):
     if request.method == 'POST':
@@ -71,6 +110,7 @@ def user_logout(request):
 
 @login_required
 @csrf_exempt
+@metrics.server_timing
 def generate_blog_smart(request):
     """Smart blog generation - tries fast method first, falls back to full method"""
     if request.method != 'POST':
@@ -87,109 +127,453 @@ def generate_blog_smart(request):
         if not video_id:
             return JsonResponse({'error': 'Invalid YouTube URL'}, status=400)
         
-        # Method 1: Try fast generation with captions
         try:
-            transcript = get_transcript_instant(yt_link)
-            if transcript and len(transcript.strip()) > 100:  # Valid transcript
-                video_info = get_video_info_enhanced(yt_link)
-                blog_content = generate_blog_instant(transcript, video_info)
-                
-                # Save to database
-                new_blog_article = BlogPost.objects.create(
-                    user=request.user,
-                    youtube_title=video_info.get('title', 'Unknown Title'),
-                    youtube_link=yt_link,
-                    generated_content=blog_content,
-                )
-                new_blog_article.save()
-                
-                return JsonResponse({
-                    'success': True,
-                    'content': blog_content,
-                    'method': 'fast_captions',
-                    'metadata': {
-                        'title': video_info.get('title'),
-                        'channel': video_info.get('channel'),
-                        'duration': video_info.get('duration'),
-                        'word_count': len(blog_content.split())
-                    }
-                })
-                
-        except Exception as e:
-            print(f"Fast method failed: {e}")
-            
-        # Method 2: Fallback to full transcription
-        try:
-            video_info = get_video_info_enhanced(yt_link)
-            transcript_data = get_transcription_enhanced(yt_link)
-            
-            if not transcript_data or not transcript_data.get('text'):
-                return JsonResponse({'error': 'No audio/transcript available'}, status=500)
-            
-            blog_content = generate_blog_from_transcription_enhanced(transcript_data, video_info)
-            
-            # Save to database
-            new_blog_article = BlogPost.objects.create(
-                user=request.user,
-                youtube_title=video_info.get('title', 'Unknown Title'),
-                youtube_link=yt_link,
-                generated_content=blog_content,
-                channel_name=video_info.get('channel', ''),
-                video_duration=video_info.get('duration', ''),
-                word_count=len(blog_content.split()),
-                transcript_confidence=transcript_data.get('confidence', 0.95)
+            blog, result = pipeline.run_generation(
+                request.user, yt_link,
+                reuse=parse_flag(data.get('reuse'), True), regenerate=parse_flag(data.get('regenerate')),
             )
-            new_blog_article.save()
-            
-            return JsonResponse({
-                'success': True,
-                'content': blog_content,
-                'method': 'full_transcription',
-                'metadata': {
-                    'title': video_info.get('title'),
-                    'channel': video_info.get('channel'),
-                    'duration': video_info.get('duration'),
-                    'word_count': len(blog_content.split()),
-                    'speakers_detected': len(transcript_data.get('speakers', {})),
-                    'transcript_confidence': transcript_data.get('confidence', 0.95)
-                }
-            })
-            
-        except Exception as e:
-            return JsonResponse({'error': f'Full transcription failed: {str(e)}'}, status=500)
+        except pipeline.GenerationError as e:
+            return JsonResponse({'error': str(e)}, status=500)
+        except ratelimit.RateLimited as e:
+            return rate_limited_response(e)
+        
+        return JsonResponse({
+            'success': True,
+            'content': blog.generated_content,
+            'method': result['method'],
+            'metadata': pipeline.build_metadata(result)
+        })
             
     except Exception as e:
         return JsonResponse({'error': str(e)}, status=500)
 
+def rate_limited_response(error):
+    """429 telling the client when the provider expects to accept calls again"""
+    response = JsonResponse({'error': str(error), 'retry_after': error.retry_after}, status=429)
+    if error.retry_after:
+        response['Retry-After'] = str(int(error.retry_after + 1))
+    return response
+
+def read_generation_options(data):
+    """(link, reuse, regenerate) from request data, or an error response"""
+    yt_link = (data.get('link') or '').strip()
+    if not yt_link:
+        return None, JsonResponse({'error': 'Please provide a YouTube link'}, status=400)
+    
+    if not extract_video_id(yt_link):
+        return None, JsonResponse({'error': 'Invalid YouTube URL'}, status=400)
+    
+    return (yt_link, parse_flag(data.get('reuse'), True), parse_flag(data.get('regenerate'))), None
+
+def make_stream_token(user, yt_link, reuse, regenerate):
+    """Signed token that lets this user start this generation with a GET, for EventSource"""
+    return signing.dumps(
+        {'user': user.id, 'link': yt_link, 'reuse': reuse, 'regenerate': regenerate}, salt=STREAM_TOKEN_SALT
+    )
+
+def read_stream_request(request, user):
+    """(link, reuse, regenerate) for the streaming views, or an error response.
+
+    A POST carries the options as JSON and is CSRF-checked. A GET (all
+    EventSource can send) only runs what a token from
+    generate_blog_stream_token signed, so a link from another site can't
+    start a generation.
+    """
+    if request.method == 'POST':
+        try:
+            return read_generation_options(json.loads(request.body or '{}'))
+        except ValueError:
+            return None, JsonResponse({'error': 'Invalid JSON body'}, status=400)
+    if request.method == 'GET':
+        try:
+            data = signing.loads(request.GET.get('token', ''), salt=STREAM_TOKEN_SALT, max_age=STREAM_TOKEN_MAX_AGE)
+        except signing.BadSignature:
+            data = None
+        if not data or data.get('user') != user.id:
+            return None, JsonResponse({'error': 'Invalid or expired stream token'}, status=403)
+        return read_generation_options(data)
+    return None, JsonResponse({'error': 'Invalid request method'}, status=405)
+
+@login_required
+def generate_blog_stream_token(request):
+    """Short-lived URL for streaming a generation with EventSource, which can't POST"""
+    if request.method != 'POST':
+        return JsonResponse({'error': 'Invalid request method'}, status=405)
+    
+    try:
+        options, error = read_generation_options(json.loads(request.body or '{}'))
+    except ValueError:
+        return JsonResponse({'error': 'Invalid JSON body'}, status=400)
+    if error:
+        return error
+    
+    token = make_stream_token(request.user, *options)
+    return JsonResponse({
+        'token': token,
+        'stream_url': f"{reverse('generate_blog_stream')}?token={token}",
+        'expires_in': STREAM_TOKEN_MAX_AGE,
+    })
+
+@login_required
+def generate_blog_stream(request):
+    """Streaming blog generation - server-sent events for each stage, then the article as it is written"""
+    options, error = read_stream_request(request, request.user)
+    if error:
+        return error
+    yt_link, reuse, regenerate = options
+    
+    if isinstance(request, ASGIRequest):
+        # Under ASGI Django reads a sync iterator to the end before sending anything, an async one streams
+        return event_stream_response(agenerate_blog_events(request.user, yt_link, reuse, regenerate))
+    
+    def event_stream():
+        # Headers are sent before any stage runs, so the stage timings go in the done event
+        with metrics.capture_timings() as timings:
+            try:
+                for event, payload in pipeline.stream_generation(request.user, yt_link, reuse=reuse, regenerate=regenerate):
+                    if event == 'done':
+                        payload['timings'] = metrics.timing_summary(timings)
+                    yield f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+            except ratelimit.RateLimited as e:
+                yield f"event: error\ndata: {json.dumps({'error': str(e), 'retry_after': e.retry_after})}\n\n"
+            except Exception as e:
+                yield f"event: error\ndata: {json.dumps({'error': str(e)})}\n\n"
+    
+    return event_stream_response(event_stream())
+
+async def agenerate_blog_events(user, yt_link, reuse, regenerate):
+    """Server-sent events of an async generation, stage timings in the done event"""
+    with metrics.capture_timings() as timings:
+        try:
+            async for event, payload in pipeline.astream_generation(user, yt_link, reuse=reuse, regenerate=regenerate):
+                if event == 'done':
+                    payload['timings'] = metrics.timing_summary(timings)
+                yield f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+        except ratelimit.RateLimited as e:
+            yield f"event: error\ndata: {json.dumps({'error': str(e), 'retry_after': e.retry_after})}\n\n"
+        except Exception as e:
+            yield f"event: error\ndata: {json.dumps({'error': str(e)})}\n\n"
+
+def event_stream_response(events):
+    """text/event-stream response that proxies pass through unbuffered"""
+    response = StreamingHttpResponse(events, content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+def reusable_blogs(video_id):
+    """Recent blogs for this video and prompt version, newest first"""
+    max_age = getattr(settings, 'BLOG_REUSE_MAX_AGE', 7 * 24 * 3600)
+    return BlogPost.objects.filter(
+        video_id=video_id,
+        prompt_version=PROMPT_VERSION,
+        created_at__gte=timezone.now() - timedelta(seconds=max_age),
+    ).order_by('-created_at')
+
+def find_reusable_blog(video_id, user):
+    """Most recent blog for this video and prompt version, preferring the user's own"""
+    candidates = reusable_blogs(video_id)
+    return candidates.filter(user=user).first() or candidates.first()
+
+def clone_blog_post(source, user, yt_link):
+    """Unsaved copy of another user's blog for this user"""
+    return BlogPost(
+        user=user,
+        youtube_title=source.youtube_title,
+        youtube_link=yt_link,
+        video_id=source.video_id,
+        prompt_version=source.prompt_version,
+        generated_content=source.generated_content,
+        rendered_html=source.rendered_html,
+        channel_name=source.channel_name,
+        video_duration=source.video_duration,
+        word_count=source.word_count,
+        transcript_confidence=source.transcript_confidence,
+        speakers_detected=source.speakers_detected,
+    )
+
+def get_reusable_blog(video_id, user, yt_link):
+    """Return a recent blog for this video, linking the user's own or cloning another user's"""
+    source = find_reusable_blog(video_id, user)
+    if not source or source.user_id == user.id:
+        return source
+
+    blog = clone_blog_post(source, user, yt_link)
+    blog.save()
+    return blog
+
+async def aget_reusable_blog(video_id, user, yt_link):
+    """get_reusable_blog for async views"""
+    candidates = reusable_blogs(video_id)
+    source = await candidates.filter(user=user).afirst() or await candidates.afirst()
+    if not source or source.user_id == user.id:
+        return source
+
+    blog = clone_blog_post(source, user, yt_link)
+    await blog.asave()
+    return blog
+
+def expand_playlist(link, limit=None):
+    """Video URLs of a playlist (the first limit of them) and its video count, using yt-dlp flat extraction"""
+    ydl_opts = {
+        'quiet': True,
+        'no_warnings': True,
+        'extract_flat': 'in_playlist',
+    }
+    if limit:
+        ydl_opts['playlistend'] = limit
+    
+    with clients.borrow_ydl(ydl_opts) as ydl:
+        info = ratelimit.call('youtube', lambda: ydl.extract_info(link, download=False))
+    
+    entries = info.get('entries') or [info]
+    urls = [f"https://www.youtube.com/watch?v={entry['id']}" for entry in entries if entry and entry.get('id')]
+    return urls, max(info.get('playlist_count') or 0, len(urls))
+
+def no_captions_error_types(transcript_api):
+    """Caption errors that mean the video itself has no usable captions"""
+    return (
+        transcript_api.NoTranscriptFound,
+        transcript_api.TranscriptsDisabled,
+        transcript_api.VideoUnavailable,
+        transcript_api.VideoUnplayable,
+        transcript_api.AgeRestricted,
+        transcript_api.InvalidVideoId,
+    )
+
 # Fix the instant functions
-def get_transcript_instant(link):
-    """Get transcript using YouTube Transcript API"""
+@metrics.timed('captions')
+def get_captions(link):
+    """Get normalized captions, their cue timings and normalization stats using YouTube Transcript API"""
     try:
         video_id = extract_video_id(link)
         if not video_id:
             return None
-            
-        transcript_list = YouTubeTranscriptApi.get_transcript(video_id, languages=['en', 'en-US'])
-        return ' '.join([item['text'] for item in transcript_list])
+
+        cached = transcript_cache.get(f"normalized_captions:{video_id}")
+        if cached:
+            return cached
+        if no_captions_cache.get(video_id):
+            print(f"No captions for {video_id} (cached)")
+            return None
+        
+        # Missing captions are a property of the video, not a YouTube failure, so they don't trip the breaker
+        transcript_api = clients.youtube_transcript_api()
+        no_captions_errors = no_captions_error_types(transcript_api)
+        try:
+            transcript_list = caption_breaker.call(
+                lambda: ratelimit.call(
+                    'youtube',
+                    lambda: transcript_api.YouTubeTranscriptApi().fetch(video_id, languages=['en', 'en-US']).to_raw_data(),
+                ),
+                expected=no_captions_errors,
+            )
+        except no_captions_errors as e:
+            print(f"No captions for {video_id}: {type(e).__name__}")
+            no_captions_cache.set(video_id, True)
+            return None
+        except transcript_api.RequestBlocked as e:
+            # Counted against the breaker; the audio download doesn't go through this API, so transcribe instead
+            print(f"YouTube is blocking caption requests ({type(e).__name__}), falling back to transcription")
+            return None
+        
+        metrics.add_bytes('captions', sum(len((cue.get('text') or '').encode('utf-8')) for cue in transcript_list))
+        transcript, stats = normalize_captions(transcript_list)
+        print(f"Caption normalization for {video_id} saved {stats['chars_saved']} chars (~{stats['tokens_saved']} tokens)")
+        if not transcript:
+            no_captions_cache.set(video_id, True)
+            return None
+        
+        captions = {
+            'text': transcript,
+            'normalization': stats,
+            'segments': [
+                {'start': cue.get('start', 0.0), 'duration': cue.get('duration', 0.0), 'text': cue.get('text') or ''}
+                for cue in transcript_list
+            ],
+        }
+        transcript_cache.set(f"normalized_captions:{video_id}", captions)
+        return captions
+    except CircuitOpen as e:
+        print(f"Skipping captions: {e}")
+        return None
+    except ratelimit.RateLimited:
+        raise
     except Exception as e:
         print(f"Caption fetch failed: {e}")
         return None
 
-def generate_blog_instant(transcript, video_info):
-    """Fast blog generation with Gemini Flash"""
-    try:
-        model = genai.GenerativeModel('gemini-1.5-flash')
-        
-        # Limit transcript to avoid token limits
-        limited_transcript = transcript[:8000] if len(transcript) > 8000 else transcript
-        
-        prompt = f"""Create a well-structured blog article from this YouTube video transcript:
+def get_transcript_instant(link):
+    """Get transcript using YouTube Transcript API"""
+    captions = get_captions(link)
+    return captions['text'] if captions else None
+
+def split_transcript(text, max_tokens):
+    """Split a transcript into segments of about max_tokens, on sentence boundaries where possible"""
+    max_chars = max_tokens * 4
+    pieces = []
+    for sentence in re.split(r'(?<=[.!?])\s+', text.strip()):
+        # Caption text often has no punctuation at all, so fall back to word boundaries
+        while len(sentence) > max_chars:
+            cut = sentence.rfind(' ', 0, max_chars)
+            if cut <= 0:
+                cut = max_chars
+            pieces.append(sentence[:cut])
+            sentence = sentence[cut:].lstrip()
+        if sentence:
+            pieces.append(sentence)
+    
+    chunks = []
+    current = ''
+    for piece in pieces:
+        if current and len(current) + len(piece) + 1 > max_chars:
+            chunks.append(current)
+            current = piece
+        else:
+            current = f"{current} {piece}" if current else piece
+    if current:
+        chunks.append(current)
+    return chunks
+
+def llm_cache_key(prompt, model_name=GEMINI_MODEL):
+    """Content hash of the model, the prompt template version and the rendered prompt"""
+    return hashlib.sha256(f"{model_name}\0{PROMPT_VERSION}\0{prompt}".encode('utf-8')).hexdigest()
+
+def generate_content_cached(prompt, model_name=GEMINI_MODEL, regenerate=False):
+    """Gemini call served from the response cache unless regenerate is set"""
+    key = llm_cache_key(prompt, model_name)
+    if not regenerate:
+        cached = llm_cache.get(key)
+        if cached:
+            return cached
+    
+    model = clients.get_gemini_model(model_name)
+    with metrics.timer('gemini'):
+        response = ratelimit.call('gemini', lambda: model.generate_content(prompt))
+        text = response.text
+    count_llm_bytes(prompt, text)
+    if text:
+        llm_cache.set(key, text)
+    return text
+
+async def generate_content_cached_async(prompt, model_name=GEMINI_MODEL, regenerate=False):
+    """generate_content_cached for async views: awaits Gemini instead of holding a thread"""
+    key = llm_cache_key(prompt, model_name)
+    if not regenerate:
+        cached = await sync_to_async(llm_cache.get, thread_sensitive=False)(key)
+        if cached:
+            return cached
+    
+    model = clients.get_gemini_model(model_name)
+    with metrics.timer('gemini'):
+        response = await ratelimit.acall('gemini', lambda: model.generate_content_async(prompt))
+        text = response.text
+    count_llm_bytes(prompt, text)
+    if text:
+        await sync_to_async(llm_cache.set, thread_sensitive=False)(key, text)
+    return text
+
+def count_llm_bytes(prompt, completion):
+    """Count the text sent to and received from Gemini"""
+    metrics.add_bytes('prompt', len(prompt.encode('utf-8')))
+    metrics.add_bytes('completion', len((completion or '').encode('utf-8')))
+
+def notes_word_budget(total_parts):
+    """Words per part that keep the combined notes around the size of a single prompt"""
+    return max(60, min(250, (SINGLE_PROMPT_CHARS // 6) // total_parts))
+
+def join_notes(notes):
+    """Reduce step input: every part's notes, labelled in order"""
+    total_parts = len(notes)
+    return '\n\n'.join(f"Part {part}/{total_parts}:\n{note}" for part, note in enumerate(notes, start=1))
+
+def chunk_summary_prompt(chunk, part, total_parts, video_info, max_words):
+    """Map step prompt condensing one transcript segment into notes"""
+    return f"""You are condensing part {part} of {total_parts} of the transcript of the YouTube video "{video_info.get('title', 'Unknown')}".
+
+Write dense notes (at most {max_words} words) keeping every key point, argument, example, name and number.
+Do not add an introduction or conclusion and do not mention that this is a transcript.
+
+Transcript part {part}:
+{chunk}"""
+
+def summarize_transcript_chunk(chunk, part, total_parts, video_info, max_words, regenerate=False):
+    """Map step: condense one transcript segment into notes"""
+    notes = generate_content_cached(
+        chunk_summary_prompt(chunk, part, total_parts, video_info, max_words), regenerate=regenerate
+    )
+    if not notes:
+        raise ValueError(f"No notes generated for transcript part {part}")
+    return notes.strip()
+
+@metrics.timed('condense')
+def condense_transcript(transcript, video_info, regenerate=False):
+    """Summarize token-budgeted segments in parallel so a long transcript fits one blog prompt.
+
+    regenerate skips the cached notes as well as the cached article.
+    """
+    chunks = split_transcript(transcript, TRANSCRIPT_CHUNK_TOKENS)
+    total_parts = len(chunks)
+    max_words = notes_word_budget(total_parts)
+    
+    # Each worker thread runs in a copy of this context so its Gemini calls show up in the request's timings
+    context = contextvars.copy_context()
+    with ThreadPoolExecutor(max_workers=min(LLM_MAX_CONCURRENCY, total_parts)) as executor:
+        notes = list(executor.map(
+            lambda item: context.copy().run(
+                summarize_transcript_chunk, item[1], item[0] + 1, total_parts, video_info, max_words, regenerate
+            ),
+            enumerate(chunks),
+        ))
+    
+    print(f"Condensed transcript: {estimate_tokens(transcript)} -> {estimate_tokens(' '.join(notes))} tokens in {total_parts} parts")
+    return join_notes(notes)
+
+@metrics.timed('condense')
+async def condense_transcript_async(transcript, video_info, regenerate=False):
+    """condense_transcript for async views: the map step runs as concurrent Gemini calls on the loop"""
+    chunks = split_transcript(transcript, TRANSCRIPT_CHUNK_TOKENS)
+    total_parts = len(chunks)
+    max_words = notes_word_budget(total_parts)
+    semaphore = asyncio.Semaphore(LLM_MAX_CONCURRENCY)
+    
+    async def summarize(part, chunk):
+        async with semaphore:
+            notes = await generate_content_cached_async(
+                chunk_summary_prompt(chunk, part, total_parts, video_info, max_words), regenerate=regenerate
+            )
+        if not notes:
+            raise ValueError(f"No notes generated for transcript part {part}")
+        return notes.strip()
+    
+    notes = await asyncio.gather(*(summarize(part, chunk) for part, chunk in enumerate(chunks, start=1)))
+    print(f"Condensed transcript: {estimate_tokens(transcript)} -> {estimate_tokens(' '.join(notes))} tokens in {total_parts} parts")
+    return join_notes(notes)
+
+def prepare_transcript_for_prompt(transcript, video_info, regenerate=False):
+    """Return (condensed, text), condensing transcripts too long for a single prompt"""
+    if len(transcript) <= SINGLE_PROMPT_CHARS:
+        return False, transcript
+    return True, condense_transcript(transcript, video_info, regenerate=regenerate)
+
+async def prepare_transcript_for_prompt_async(transcript, video_info, regenerate=False):
+    """prepare_transcript_for_prompt for async views"""
+    if len(transcript) <= SINGLE_PROMPT_CHARS:
+        return False, transcript
+    return True, await condense_transcript_async(transcript, video_info, regenerate=regenerate)
+
+def build_instant_prompt(transcript, video_info, prepared=None, regenerate=False):
+    """Prompt for the fast caption-based generation (reduce step for long transcripts)"""
+    condensed, prompt_transcript = prepared or prepare_transcript_for_prompt(transcript, video_info, regenerate)
+    label = 'Transcript notes (condensed section by section, in order)' if condensed else 'Transcript'
+    
+    return f"""Create a well-structured blog article from this YouTube video transcript:
 
 Title: {video_info.get('title', 'Video Analysis')}
 Channel: {video_info.get('channel', 'YouTube')}
 
-Transcript:
-{limited_transcript}
+{label}:
+{prompt_transcript}
 
 Write a comprehensive blog article with:
 - Engaging introduction
@@ -199,50 +583,128 @@ Write a comprehensive blog article with:
 - 500-800 words
 
 Make it readable and engaging for a general audience."""
+
+def generate_blog_instant(transcript, video_info, regenerate=False):
+    """Fast blog generation with Gemini Flash"""
+    try:
+        prompt = build_instant_prompt(transcript, video_info, regenerate=regenerate)
         
-        response = model.generate_content(prompt)
-        return response.text
+        return generate_content_cached(prompt, regenerate=regenerate)
         
+    except ratelimit.RateLimited:
+        raise
     except Exception as e:
         raise ValueError(f"Blog generation failed: {str(e)}")
 
+def stream_blog_content(prompt, regenerate=False):
+    """Yield Gemini output for a prompt as it is produced"""
+    try:
+        key = llm_cache_key(prompt)
+        if not regenerate:
+            cached = llm_cache.get(key)
+            if cached:
+                yield cached
+                return
+        
+        if not os.getenv('GEMINI_API_KEY'):
+            raise ValueError("Gemini API key not configured")
+        
+        model = clients.get_gemini_model(GEMINI_MODEL)
+        parts = []
+        with metrics.timer('gemini'):
+            response = ratelimit.call('gemini', lambda: model.generate_content(prompt, stream=True))
+            for chunk in response:
+                text = chunk.text if chunk.parts else ''
+                if text:
+                    parts.append(text)
+                    yield text
+        count_llm_bytes(prompt, ''.join(parts))
+        
+        if not parts:
+            raise ValueError("No content generated from Gemini")
+        llm_cache.set(key, ''.join(parts))
+        
+    except ratelimit.RateLimited:
+        raise
+    except Exception as e:
+        print(f"Blog streaming error: {e}")
+        raise ValueError(f"Failed to generate blog article: {str(e)}")
 
-def extract_video_id(url):
-    """Extract YouTube video ID from URL"""
-    patterns = [
-        r'(?:https?://)?(?:www\.)?youtube\.com/watch\?v=([^&\n?#]+)',
-        r'(?:https?://)?(?:www\.)?youtu\.be/([^&\n?#]+)',
-        r'(?:https?://)?(?:www\.)?youtube\.com/embed/([^&\n?#]+)',
-        r'(?:https?://)?(?:www\.)?youtube\.com/shorts/([^&\n?#]+)',
-    ]
+async def stream_blog_content_async(prompt, regenerate=False):
+    """stream_blog_content for async views, reading Gemini's stream without a thread"""
+    try:
+        key = llm_cache_key(prompt)
+        if not regenerate:
+            cached = await sync_to_async(llm_cache.get, thread_sensitive=False)(key)
+            if cached:
+                yield cached
+                return
+        
+        if not os.getenv('GEMINI_API_KEY'):
+            raise ValueError("Gemini API key not configured")
+        
+        model = clients.get_gemini_model(GEMINI_MODEL)
+        parts = []
+        with metrics.timer('gemini'):
+            response = await ratelimit.acall('gemini', lambda: model.generate_content_async(prompt, stream=True))
+            async for chunk in response:
+                text = chunk.text if chunk.parts else ''
+                if text:
+                    parts.append(text)
+                    yield text
+        count_llm_bytes(prompt, ''.join(parts))
+        
+        if not parts:
+            raise ValueError("No content generated from Gemini")
+        await sync_to_async(llm_cache.set, thread_sensitive=False)(key, ''.join(parts))
+        
+    except ratelimit.RateLimited:
+        raise
+    except Exception as e:
+        print(f"Blog streaming error: {e}")
+        raise ValueError(f"Failed to generate blog article: {str(e)}")
+
+
+def extract_video_info(link):
+    """Run the yt-dlp extraction once and keep the raw info for the download step"""
+    ydl_opts = {
+        'quiet': True,
+        'no_warnings': True,
+        'extract_flat': False,
+    }
     
-    for pattern in patterns:
-        match = re.search(pattern, url)
-        if match:
-            return match.group(1)
-    return None
+    with clients.borrow_ydl(ydl_opts) as ydl:
+        info = ratelimit.call('youtube', lambda: ydl.extract_info(link, download=False))
+    
+    video_id = extract_video_id(link)
+    if video_id:
+        raw_info_cache.set(video_id, info)
+    return info
 
+@metrics.timed('metadata')
 def get_video_info_enhanced(link):
     """Get enhanced video information using yt-dlp"""
+    video_id = extract_video_id(link)
+    if video_id:
+        cached = metadata_cache.get(video_id)
+        if cached:
+            return cached
+    
     try:
-        ydl_opts = {
-            'quiet': True,
-            'no_warnings': True,
-            'extract_flat': False,
-        }
+        info = extract_video_info(link)
         
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            info = ydl.extract_info(link, download=False)
-            
-            return {
-                'title': info.get('title', 'Unknown Title'),
-                'duration': format_duration(info.get('duration', 0)),
-                'channel': info.get('uploader', 'Unknown Channel'),
-                'description': info.get('description', '')[:300] + '...' if info.get('description') else '',
-                'view_count': info.get('view_count', 0),
-                'upload_date': info.get('upload_date', ''),
-                'tags': info.get('tags', [])[:5]  # First 5 tags for SEO
-            }
+        video_info = {
+            'title': info.get('title', 'Unknown Title'),
+            'duration': format_duration(info.get('duration', 0)),
+            'channel': info.get('uploader', 'Unknown Channel'),
+            'description': info.get('description', '')[:300] + '...' if info.get('description') else '',
+            'view_count': info.get('view_count', 0),
+            'upload_date': info.get('upload_date', ''),
+            'tags': info.get('tags', [])[:5]  # First 5 tags for SEO
+        }
+        if video_id:
+            metadata_cache.set(video_id, video_info)
+        return video_info
             
     except Exception as e:
         print(f"Error getting video info: {e}")
@@ -262,140 +724,346 @@ def format_duration(seconds):
     else:
         return f"{minutes}m {secs}s"
 
+class ChunkedAudioStream(io.RawIOBase):
+    """Read-only file object over an iterator of byte chunks"""
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._buffer = b''
+        self.bytes_read = 0
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        while not self._buffer:
+            try:
+                self._buffer = next(self._chunks)
+            except StopIteration:
+                return 0
+        size = min(len(buffer), len(self._buffer))
+        buffer[:size] = self._buffer[:size]
+        self._buffer = self._buffer[size:]
+        self.bytes_read += size
+        return size
+
+def get_audio_stream_format(link):
+    """Pick the small audio-only format and return it if it can be fetched over plain HTTP"""
+    video_id = extract_video_id(link)
+    info = raw_info_cache.get(video_id) if video_id else None
+    if not info:
+        info = extract_video_info(link)
+    
+    ydl_opts = {
+        'format': AUDIO_FORMAT,
+        'quiet': True,
+        'no_warnings': True,
+    }
+    with clients.borrow_ydl(ydl_opts) as ydl:
+        selected = ydl.process_ie_result(copy.deepcopy(info), download=False)
+    
+    # Merged or fragmented formats (DASH/HLS) need yt-dlp's downloader
+    if selected.get('requested_formats') or selected.get('protocol') not in ('http', 'https'):
+        return None
+    return selected
+
+def open_audio_range(session, url, headers):
+    """Start one audio request, raising on HTTP errors so throttled requests get retried"""
+    response = session.get(url, headers=headers, stream=True, timeout=30)
+    try:
+        response.raise_for_status()
+    except Exception:
+        response.close()
+        raise
+    return response
+
+def stream_audio_chunks(audio_format, chunk_size=256 * 1024):
+    """Yield the audio bytes as they arrive, in ranged requests when yt-dlp asks for them"""
+    headers = dict(audio_format.get('http_headers') or {})
+    range_size = (audio_format.get('downloader_options') or {}).get('http_chunk_size')
+    start = 0
+    
+    session = clients.get_http_session()
+    while True:
+        request_headers = dict(headers)
+        if range_size:
+            request_headers['Range'] = f'bytes={start}-{start + range_size - 1}'
+        
+        response = ratelimit.call(
+            'youtube', lambda: open_audio_range(session, audio_format['url'], request_headers)
+        )
+        with response:
+            received = 0
+            for chunk in response.iter_content(chunk_size):
+                received += len(chunk)
+                yield chunk
+        metrics.add_bytes('audio', received)
+        
+        # A full (non-ranged) response or a short range means we are done
+        if not range_size or response.status_code != 206 or received < range_size:
+            break
+        start += received
+
+def get_audio_stream(link):
+    """File object streaming the audio-only format, or None if it has to be downloaded first"""
+    try:
+        audio_format = get_audio_stream_format(link)
+        if audio_format:
+            return ChunkedAudioStream(stream_audio_chunks(audio_format))
+    except Exception as e:
+        print(f"Audio stream unavailable: {e}")
+    return None
+
+@metrics.timed('audio_download')
 def download_audio_enhanced(link):
     """Simplified audio download"""
     try:
         temp_dir = tempfile.mkdtemp()
         
         ydl_opts = {
-            'format': 'worst[ext=mp4]',  # Use worst quality for speed
-            'outtmpl': f'{temp_dir}/%(id)s.%(ext)s',
+            'format': AUDIO_FORMAT,
+            'outtmpl': '%(id)s.%(ext)s',
             'quiet': True,
             'no_warnings': True,
             'extract_flat': False,
         }
         
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            info = ydl.extract_info(link, download=True)
+        # Reuse the info from the metadata step instead of extracting again
+        video_id = extract_video_id(link)
+        info = raw_info_cache.get(video_id) if video_id else None
+        
+        # Pooled instances share the options, the output directory is set per download
+        with clients.borrow_ydl(ydl_opts, paths={'home': temp_dir}) as ydl:
+            if info:
+                ratelimit.call('youtube', lambda: ydl.process_ie_result(copy.deepcopy(info), download=True))
+            else:
+                ratelimit.call('youtube', lambda: ydl.extract_info(link, download=True))
             
             # Find downloaded file
             import glob
             files = glob.glob(f"{temp_dir}/*")
             if files:
+                metrics.add_bytes('audio', os.path.getsize(files[0]))
                 return files[0], temp_dir
                     
         return None, None
         
+    except ratelimit.RateLimited:
+        raise
     except Exception as e:
         print(f"Audio download failed: {e}")
         return None, None
 
+def wants_chunked_transcription(link):
+    """Whether the video is long enough to transcribe in parallel chunks, and ffmpeg is here to cut it"""
+    if not CHUNKED_TRANSCRIPTION or not audio.ffmpeg_available():
+        return False
+    video_id = extract_video_id(link)
+    info = raw_info_cache.get(video_id) if video_id else None
+    if not info:
+        # Metadata served from its cache leaves no raw info; the stream or download would extract it anyway
+        try:
+            info = extract_video_info(link)
+        except ratelimit.RateLimited:
+            raise
+        except Exception as e:
+            print(f"Could not read the video duration: {e}")
+            return False
+    return (info.get('duration') or 0) >= CHUNKED_TRANSCRIPTION_MIN_SECONDS
+
+def is_long_audio(path):
+    """Whether downloaded audio is long enough to chunk, by its own header (yt-dlp doesn't always know)"""
+    if not CHUNKED_TRANSCRIPTION or not audio.ffmpeg_available():
+        return False
+    try:
+        return audio.probe_duration(path) >= CHUNKED_TRANSCRIPTION_MIN_SECONDS
+    except audio.AudioError:
+        return False
+
+def submit_transcription(transcriber, audio_input, retries=None):
+    """Upload audio and queue an AssemblyAI job, then wait for it.
+
+    Only the submit goes through the rate limiter: once the job has an id,
+    a throttled poll must not upload the audio and start another job.
+    """
+    with metrics.timer('assemblyai'):
+        transcript = ratelimit.call('assemblyai', lambda: transcriber.submit(audio_input), retries=retries)
+        return transcript.wait_for_completion()
+
+def transcribe_file(transcriber, audio_file):
+    """One AssemblyAI job for an audio file, raising if it failed"""
+    transcript = submit_transcription(transcriber, audio_file)
+    if transcript.status == clients.assemblyai().TranscriptStatus.error:
+        raise ValueError(f"Transcription failed: {transcript.error}")
+    return transcript
+
+def transcript_words(transcript):
+    """Word timings in seconds"""
+    return [
+        {'start': word.start / 1000, 'end': word.end / 1000, 'text': word.text}
+        for word in (transcript.words or [])
+    ]
+
+def transcribe_audio_in_chunks(transcriber, audio_file):
+    """Transcribe long audio as concurrent AssemblyAI jobs cut at silences, stitched back in order"""
+    def transcribe_chunk(chunk_path):
+        transcript = transcribe_file(transcriber, chunk_path)
+        return transcript_words(transcript), transcript.confidence
+    
+    return audio.transcribe_in_chunks(audio_file, transcribe_chunk)
+
+@metrics.timed('transcription')
 def get_transcription_enhanced(link):
     """Simplified transcription without advanced features"""
     try:
+        video_id = extract_video_id(link)
+        if video_id:
+            cached = transcript_cache.get(f"assemblyai:{video_id}")
+            if cached:
+                return cached
+
         if not os.getenv("ASSEMBLYAI_API_KEY"):
             raise ValueError("AssemblyAI API key not configured")
         
-        # Download audio
-        audio_file, temp_dir = download_audio_enhanced(link)
-        if not audio_file:
-            raise ValueError("Failed to download audio from video")
+        # Basic transcription only, with the transcriber shared by this worker
+        transcriber = clients.get_transcriber()
         
+        # Stream the audio straight into the upload, temp files are only a fallback.
+        # Long videos are downloaded instead, to be cut into chunks transcribed in parallel
+        chunked = wants_chunked_transcription(link)
+        transcript = None
+        result = None
+        audio_stream = None if chunked else get_audio_stream(link)
+        if audio_stream:
+            try:
+                # A consumed stream can't be sent again, so a throttled upload falls back to the download
+                with metrics.timer('assemblyai'):
+                    submitted = ratelimit.call('assemblyai', lambda: transcriber.submit(audio_stream), retries=0)
+            except Exception as e:
+                print(f"Streaming upload failed, falling back to download: {e}")
+            else:
+                with metrics.timer('assemblyai'):
+                    transcript = submitted.wait_for_completion()
+        
+        temp_dir = None
         try:
-            # Basic transcription only
-            config = aai.TranscriptionConfig(
-                punctuate=True,
-                format_text=True,
-            )
+            if transcript is None:
+                # Download audio
+                audio_file, temp_dir = download_audio_enhanced(link)
+                if not audio_file:
+                    raise ValueError("Failed to download audio from video")
+                if chunked or is_long_audio(audio_file):
+                    try:
+                        result = transcribe_audio_in_chunks(transcriber, audio_file)
+                    except audio.AudioError as e:
+                        print(f"Chunked transcription unavailable, sending the audio whole: {e}")
+                if result is None:
+                    transcript = transcribe_file(transcriber, audio_file)
             
-            transcriber = aai.Transcriber(config=config)
-            transcript = transcriber.transcribe(audio_file)
-            
-            if transcript.status == aai.TranscriptStatus.error:
-                raise ValueError(f"Transcription failed: {transcript.error}")
+            if result is None:
+                if transcript.status == clients.assemblyai().TranscriptStatus.error:
+                    raise ValueError(f"Transcription failed: {transcript.error}")
+                result = {
+                    'text': transcript.text or '',
+                    'confidence': transcript.confidence,
+                    'segments': transcript_words(transcript),
+                }
             
             # Return simple transcript data
-            return {
-                'text': transcript.text or '',
+            transcript_data = {
+                'text': result['text'],
                 'highlights': [],
                 'speakers': {},
                 'sentiment': [],
                 'entities': [],
-                'confidence': 0.95
+                'confidence': result['confidence'] or 0.95,
+                # Word timings in seconds
+                'segments': result['segments'],
             }
+            if video_id and transcript_data['text']:
+                transcript_cache.set(f"assemblyai:{video_id}", transcript_data)
+            return transcript_data
             
         finally:
             # Clean up
             if temp_dir and os.path.exists(temp_dir):
                 shutil.rmtree(temp_dir, ignore_errors=True)
                 
+    except ratelimit.RateLimited:
+        raise
     except Exception as e:
         print(f"Transcription error: {e}")
         raise ValueError(f"Failed to get transcript: {str(e)}")
 
-def generate_blog_from_transcription_enhanced(transcript_data, video_info):
+def build_enhanced_prompt(transcript_data, video_info, prepared=None, regenerate=False):
+    """Prompt for generation from a full AssemblyAI transcription (reduce step for long transcripts)"""
+    # Extract transcript components
+    transcript_text = transcript_data.get('text', '')
+    highlights = transcript_data.get('highlights', [])
+    speakers = transcript_data.get('speakers', {})
+    entities = transcript_data.get('entities', [])
+    condensed, prompt_transcript = prepared or prepare_transcript_for_prompt(transcript_text, video_info, regenerate)
+    transcript_heading = 'TRANSCRIPT NOTES (CONDENSED SECTION BY SECTION, IN ORDER)' if condensed else 'FULL TRANSCRIPT'
+    
+    # Build enhanced prompt
+    prompt = f"""
+    Create a comprehensive, well-structured blog article based on this YouTube video content:
+
+    VIDEO DETAILS:
+    - Title: {video_info.get('title', 'Unknown')}
+    - Channel: {video_info.get('channel', 'Unknown')}
+    - Duration: {video_info.get('duration', 'Unknown')}
+    - Description: {video_info.get('description', '')[:200]}
+
+    TRANSCRIPT ANALYSIS:
+    - Word Count: {len(transcript_text.split())} words
+    - Speakers Detected: {len(speakers)} {"(Multi-speaker content)" if len(speakers) > 1 else "(Single speaker)"}
+    - Key Entities: {', '.join([e.get('text', '') for e in entities[:5]])}
+
+    KEY HIGHLIGHTS FROM AI ANALYSIS:
+    {chr(10).join([f"• {h.get('text', '')}" for h in highlights[:8]])}
+
+    {transcript_heading}:
+    {prompt_transcript}
+
+    INSTRUCTIONS:
+    1. Create a professional blog article (NOT a video transcript)
+    2. Use proper blog structure with engaging headings
+    3. Include an compelling introduction and conclusion
+    4. Incorporate the key highlights naturally
+    5. Make it SEO-friendly with relevant keywords
+    6. Write in a conversational yet professional tone
+    7. Include 600-800 words
+    8. Add subheadings to break up content
+
+    BLOG STRUCTURE:
+    - Compelling headline
+    - Introduction hook
+    - Main content sections with subheadings
+    - Key takeaways section
+    - Conclusion with call-to-action
+
+    Generate a complete, publication-ready blog article:
+    """
+    return prompt
+
+def generate_blog_from_transcription_enhanced(transcript_data, video_info, regenerate=False):
     """Enhanced blog generation with video context and transcript insights"""
     try:
         if not os.getenv('GEMINI_API_KEY'):
             raise ValueError("Gemini API key not configured")
         
-        model = genai.GenerativeModel('gemini-1.5-flash')
-        
-        # Extract transcript components
-        transcript_text = transcript_data.get('text', '')
-        highlights = transcript_data.get('highlights', [])
-        speakers = transcript_data.get('speakers', {})
-        entities = transcript_data.get('entities', [])
-        
-        # Build enhanced prompt
-        prompt = f"""
-        Create a comprehensive, well-structured blog article based on this YouTube video content:
-
-        VIDEO DETAILS:
-        - Title: {video_info.get('title', 'Unknown')}
-        - Channel: {video_info.get('channel', 'Unknown')}
-        - Duration: {video_info.get('duration', 'Unknown')}
-        - Description: {video_info.get('description', '')[:200]}
-
-        TRANSCRIPT ANALYSIS:
-        - Word Count: {len(transcript_text.split())} words
-        - Speakers Detected: {len(speakers)} {"(Multi-speaker content)" if len(speakers) > 1 else "(Single speaker)"}
-        - Key Entities: {', '.join([e.get('text', '') for e in entities[:5]])}
-
-        KEY HIGHLIGHTS FROM AI ANALYSIS:
-        {chr(10).join([f"• {h.get('text', '')}" for h in highlights[:8]])}
-
-        FULL TRANSCRIPT:
-        {transcript_text[:3000]}  # Limit for token efficiency
-
-        INSTRUCTIONS:
-        1. Create a professional blog article (NOT a video transcript)
-        2. Use proper blog structure with engaging headings
-        3. Include an compelling introduction and conclusion
-        4. Incorporate the key highlights naturally
-        5. Make it SEO-friendly with relevant keywords
-        6. Write in a conversational yet professional tone
-        7. Include 600-800 words
-        8. Add subheadings to break up content
-
-        BLOG STRUCTURE:
-        - Compelling headline
-        - Introduction hook
-        - Main content sections with subheadings
-        - Key takeaways section
-        - Conclusion with call-to-action
-
-        Generate a complete, publication-ready blog article:
-        """
-        
-        response = model.generate_content(prompt)
-        generated_content = response.text
+        prompt = build_enhanced_prompt(transcript_data, video_info, regenerate=regenerate)
+        
+        generated_content = generate_content_cached(prompt, regenerate=regenerate)
         
         if not generated_content:
             raise ValueError("No content generated from Gemini")
         
         return generated_content
         
+    except ratelimit.RateLimited:
+        raise
     except Exception as e:
         print(f"Blog generation error: {e}")
         raise ValueError(f"Failed to generate blog article: {str(e)}")
@@ -405,11 +1073,60 @@ def generate_blog_from_transcription_enhanced(transcript_data, video_info):
 
 @login_required
 def blog_list(request):
-    """Display user's blog articles"""
-    blog_articles = BlogPost.objects.filter(user=request.user).order_by('-created_at')
-    return render(request, "all-blogs.html", {'blog_articles': blog_articles})
+    """Display user's blog articles, a page at a time"""
+    try:
+        blog_articles, next_cursor = paginate(
+            blog_summaries(request.user), request.GET.get('cursor'), get_page_size(request.GET.get('page_size'))
+        )
+    except InvalidCursor:
+        return redirect('blog_list')
+    for blog in blog_articles:
+        blog.excerpt = make_excerpt(blog.excerpt_source)
+    return render(request, "all-blogs.html", {'blog_articles': blog_articles, 'next_cursor': next_cursor})
+
+def blog_summaries(user):
+    """User's blogs for list pages: the start of the article instead of the full text"""
+    # Read twice the excerpt length since markdown markup is stripped afterwards
+    return BlogPost.objects.filter(user=user).defer('generated_content', 'rendered_html', 'content_compressed').annotate(
+        excerpt_source=Substr(article_text(), 1, EXCERPT_SOURCE_CHARS)
+    )
+
+def blog_updated_at(request, pk):
+    """updated_at of the user's blog, looked up once per request without loading the article"""
+    if not hasattr(request, '_blog_updated_at'):
+        request._blog_updated_at = None
+        if request.user.is_authenticated:
+            request._blog_updated_at = BlogPost.objects.filter(
+                id=pk, user=request.user
+            ).values_list('updated_at', flat=True).first()
+    return request._blog_updated_at
+
+def blog_etag(request, pk):
+    """ETag of a blog for conditional GETs"""
+    updated_at = blog_updated_at(request, pk)
+    return f"blog-{pk}-{updated_at.timestamp()}" if updated_at else None
+
+def blog_last_modified(request, pk):
+    """Last-Modified of a blog for conditional GETs"""
+    return blog_updated_at(request, pk)
+
+def blog_list_etag(request):
+    """ETag of a page of the user's blog list; the count catches deletions that leave the newest updated_at as is"""
+    if not request.user.is_authenticated:
+        return None
+    cursor = request.GET.get('cursor')
+    try:
+        # Decoded, so the tag only ever holds timestamps and ids whatever the client sent
+        position = '{}:{}'.format(*decode_cursor(cursor)) if cursor else 'first'
+    except InvalidCursor:
+        return None
+    page_size = get_page_size(request.GET.get('page_size'))
+    stats = BlogPost.objects.filter(user=request.user).aggregate(latest=Max('updated_at'), count=Count('id'))
+    latest = stats['latest'].timestamp() if stats['latest'] else 0
+    return f"blogs-{request.user.id}-{stats['count']}-{latest}-{page_size}-{position}"
 
 @login_required
+@condition(etag_func=blog_etag, last_modified_func=blog_last_modified)
 def blog_details(request, pk):
     """Display specific blog article"""
     try:
@@ -421,6 +1138,18 @@ def blog_details(request, pk):
     except BlogPost.DoesNotExist:
         return JsonResponse({'error': 'Blog post not found'}, status=404)
 
+def metrics_endpoint(request):
+    """Prometheus metrics of every worker on this host"""
+    token = getattr(settings, 'METRICS_TOKEN', '')
+    if token:
+        # Constant-time, so response timings don't reveal how much of the token matched
+        allowed = hmac.compare_digest(request.headers.get('Authorization', '').encode(), f"Bearer {token}".encode())
+    else:
+        allowed = request.user.is_staff
+    if not allowed:
+        return HttpResponse('Forbidden', status=403, content_type='text/plain')
+    return HttpResponse(metrics.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
 # Legacy functions for backward compatibility
 def yt_title(link):
     """Legacy function - use get_video_info_enhanced instead"""
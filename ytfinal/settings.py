@@ -12,6 +12,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 
 from pathlib import Path
 import os
+import dj_database_url
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -53,7 +54,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware', 
+    'myapp.middleware.AsyncWhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -89,33 +90,29 @@ WSGI_APPLICATION = 'ytfinal.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
-# DATABASES = {
-#     'default': {
-#         'ENGINE': 'django.db.backends.sqlite3',
-#         'NAME': BASE_DIR / 'db.sqlite3',
-#     }
-# }
-
-# DATABASES = {
-#     'default': {
-#         'ENGINE': 'django.db.backends.postgresql',
-#         'NAME': os.getenv('SUPABASE_DB_NAME'),
-#         'USER': os.getenv('SUPABASE_DB_USER'),
-#         'PASSWORD': os.getenv('SUPABASE_DB_PASSWORD'),
-#         'HOST': os.getenv('SUPABASE_DB_HOST'),
-#         'PORT': os.getenv('SUPABASE_DB_PORT'),
-#         'OPTIONS': {
-#             'sslmode': 'require',
-#         },
-#     }
-# }
-
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# DATABASE_URL (e.g. Supabase PostgreSQL) in production, SQLite for local use
+if os.getenv('DATABASE_URL'):
+    DATABASES = {
+        'default': dj_database_url.config(
+            # Keep connections open between requests and check them before reuse
+            conn_max_age=int(os.getenv('DB_CONN_MAX_AGE', 600)),
+            conn_health_checks=True,
+            ssl_require=os.getenv('DB_SSL_REQUIRE', 'False').lower() == 'true',
+        )
+    }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': BASE_DIR / 'db.sqlite3',
+            'OPTIONS': {
+                # WAL lets reads go on while a worker writes; writers wait for the lock instead of failing
+                'init_command': 'PRAGMA journal_mode=WAL; PRAGMA synchronous=NORMAL;',
+                'transaction_mode': 'IMMEDIATE',
+                'timeout': 20,
+            },
+        }
     }
-}
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -177,6 +174,36 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 LOGIN_URL = 'login'
 
+# Caches
+# The "shared" cache lives on disk so every gunicorn worker sees the same entries.
+
+CACHE_DIR = Path(os.getenv('CACHE_DIR', BASE_DIR / '.cache'))
+
+TRANSCRIPT_CACHE_TTL = int(os.getenv('TRANSCRIPT_CACHE_TTL', 7 * 24 * 3600))
+TRANSCRIPT_CACHE_LOCAL_SIZE = int(os.getenv('TRANSCRIPT_CACHE_LOCAL_SIZE', 128))
+METADATA_CACHE_TTL = int(os.getenv('METADATA_CACHE_TTL', 24 * 3600))
+METADATA_CACHE_LOCAL_SIZE = int(os.getenv('METADATA_CACHE_LOCAL_SIZE', 512))
+LLM_CACHE_TTL = int(os.getenv('LLM_CACHE_TTL', 7 * 24 * 3600))
+LLM_CACHE_LOCAL_SIZE = int(os.getenv('LLM_CACHE_LOCAL_SIZE', 256))
+# yt-dlp format URLs expire after a few hours, so raw info is only kept briefly
+RAW_INFO_CACHE_TTL = int(os.getenv('RAW_INFO_CACHE_TTL', 600))
+# Videos without usable captions are remembered, not retried on every submission
+NO_CAPTIONS_CACHE_TTL = int(os.getenv('NO_CAPTIONS_CACHE_TTL', 6 * 3600))
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'shared': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': CACHE_DIR / 'shared',
+        'TIMEOUT': TRANSCRIPT_CACHE_TTL,
+        'OPTIONS': {
+            'MAX_ENTRIES': int(os.getenv('SHARED_CACHE_MAX_ENTRIES', 5000)),
+        },
+    },
+}
+
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
         'rest_framework.authentication.SessionAuthentication',
@@ -184,4 +211,88 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
-}
\ No newline at end of file
+}
+
+# Blogs for the same video and prompt version younger than this are reused
+BLOG_REUSE_MAX_AGE = int(os.getenv('BLOG_REUSE_MAX_AGE', 7 * 24 * 3600))
+
+# Threads per web worker that run queued generation jobs
+GENERATION_JOB_WORKERS = int(os.getenv('GENERATION_JOB_WORKERS', 4))
+
+# Threads per process for pipeline stages that run concurrently (captions + metadata)
+PIPELINE_STAGE_WORKERS = int(os.getenv('PIPELINE_STAGE_WORKERS', 16))
+
+# Threads per process for async generations' audio downloads and transcriptions (not the stage pool)
+PIPELINE_TRANSCRIPTION_WORKERS = int(os.getenv('PIPELINE_TRANSCRIPTION_WORKERS', 8))
+
+# Transcripts longer than SINGLE_PROMPT_CHARS are split into TRANSCRIPT_CHUNK_TOKENS segments
+# and summarized with up to LLM_MAX_CONCURRENCY parallel Gemini calls before the blog prompt
+SINGLE_PROMPT_CHARS = int(os.getenv('SINGLE_PROMPT_CHARS', 8000))
+TRANSCRIPT_CHUNK_TOKENS = int(os.getenv('TRANSCRIPT_CHUNK_TOKENS', 2000))
+LLM_MAX_CONCURRENCY = int(os.getenv('LLM_MAX_CONCURRENCY', 4))
+
+# Seconds an EventSource stream URL from /generate_blog_stream/token/ stays usable
+STREAM_TOKEN_MAX_AGE = int(os.getenv('STREAM_TOKEN_MAX_AGE', 60))
+
+# Batch generation limits (per batch)
+BATCH_MAX_ITEMS = int(os.getenv('BATCH_MAX_ITEMS', 200))
+BATCH_MAX_CONCURRENCY = int(os.getenv('BATCH_MAX_CONCURRENCY', 8))
+
+# Shared API clients (per worker): keep-alive connections and idle yt-dlp instances per option set
+HTTP_POOL_SIZE = int(os.getenv('HTTP_POOL_SIZE', 16))
+YDL_POOL_SIZE = int(os.getenv('YDL_POOL_SIZE', 4))
+
+# Outbound call budgets shared by every worker on the host: sustained calls per second and burst size
+PROVIDER_RATE_LIMITS = {
+    'youtube': {
+        'rate': float(os.getenv('YOUTUBE_RATE_LIMIT', 2)),
+        'burst': int(os.getenv('YOUTUBE_RATE_BURST', 10)),
+    },
+    'assemblyai': {
+        'rate': float(os.getenv('ASSEMBLYAI_RATE_LIMIT', 1)),
+        'burst': int(os.getenv('ASSEMBLYAI_RATE_BURST', 5)),
+    },
+    'gemini': {
+        'rate': float(os.getenv('GEMINI_RATE_LIMIT', 1)),
+        'burst': int(os.getenv('GEMINI_RATE_BURST', 5)),
+    },
+}
+
+# Throttled calls (429/503) are retried with jittered exponential backoff or the provider's Retry-After;
+# a call that would wait longer than RATE_LIMIT_MAX_WAIT seconds for a token fails with a 429 instead
+RATE_LIMIT_MAX_RETRIES = int(os.getenv('RATE_LIMIT_MAX_RETRIES', 4))
+RATE_LIMIT_BACKOFF_BASE = float(os.getenv('RATE_LIMIT_BACKOFF_BASE', 1))
+RATE_LIMIT_BACKOFF_MAX = float(os.getenv('RATE_LIMIT_BACKOFF_MAX', 60))
+RATE_LIMIT_MAX_WAIT = float(os.getenv('RATE_LIMIT_MAX_WAIT', 120))
+
+# The caption fast path is skipped for CAPTION_BREAKER_RECOVERY seconds after CAPTION_BREAKER_THRESHOLD
+# consecutive failures (e.g. YouTube blocking the server's IP), then one request probes it again
+CAPTION_BREAKER_THRESHOLD = int(os.getenv('CAPTION_BREAKER_THRESHOLD', 5))
+CAPTION_BREAKER_RECOVERY = int(os.getenv('CAPTION_BREAKER_RECOVERY', 120))
+
+# Audio at least CHUNKED_TRANSCRIPTION_MIN_SECONDS long is cut at silences into ~AUDIO_CHUNK_SECONDS pieces
+# overlapping by AUDIO_CHUNK_OVERLAP seconds and transcribed with up to AUDIO_CHUNK_CONCURRENCY jobs at once.
+# Needs the ffmpeg binary; without it (or with CHUNKED_TRANSCRIPTION=False) the audio is sent whole
+CHUNKED_TRANSCRIPTION = os.getenv('CHUNKED_TRANSCRIPTION', 'True').lower() == 'true'
+CHUNKED_TRANSCRIPTION_MIN_SECONDS = int(os.getenv('CHUNKED_TRANSCRIPTION_MIN_SECONDS', 1200))
+AUDIO_CHUNK_SECONDS = int(os.getenv('AUDIO_CHUNK_SECONDS', 600))
+AUDIO_CHUNK_OVERLAP = float(os.getenv('AUDIO_CHUNK_OVERLAP', 2))
+AUDIO_CHUNK_CONCURRENCY = int(os.getenv('AUDIO_CHUNK_CONCURRENCY', 4))
+
+# Blog list pages (web and API)
+BLOG_LIST_PAGE_SIZE = int(os.getenv('BLOG_LIST_PAGE_SIZE', 20))
+BLOG_LIST_MAX_PAGE_SIZE = int(os.getenv('BLOG_LIST_MAX_PAGE_SIZE', 100))
+
+# Store new blog articles zlib-compressed (SQLite only; PostgreSQL compresses long text itself).
+# Search and list excerpts read them through an SQL function the app adds to each connection
+COMPRESS_BLOG_CONTENT = os.getenv('COMPRESS_BLOG_CONTENT', 'False').lower() == 'true'
+
+# Import the provider SDKs (Gemini/gRPC, AssemblyAI, yt-dlp) at startup instead of on first use.
+# Meant for gunicorn's preload_app (see gunicorn.conf.py): the master imports them once and the
+# forked workers share those pages
+PRELOAD_SDKS = os.getenv('PRELOAD_SDKS', 'False').lower() == 'true'
+
+# /metrics (Prometheus): scraped with "Authorization: Bearer <METRICS_TOKEN>", or by staff users if unset.
+# Each worker writes its numbers under CACHE_DIR/metrics every METRICS_FLUSH_INTERVAL seconds
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+METRICS_FLUSH_INTERVAL = float(os.getenv('METRICS_FLUSH_INTERVAL', 2))